@@ -1,9 +1,9 @@
-from collections import defaultdict
+from typing import Dict
 
 from algorithms.tl_manager import TLManager
 import numpy as np
 
-from server.simulation_objects.trafficlights.traffic_light import TrafficLight
+from server.simulation_objects.cars.i_car import ICar
 
 
 class CostBased(TLManager):
@@ -14,29 +14,94 @@ class CostBased(TLManager):
         self.waiting_time_to_charge = waiting_time_to_charge
         self.waiting_penalty = waiting_penalty
 
-        self.time_tracker = defaultdict(int)
+        # the lanes tell the algorithm about the cars that enter and leave them, so the time of the cars is not
+        # tracked by a pass over all cars on each iteration.
+        # the time of a car is the amount of iterations since it entered, so only its iteration of entering is kept
+        self.__iterations = 0
+        self.__entered_at: Dict[ICar, int] = dict()
+        # the cars that left since the last iteration. a car that moves between lanes of the junction leaves one lane
+        # and enters the other, and keeps its time
+        self.__left: Dict[ICar, int] = dict()
+        # the sum of the penalties of all cars is calculated from the sum of their iterations of entering, and the
+        # amount of cars by their iteration of entering modulo waiting_time_to_charge
+        self.__entered_at_sum = 0
+        self.__amount_by_phase = [0] * waiting_time_to_charge
+        for tl in self._junction.lights:
+            for lane in tl.lanes:
+                lane.cars_listener = self
+                for car in lane.get_all_cars():
+                    self.car_entered(car)
 
-    def _cost_for_tl(self, current_tl: TrafficLight):
-        all_cars = sum([tl.all_cars for tl in self._junction.lights], [])
-        cars_per_lane_in_green_tl = [[car for car in lane.get_all_cars()] for lane in current_tl.lanes]
-        passing_cars = [cars[0] for cars in cars_per_lane_in_green_tl if len(cars) > 0]
+    @property
+    def time_tracker(self) -> Dict[ICar, int]:
+        """
+        :return: for each car in the lanes of the junction's lights, the amount of iterations it has been there
+        """
+        return {car: self.__iterations - entered_at for car, entered_at in self.__entered_at.items()}
 
-        passing_cars_gain = self.passing_car_revenue * len(passing_cars)
+    def car_entered(self, car: ICar):
+        self.__track(car, self.__left.pop(car, self.__iterations))
 
-        waiting_cars_punishment = sum([self.waiting_penalty * (self.time_tracker[car] // self.waiting_time_to_charge)
-                                       for car in all_cars if car not in passing_cars])
+    def car_left(self, car: ICar):
+        entered_at = self.__entered_at.pop(car)
+        self.__left[car] = entered_at
+        self.__entered_at_sum -= entered_at
+        self.__amount_by_phase[entered_at % self.waiting_time_to_charge] -= 1
 
-        return passing_cars_gain - waiting_cars_punishment
+    def __track(self, car: ICar, entered_at: int):
+        self.__entered_at[car] = entered_at
+        self.__entered_at_sum += entered_at
+        self.__amount_by_phase[entered_at % self.waiting_time_to_charge] += 1
 
     def _track_time(self):
-        all_cars = sum([tl.all_cars for tl in self._junction.lights], [])
-        for car in self.time_tracker.keys() - set(all_cars):
-            self.time_tracker.pop(car)
+        # all cars wait one more iteration, and the cars that left are not tracked anymore
+        self.__iterations += 1
+        self.__left = dict()
 
-        for car in all_cars:
-            self.time_tracker[car] += 1
+    def __penalty(self, car: ICar) -> int:
+        return self.waiting_penalty * ((self.__iterations - self.__entered_at[car]) // self.waiting_time_to_charge)
+
+    def __total_penalty(self) -> int:
+        # the waiting time of each car is the time it is charged for, plus the time since it was last charged,
+        # which only depends on its iteration of entering modulo waiting_time_to_charge
+        charge = self.waiting_time_to_charge
+        not_charged = sum(amount * ((self.__iterations - phase) % charge)
+                          for phase, amount in enumerate(self.__amount_by_phase))
+        charged = len(self.__entered_at) * self.__iterations - self.__entered_at_sum - not_charged
+        return self.waiting_penalty * (charged // charge)
 
     def _manage_lights(self):
         self._track_time()
 
-        return max(self._junction.lights, key=self._cost_for_tl)
+        # the cost of a light is the revenue of the cars it lets pass, minus the penalty of all other cars.
+        # the penalty of all other cars is the penalty of all cars, without the penalty of the passing cars,
+        # so all lights are scored with one pass over the lanes
+        total_penalty = self.__total_penalty()
+        best_light, best_cost = None, None
+        for tl in self._junction.lights:
+            # the first car of each lane passes when the light is green
+            passing_cars = [lane.get_all_cars()[0] for lane in tl.lanes if lane.cars_amount() > 0]
+            passing_cars_gain = self.passing_car_revenue * len(passing_cars)
+            waiting_cars_punishment = total_penalty - sum(self.__penalty(car) for car in passing_cars)
+            cost = passing_cars_gain - waiting_cars_punishment
+            # the first light with the highest cost, like max()
+            if best_cost is None or cost > best_cost:
+                best_light, best_cost = tl, cost
+        return best_light
+
+    def get_state(self) -> dict:
+        state = super().get_state()
+        state["time_tracker"] = {car.get_id(): time for car, time in self.time_tracker.items()}
+        return state
+
+    def set_state(self, state: dict, cars_by_id: Dict[int, ICar]):
+        super().set_state(state, cars_by_id)
+        # the cars of the lanes are already tracked, a car that is not in the state has just entered
+        time_tracker = state["time_tracker"]
+        cars = list(self.__entered_at)
+        self.__entered_at = dict()
+        self.__left = dict()
+        self.__entered_at_sum = 0
+        self.__amount_by_phase = [0] * self.waiting_time_to_charge
+        for car in cars:
+            self.__track(car, self.__iterations - time_tracker.get(car.get_id(), 0))
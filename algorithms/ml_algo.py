@@ -1,27 +1,27 @@
-import pickle
 import random
+from typing import Dict
 
 import numpy as np
-import pandas as pd
 
 from algorithms.algo_to_index import index_to_algo, algos_list_to_num
 from algorithms.cost_based import CostBased
+from algorithms.ml_inference import inference_scheduler
+from algorithms.ml_model import get_model
 from algorithms.tl_manager import TLManager
+from algorithms.upstream_load import upstream_load
 
+from server.simulation_objects.cars.i_car import ICar
 from server.simulation_objects.lanes.lane import Lane
 from server.simulation_objects.trafficlights.traffic_light import TrafficLight
 
 
 class MLAlgo(TLManager):
-    model_path = "algorithms/ml_algo_files/models/trained_model_30_40_random_forest_updated.pickle"
-    with open(model_path, "rb") as model_file:
-        model = pickle.load(model_file)
-
     def __init__(self, junction,
-                 time_limit=np.inf, depth=2, time_interval=40):
+                 time_limit=np.inf, depth=2, time_interval=40, model_path=None):
         super().__init__(junction, time_limit)
 
-        self.model = MLAlgo.model
+        # the model is loaded on the first use, once for the process
+        self.model = get_model(model_path)
 
         self.depth = depth
         self.time_interval = time_interval
@@ -29,6 +29,7 @@ class MLAlgo(TLManager):
         self._time_count = 0
         self.running_algo = CostBased(junction)
         self._secret = random.randint(0, 39)
+        inference_scheduler.register(self)
 
     @staticmethod
     def expected_traffic(tl: TrafficLight, depth):
@@ -36,20 +37,17 @@ class MLAlgo(TLManager):
 
     @staticmethod
     def expected_traffic_per_lane(lane: Lane, depth):
-        prev_lanes = lane._comes_from
-        traff = sum(len(prev_lane.get_all_cars()) for prev_lane in prev_lanes)
-
-        if depth > 0:
-            expected_traff = sum(MLAlgo.expected_traffic_per_lane(prev_lane, depth - 1) for prev_lane in prev_lanes)
-            return traff + expected_traff
+        # the upstream counts of all lanes are calculated together, once per change of the cars in the lanes
+        return upstream_load(lane).expected_traffic_per_lane(lane, depth)
 
-        return traff
-
-    def _change_algo(self):
+    def features(self) -> Dict[str, float]:
+        """
+        :return: the input of the model for the current state of the junction, by the features names
+        """
         def padd(arr):
             return arr + [0] * (4 - len(arr))
 
-        local_traffics = padd([len(tl.all_cars) for tl in self._lights])
+        local_traffics = padd([tl.cars_amount for tl in self._lights])
         local_traffics = {f"local_traffic{i}": traffic for i, traffic in enumerate(local_traffics)}
 
         expected_traffic = padd([MLAlgo.expected_traffic(tl, depth=self.depth - 1) for tl in self._lights])
@@ -61,19 +59,57 @@ class MLAlgo(TLManager):
                 in self._lights])
         nearby_junctions_algos = {f"nearby_algos{i}": algos for i, algos in enumerate(nearby_junctions_algos)}
 
-        predict_input = {**{**local_traffics, **expected_traffic}, **nearby_junctions_algos,
-                         "time_interval": self.time_interval}
+        return {**local_traffics, **expected_traffic, **nearby_junctions_algos, "time_interval": self.time_interval}
 
-        predict_input = pd.DataFrame(predict_input, index=[0])
+    @property
+    def time_count(self) -> int:
+        return self._time_count
 
-        chosen_algo_class = index_to_algo.get(self.model.predict(predict_input)[0], self.running_algo.__class__)
+    def is_due(self) -> bool:
+        """
+        :return: True if the algorithm should be chosen again in the current iteration
+        """
+        return (self._time_count + self._secret) % self.time_interval == 0
+
+    def _change_algo(self):
+        # the prediction is batched with all other instances that are due on this iteration
+        predicted = inference_scheduler.predicted_index(self)
+        chosen_algo_class = index_to_algo.get(predicted, self.running_algo.__class__)
 
         if chosen_algo_class != self.running_algo.__class__:
+            self.__stop_running_algo()
             self.running_algo: TLManager = chosen_algo_class(self._junction)
 
+    def __stop_running_algo(self):
+        # the lanes stop telling the replaced algorithm about their cars, a new CostBased listens to them itself
+        for tl in self._junction.lights:
+            for lane in tl.lanes:
+                if lane.cars_listener is self.running_algo:
+                    lane.cars_listener = None
+
     def _manage_lights(self):
-        if (self._time_count + self._secret) % self.time_interval == 0:
+        if self.is_due():
             self._change_algo()
 
         self._time_count += 1
         return self.running_algo._manage_lights()
+
+    def get_state(self) -> dict:
+        state = super().get_state()
+        state["time_count"] = self._time_count
+        state["secret"] = self._secret
+        # the running algorithm is created again by its class and time limit, like the algorithms of index_to_algo
+        state["running_algo"] = (self.running_algo.__class__.__name__, self.running_algo._time_limit,
+                                 self.running_algo.get_state())
+        return state
+
+    def set_state(self, state: dict, cars_by_id: Dict[int, ICar]):
+        super().set_state(state, cars_by_id)
+        self._time_count = state["time_count"]
+        self._secret = state["secret"]
+        name, time_limit, running_state = state["running_algo"]
+        if self.running_algo.__class__.__name__ != name or self.running_algo._time_limit != time_limit:
+            algos_classes = {algo.__name__: algo for algo in index_to_algo.values() if isinstance(algo, type)}
+            self.__stop_running_algo()
+            self.running_algo = algos_classes[name](self._junction, time_limit=time_limit)
+        self.running_algo.set_state(running_state, cars_by_id)
@@ -0,0 +1,60 @@
+import warnings
+from typing import Dict, List
+from weakref import WeakKeyDictionary, WeakSet
+
+import numpy as np
+
+# the features of the model, in the order of the columns it was trained on (the data gatherer's csv columns)
+FEATURES: List[str] = ["time_interval", *[f"local_traffic{i}" for i in range(4)],
+                       *[f"expected_traffic{i}" for i in range(4)], *[f"nearby_algos{i}" for i in range(4)]]
+
+
+class InferenceScheduler:
+    """
+    runs the model of all MLAlgo instances that are due on the same iteration with a single predict call.
+    the first instance that asks for its prediction on an iteration triggers the prediction of all instances
+    that are due on that iteration, and the others get their already predicted result when they ask for it.
+    so all instances of an iteration decide on the same state of the simulation, the state before any of them
+    has changed its algorithm.
+    """
+
+    def __init__(self):
+        # the scheduler does not keep the algorithms of finished simulations alive
+        self.__algos = WeakSet()
+        # for each algorithm: (the iteration of the prediction, the predicted algorithm index)
+        self.__predictions = WeakKeyDictionary()
+
+    def register(self, algo):
+        """
+        :param algo: an MLAlgo instance
+        """
+        self.__algos.add(algo)
+
+    def predicted_index(self, algo) -> int:
+        """
+        :param algo: a registered MLAlgo instance that is due on its current iteration
+        :return: the algorithm index that the model predicted for the instance
+        """
+        prediction = self.__predictions.get(algo)
+        if prediction is None or prediction[0] != algo.time_count:
+            self.__predict_due(algo)
+        return self.__predictions[algo][1]
+
+    def __predict_due(self, requesting_algo):
+        time_count, model = requesting_algo.time_count, requesting_algo.model
+        due = [algo for algo in self.__algos
+               if algo.time_count == time_count and algo.model is model and algo.is_due()]
+        columns = list(getattr(model, "feature_names_in_", FEATURES))
+        features: List[Dict[str, float]] = [algo.features() for algo in due]
+        matrix = np.array([[algo_features[column] for column in columns] for algo_features in features],
+                          dtype=np.float64)
+        with warnings.catch_warnings():
+            # the model was fitted on a data frame, the columns are already in its order
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            predictions = model.predict(matrix)
+        for algo, prediction in zip(due, predictions):
+            self.__predictions[algo] = (time_count, prediction)
+
+
+# the scheduler of the process
+inference_scheduler = InferenceScheduler()
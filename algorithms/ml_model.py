@@ -0,0 +1,58 @@
+import pickle
+from typing import Dict, Optional
+
+DEF_MODEL_PATH = "algorithms/ml_algo_files/models/trained_model_30_40_random_forest_updated.pickle"
+# models saved by joblib are loaded memory mapped, so forked processes share the model's arrays
+JOBLIB_SUFFIX = ".joblib"
+
+# the path of the model that MLAlgo uses, when it is not given another path
+__model_path = DEF_MODEL_PATH
+# the loaded models of the process, by their path
+__models: Dict[str, object] = dict()
+
+
+def set_model_path(path: str):
+    """
+    set the model that is used by default. the model is loaded only when it is first used
+    """
+    global __model_path
+    __model_path = path
+
+
+def get_model(path: Optional[str] = None):
+    """
+    :param path: path of a pickle or joblib model file. the default model path if None
+    :return: the model, loaded once for the whole process
+    """
+    if path is None:
+        path = __model_path
+    if path not in __models:
+        __models[path] = __load_model(path)
+    return __models[path]
+
+
+def preload_model(path: Optional[str] = None):
+    """
+    load the model now. call it before creating worker processes, so forked workers get the loaded model
+    instead of loading it again each
+    """
+    get_model(path)
+
+
+def save_mmap_model(model, path: str):
+    """
+    save the model in the joblib format, which get_model loads memory mapped
+    """
+    import joblib
+    if not path.endswith(JOBLIB_SUFFIX):
+        raise Exception(f"a memory mapped model path should end with {JOBLIB_SUFFIX}")
+    joblib.dump(model, path)
+
+
+def __load_model(path: str):
+    if path.endswith(JOBLIB_SUFFIX):
+        # joblib comes with sklearn, which the model needs anyway
+        import joblib
+        return joblib.load(path, mmap_mode="r")
+    with open(path, "rb") as model_file:
+        return pickle.load(model_file)
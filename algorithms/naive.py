@@ -1,6 +1,9 @@
+from typing import Dict
+
 import numpy as np
 
 from algorithms.tl_manager import TLManager
+from server.simulation_objects.cars.i_car import ICar
 
 
 class NaiveAlgo(TLManager):
@@ -20,3 +23,14 @@ class NaiveAlgo(TLManager):
         self.__time_count += 1
 
         return res
+
+    def get_state(self) -> dict:
+        state = super().get_state()
+        state["time_count"] = self.__time_count
+        state["curr_light_index"] = self._curr_light_index
+        return state
+
+    def set_state(self, state: dict, cars_by_id: Dict[int, ICar]):
+        super().set_state(state, cars_by_id)
+        self.__time_count = state["time_count"]
+        self._curr_light_index = state["curr_light_index"]
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
+from time import perf_counter
+from typing import Dict
 import numpy as np
 
+from server import profiling
+from server.simulation_objects.cars.i_car import ICar
+
 
 class TLManager(ABC):
     def __init__(self, junction, time_limit=np.inf):
@@ -27,8 +32,10 @@ class TLManager(ABC):
                                   key=lambda tl: tl.light_time)
             if waiting_longest.light_time > self._time_limit:
                 new_green = waiting_longest
-            else:
+            elif profiling.active_sink is None:
                 new_green = self._manage_lights()
+            else:
+                new_green = self.__profiled_manage_lights(profiling.active_sink)
 
             if new_green != self._current_light:
                 self._current_light.change_light(False)  # to red
@@ -36,8 +43,38 @@ class TLManager(ABC):
 
                 self._current_light = new_green
 
+    def __profiled_manage_lights(self, sink):
+        start = perf_counter()
+        new_green = self._manage_lights()
+        sink.record(profiling.MANAGE_LIGHTS, perf_counter() - start, algo=self.__class__.__name__,
+                    junction=str(self._junction))
+        return new_green
+
     def init_lights(self):
         if len(self._lights) > 0:
             self._lights[0].change_light(True)
             for light in self._lights:
                 light.reset_time()
+
+    def get_state(self) -> dict:
+        """
+        :return: the internal state of the algorithm, that set_state continues from.
+                 cars are given by their ids, so the state can be given to the cars of a restored simulation
+        """
+        return {"current_light": self._lights.index(self._current_light) if self._current_light is not None else None}
+
+    def set_state(self, state: dict, cars_by_id: Dict[int, ICar]):
+        """
+        continue from a state of get_state. the lights themselves are not changed
+        :param cars_by_id: the cars of the simulation, by their ids
+        """
+        if state["current_light"] is not None:
+            self._current_light = self._lights[state["current_light"]]
+
+    def follow_lights(self):
+        """
+        take over the lights as they are, e.g. lights restored from a simulation of another algorithm
+        """
+        green = [light for light in self._lights if light.can_pass]
+        if len(green) > 0:
+            self._current_light = green[0]
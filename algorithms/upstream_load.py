@@ -0,0 +1,95 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from server.simulation_objects.lanes.lane import Lane
+
+
+class UpstreamLoad:
+    """
+    the k-hop upstream cars count of every lane of a network.
+    hop 1 of a lane is the amount of cars in the lanes that come into it, hop 2 is the hop 1 of those lanes, etc.
+    with the lanes adjacency matrix A (A[lane, prev_lane] = amount of movements from prev_lane to lane) and the
+    cars vector c, hop k is A^k c. each hop is one sparse product over the movements list, for all lanes at once.
+    the hops are calculated again only after a car has entered or left a lane of the map, by the map's graph.
+    lanes without a map graph are calculated again on every call.
+    """
+
+    def __init__(self, lanes: List[Lane], movements: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        """
+        :param movements: the (to lanes, from lanes) indices arrays of the lanes' movements, like
+                          MapGraph.lanes_movements. calculated from the lanes if not given
+        """
+        self.__lanes = lanes
+        index: Dict[Lane, int] = {lane: i for i, lane in enumerate(lanes)}
+        self.__index = index
+        if movements is None:
+            movements_pairs = [(index[lane], index[prev_lane]) for lane in lanes for prev_lane in lane._comes_from]
+            movements = (np.array([to_lane for to_lane, _ in movements_pairs], dtype=np.int64),
+                         np.array([from_lane for _, from_lane in movements_pairs], dtype=np.int64))
+        self.__to_lanes, self.__from_lanes = movements
+        self.__map_graph = lanes[0].road.map_graph if len(lanes) > 0 else None
+        self.__version = None
+        self.__last_hop = None
+        # __totals[k][lane] is the sum of hops 1 to k+1 of the lane
+        self.__totals: List[np.ndarray] = list()
+
+    def expected_traffic_per_lane(self, lane: Lane, depth: int) -> int:
+        """
+        :return: the amount of cars in the lanes up to depth+1 hops before the lane
+        """
+        depth = max(depth, 0)
+        self.__update(depth)
+        return int(self.__totals[depth][self.__index[lane]])
+
+    def __update(self, depth: int):
+        version = self.__map_graph.occupancy_version if self.__map_graph is not None else None
+        if version is None or version != self.__version:
+            self.__version = version
+            self.__totals = list()
+        if len(self.__totals) > depth:
+            return
+        amount = len(self.__lanes)
+        if len(self.__totals) == 0:
+            hop = np.array([lane.cars_amount() for lane in self.__lanes], dtype=np.int64)
+            total = np.zeros(amount, dtype=np.int64)
+        else:
+            hop, total = self.__last_hop, self.__totals[-1]
+        while len(self.__totals) <= depth:
+            hop = np.bincount(self.__to_lanes, weights=hop[self.__from_lanes], minlength=amount).astype(np.int64)
+            total = total + hop
+            self.__totals.append(total)
+        self.__last_hop = hop
+
+
+def upstream_load(lane: Lane) -> UpstreamLoad:
+    """
+    :return: the upstream load of the network of the lane. the load of a map is kept by the map's graph, so it lives
+             as long as the map
+    """
+    map_graph = lane.road.map_graph
+    if map_graph is None:
+        # a map without a graph (e.g. the gui's small maps) is not simulated, its load is not kept
+        return UpstreamLoad(__network_lanes(lane))
+    if map_graph.upstream_load is None:
+        # the map's graph already has the movements arrays of all of its lanes
+        map_graph.upstream_load = UpstreamLoad(map_graph.lanes, map_graph.lanes_movements())
+    return map_graph.upstream_load
+
+
+def __network_lanes(lane: Lane) -> List[Lane]:
+    """
+    :return: all lanes that are connected to the lane by movements, in any direction
+    """
+    seen = {lane}
+    lanes = [lane]
+    queue = deque([lane])
+    while len(queue) > 0:
+        curr = queue.popleft()
+        for other in [*curr._comes_from, *curr.goes_to_lanes]:
+            if other not in seen:
+                seen.add(other)
+                lanes.append(other)
+                queue.append(other)
+    return lanes
@@ -0,0 +1,33 @@
+import json
+import sys
+from typing import Dict, Tuple
+
+
+def load_results(path) -> Dict[Tuple, Dict]:
+    """
+    :return: the results of a benchmark json file, by their scenario
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return {(result["map_path"], result["algo"], result["cars_amount"], result["seed"]): result
+            for result in data["results"]}
+
+
+def main():
+    """
+    compare two benchmark json files: python -m benchmarks.compare_results old.json new.json
+    """
+    if len(sys.argv) != 3:
+        raise Exception("usage: compare_results <old json> <new json>")
+    old, new = load_results(sys.argv[1]), load_results(sys.argv[2])
+    print(f"{'map':<35}{'algo':<12}{'cars':>6}{'old ticks/s':>14}{'new ticks/s':>14}{'speedup':>10}")
+    for key in sorted(set(old) & set(new)):
+        old_tps, new_tps = old[key]["ticks_per_second"], new[key]["ticks_per_second"]
+        speedup = new_tps / old_tps if old_tps > 0 else float("inf")
+        print(f"{key[0]:<35}{key[1]:<12}{key[2]:>6}{old_tps:>14.1f}{new_tps:>14.1f}{speedup:>9.2f}x")
+    for key in sorted(set(old) ^ set(new)):
+        print("only in one file:", key)
+
+
+if __name__ == '__main__':
+    main()
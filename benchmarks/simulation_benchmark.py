@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from time import perf_counter
+from typing import Dict, List, Optional
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from algorithms.algo_to_index import algo_to_index
+from server.cars_generator import generate_cars
+from server.map_cache import maps_cache
+from server.server_runner import next_iter
+from server.simulation_objects.cars.active_cars import ActiveCars
+from server.statistics.stats_reporter import StatsReporter
+
+MAP_SIZE = (800, 800)
+HANDMADE_MAPS = ["db/databases/handmade/tel_aviv"]
+GENERATED_MAPS_DIR = "db/databases/generated"
+DEF_CARS_AMOUNTS = [30, 100]
+DEF_SEED = 0
+DEF_MAX_ITERATIONS = 500
+DEF_REPEAT = 3
+DEF_OUTPUT_DIR = "benchmarks/results"
+# every TLManager that can be built without extra files (the ml algorithm needs a trained model)
+ALGOS = {algo.__name__: algo for algo in algo_to_index if algo is not None}
+
+
+@dataclass
+class BenchmarkResult:
+    map_path: str
+    algo: str
+    cars_amount: int
+    seed: int
+    iterations: int
+    arrived_cars: int
+    total_time: float
+    ticks_per_second: float
+    # seconds spent in each phase of the run
+    cars_time: float
+    lights_time: float
+    reporting_time: float
+    peak_memory: Optional[int]
+
+
+class TimedAlgo:
+    """
+    a decorator of a traffic lights algorithm, that sums the time of its manage_lights calls.
+    """
+
+    def __init__(self, algo):
+        self.algo = algo
+        self.time = 0.0
+
+    def manage_lights(self):
+        start = perf_counter()
+        self.algo.manage_lights()
+        self.time += perf_counter() - start
+
+    def __getattr__(self, item):
+        return getattr(self.algo, item)
+
+
+def all_maps() -> List[str]:
+    generated = [GENERATED_MAPS_DIR + "/" + name for name in sorted(os.listdir(GENERATED_MAPS_DIR), key=int)]
+    return HANDMADE_MAPS + generated
+
+
+def run_benchmark(map_path: str, algo_name: str, cars_amount: int, seed: int, max_iterations: int,
+                  repeat: int = DEF_REPEAT, with_memory: bool = True) -> Optional[BenchmarkResult]:
+    """
+    run one scenario, and measure its phases. the scenario is run repeat times, and the fastest run is kept,
+    since short runs are noisy.
+    :return: the measures, or None if the map could not create the cars
+    """
+    best = None
+    for _ in range(repeat):
+        result = __timed_run(map_path, algo_name, cars_amount, seed, max_iterations)
+        if result is None:
+            return None
+        if best is None or result.total_time < best.total_time:
+            best = result
+    if with_memory:
+        best.peak_memory = __measure_peak_memory(map_path, algo_name, cars_amount, seed, max_iterations)
+    return best
+
+
+def __timed_run(map_path: str, algo_name: str, cars_amount: int, seed: int,
+                max_iterations: int) -> Optional[BenchmarkResult]:
+    run = __create_run(map_path, algo_name, cars_amount, seed)
+    if run is None:
+        return None
+    roads, traffic_lights, cars, lights_algo = run
+    reporter = StatsReporter(cars, algo_name)
+    iterations, iterations_time, reporting_time = 0, 0.0, 0.0
+    while len(cars) > 0 and iterations < max_iterations:
+        start = perf_counter()
+        traffic_lights, cars = next_iter(lights_algo, traffic_lights, cars)
+        middle = perf_counter()
+        reporter.next_iter(cars)
+        iterations_time += middle - start
+        reporting_time += perf_counter() - middle
+        iterations += 1
+    maps_cache.release_map(*MAP_SIZE, map_path)
+    lights_time = sum(algo.time for algo in lights_algo)
+    total_time = iterations_time + reporting_time
+    return BenchmarkResult(map_path=map_path, algo=algo_name, cars_amount=cars_amount, seed=seed,
+                           iterations=iterations, arrived_cars=cars.arrived_amount, total_time=total_time,
+                           ticks_per_second=iterations / total_time if total_time > 0 else 0.0,
+                           cars_time=iterations_time - lights_time, lights_time=lights_time,
+                           reporting_time=reporting_time, peak_memory=None)
+
+
+def __create_run(map_path: str, algo_name: str, cars_amount: int, seed: int):
+    roads, traffic_lights, all_junctions = maps_cache.get_map(*MAP_SIZE, map_path)
+    random.seed(seed)
+    cars = generate_cars(roads, cars_amount, p=0.9, with_prints=False)
+    if cars is None:
+        maps_cache.release_map(*MAP_SIZE, map_path)
+        return None
+    for car in cars:
+        car.enter_first_road()
+    lights_algo = [TimedAlgo(ALGOS[algo_name](junction)) for junction in all_junctions]
+    return roads, traffic_lights, ActiveCars(cars), lights_algo
+
+
+def __measure_peak_memory(map_path: str, algo_name: str, cars_amount: int, seed: int, max_iterations: int) -> int:
+    """
+    run the scenario again while tracing the allocations. tracing slows the run, so its time is not measured.
+    :return: the peak of the memory allocated during the run, in bytes
+    """
+    tracemalloc.start()
+    roads, traffic_lights, cars, lights_algo = __create_run(map_path, algo_name, cars_amount, seed)
+    reporter = StatsReporter(cars, algo_name)
+    iterations = 0
+    while len(cars) > 0 and iterations < max_iterations:
+        traffic_lights, cars = next_iter(lights_algo, traffic_lights, cars)
+        reporter.next_iter(cars)
+        iterations += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    maps_cache.release_map(*MAP_SIZE, map_path)
+    return peak
+
+
+def __git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="measure the simulation throughput over fixed seed scenarios")
+    parser.add_argument("--maps", nargs="+", default=None, help="map paths. all maps by default")
+    parser.add_argument("--algos", nargs="+", choices=sorted(ALGOS), default=sorted(ALGOS))
+    parser.add_argument("--cars", nargs="+", type=int, default=DEF_CARS_AMOUNTS, help="amounts of cars")
+    parser.add_argument("--seed", type=int, default=DEF_SEED)
+    parser.add_argument("--max-iterations", type=int, default=DEF_MAX_ITERATIONS)
+    parser.add_argument("--repeat", type=int, default=DEF_REPEAT, help="runs of each scenario, the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory runs")
+    parser.add_argument("-o", "--output", default=None,
+                        help="the json file to write. a new file in benchmarks/results by default")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    maps = args.maps if args.maps is not None else all_maps()
+    results: List[Dict] = list()
+    for map_path in maps:
+        for cars_amount in args.cars:
+            for algo_name in args.algos:
+                result = run_benchmark(map_path, algo_name, cars_amount, args.seed, args.max_iterations,
+                                       repeat=args.repeat, with_memory=not args.no_memory)
+                if result is None:
+                    print(f"skipped {map_path} with {cars_amount} cars, couldnt create cars path")
+                    continue
+                print(f"{map_path} {algo_name} {cars_amount} cars: {result.ticks_per_second:.1f} ticks/s")
+                results.append(asdict(result))
+    output = args.output
+    if output is None:
+        os.makedirs(DEF_OUTPUT_DIR, exist_ok=True)
+        output = DEF_OUTPUT_DIR + "/" + datetime.now().strftime("%d_%m_%Y__%H_%M_%S") + ".json"
+    with open(output, "w") as f:
+        json.dump({"commit": __git_commit(), "python": platform.python_version(),
+                   "max_iterations": args.max_iterations, "results": results}, f, indent=2)
+    print("results saved to", output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import os
+import sys
+
+from db.compiled_map import compile_map
+
+DATABASES_PATH = "db/databases"
+
+
+def all_maps_paths():
+    """
+    :return: the paths of all maps in the databases directory
+    """
+    return [DATABASES_PATH + "/" + kind + "/" + name for kind in sorted(os.listdir(DATABASES_PATH))
+            for name in sorted(os.listdir(DATABASES_PATH + "/" + kind))]
+
+
+def main():
+    """
+    compile the maps in the input paths, or all maps if no path is given
+    """
+    paths = sys.argv[1:] if len(sys.argv) > 1 else all_maps_paths()
+    for path in paths:
+        compile_map(path)
+        print("compiled", path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from db.dataclasses.junction_data import JunctionData
+from db.dataclasses.road_data import RoadData
+from db.dataclasses.road_lane import RoadLane
+from db.load_map_data import get_db_junctions, get_db_road_sections
+from server.geometry.point import Point
+
+# a compiled map is a directory of .npy files next to the map's json files.
+# lists of different lengths are stored flat, with an offsets array: the items of element i are
+# items[offsets[i]:offsets[i+1]].
+# roads:
+#     road_ids, road_num_lanes, road_max_speed: one value per road
+#     road_coords: (pairs, 2, 2) coordinates pairs of all roads, split by road_coords_offsets
+# junctions:
+#     junction_ids, junction_num_traffic_lights: one value per junction
+#     junction_coords: (points, 2), split by junction_coords_offsets
+#     movements: (movements, 4) of (from road, from lane, to road, to lane), split by movements_offsets
+#     light_coords: (lights, 2) one coordinate per traffic light, split by lights_offsets
+#     light_lanes: (lanes, 2) of (road, lane) of all traffic lights, split by light_lanes_offsets (per traffic light)
+
+COMPILED_DIR = "compiled"
+JSON_FILES = ("RoadSections.json", "Junctions.json")
+ARRAYS = ("road_ids", "road_num_lanes", "road_max_speed", "road_coords", "road_coords_offsets",
+          "junction_ids", "junction_num_traffic_lights", "junction_coords", "junction_coords_offsets",
+          "movements", "movements_offsets", "light_coords", "lights_offsets",
+          "light_lanes", "light_lanes_offsets")
+
+
+def compiled_map_path(path) -> str:
+    return path + "/" + COMPILED_DIR
+
+
+def is_map_compiled(path) -> bool:
+    """
+    :return: True if the map has a compiled form that is not older than its json files
+    """
+    compiled_path = compiled_map_path(path)
+    compiled_files = [compiled_path + f"/{name}.npy" for name in ARRAYS]
+    if not all(os.path.exists(file) for file in compiled_files):
+        return False
+    compiled_time = min(os.path.getmtime(file) for file in compiled_files)
+    return all(os.path.getmtime(path + "/" + file) <= compiled_time for file in JSON_FILES
+               if os.path.exists(path + "/" + file))
+
+
+def compile_map(path):
+    """
+    write the compiled form of the json map in the path
+    """
+    arrays = __map_data_to_arrays(get_db_road_sections(path), get_db_junctions(path))
+    os.makedirs(compiled_map_path(path), exist_ok=True)
+    for name in ARRAYS:
+        np.save(compiled_map_path(path) + f"/{name}.npy", arrays[name])
+
+
+def load_compiled_map(path) -> Dict[str, np.ndarray]:
+    """
+    :return: the arrays of the compiled map, memory mapped and read only
+    """
+    return {name: np.load(compiled_map_path(path) + f"/{name}.npy", mmap_mode='r') for name in ARRAYS}
+
+
+def load_compiled_map_data(path, x_border, y_border) -> Tuple[List[RoadData], List[JunctionData]]:
+    """
+    load the compiled map and normalize it like map_creation does for the json map.
+    the normalization is done on the arrays, so the points are created once, with their final values.
+    :return: the map's roads data and junctions data
+    """
+    arrays = load_compiled_map(path)
+    road_coords = np.array(arrays["road_coords"], dtype=np.float64)
+    junction_coords = np.array(arrays["junction_coords"], dtype=np.float64)
+    light_coords = np.array(arrays["light_coords"], dtype=np.float64)
+    # get min and max x,y values of the whole map
+    all_points = np.concatenate([road_coords.reshape(-1, 2), junction_coords, light_coords])
+    min_x, min_y = all_points.min(axis=0)
+    max_x, max_y = all_points.max(axis=0)
+    for coords in (road_coords, junction_coords, light_coords):
+        coords[..., 0] = (coords[..., 0] - min_x) * (x_border / (max_x - min_x))
+        coords[..., 1] = (coords[..., 1] - min_y) * (y_border / (max_y - min_y))
+    return __roads_data(arrays, road_coords), __junctions_data(arrays, junction_coords, light_coords)
+
+
+def __roads_data(arrays: Dict[str, np.ndarray], road_coords: np.ndarray) -> List[RoadData]:
+    coords = road_coords.tolist()
+    offsets = arrays["road_coords_offsets"].tolist()
+    return [RoadData(idnum, [(Point(*p1), Point(*p2)) for p1, p2 in coords[offsets[i]:offsets[i + 1]]],
+                     num_lanes, max_speed)
+            for i, (idnum, num_lanes, max_speed) in enumerate(zip(arrays["road_ids"].tolist(),
+                                                                  arrays["road_num_lanes"].tolist(),
+                                                                  arrays["road_max_speed"].tolist()))]
+
+
+def __junctions_data(arrays: Dict[str, np.ndarray], junction_coords: np.ndarray, light_coords: np.ndarray) \
+        -> List[JunctionData]:
+    coords = junction_coords.tolist()
+    coords_offsets = arrays["junction_coords_offsets"].tolist()
+    movements = [(RoadLane(from_road, from_lane), RoadLane(to_road, to_lane))
+                 for from_road, from_lane, to_road, to_lane in arrays["movements"].tolist()]
+    movements_offsets = arrays["movements_offsets"].tolist()
+    lights_points = [Point(*p) for p in light_coords.tolist()]
+    lights_offsets = arrays["lights_offsets"].tolist()
+    light_lanes = [RoadLane(road, lane) for road, lane in arrays["light_lanes"].tolist()]
+    light_lanes_offsets = arrays["light_lanes_offsets"].tolist()
+    lights_lanes = [light_lanes[light_lanes_offsets[i]:light_lanes_offsets[i + 1]]
+                    for i in range(len(lights_points))]
+    junctions_data = list()
+    for i, (idnum, num_traffic_lights) in enumerate(zip(arrays["junction_ids"].tolist(),
+                                                        arrays["junction_num_traffic_lights"].tolist())):
+        points = [Point(*p) for p in coords[coords_offsets[i]:coords_offsets[i + 1]]]
+        lights = slice(lights_offsets[i], lights_offsets[i + 1])
+        junctions_data.append(JunctionData(idnum, points, movements[movements_offsets[i]:movements_offsets[i + 1]],
+                                           lights_lanes[lights], lights_points[lights], num_traffic_lights))
+    return junctions_data
+
+
+def __offsets(lengths: List[int]) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]).astype(np.int64)
+
+
+def __map_data_to_arrays(roads_data: List[RoadData], junctions_data: List[JunctionData]) -> Dict[str, np.ndarray]:
+    lights = [light for junction_data in junctions_data for light in junction_data.traffic_lights]
+    return {
+        "road_ids": np.array([road_data.idnum for road_data in roads_data], dtype=np.int64),
+        "road_num_lanes": np.array([road_data.num_lanes for road_data in roads_data], dtype=np.int64),
+        "road_max_speed": np.array([road_data.max_speed for road_data in roads_data], dtype=np.float64),
+        "road_coords": np.array([[p.to_tuple() for p in pair] for road_data in roads_data
+                                 for pair in road_data.coordinates], dtype=np.float64).reshape(-1, 2, 2),
+        "road_coords_offsets": __offsets([len(road_data.coordinates) for road_data in roads_data]),
+        "junction_ids": np.array([junction_data.idnum for junction_data in junctions_data], dtype=np.int64),
+        "junction_num_traffic_lights": np.array([junction_data.num_traffic_lights
+                                                 for junction_data in junctions_data], dtype=np.int64),
+        "junction_coords": np.array([p.to_tuple() for junction_data in junctions_data
+                                     for p in junction_data.coordinates], dtype=np.float64).reshape(-1, 2),
+        "junction_coords_offsets": __offsets([len(junction_data.coordinates) for junction_data in junctions_data]),
+        "movements": np.array([(from_lane.road_id, from_lane.lane_num, to_lane.road_id, to_lane.lane_num)
+                               for junction_data in junctions_data
+                               for from_lane, to_lane in junction_data.goes_to], dtype=np.int64).reshape(-1, 4),
+        "movements_offsets": __offsets([len(junction_data.goes_to) for junction_data in junctions_data]),
+        "light_coords": np.array([p.to_tuple() for junction_data in junctions_data
+                                  for p in junction_data.traffic_lights_coords], dtype=np.float64).reshape(-1, 2),
+        "lights_offsets": __offsets([len(junction_data.traffic_lights) for junction_data in junctions_data]),
+        "light_lanes": np.array([(road_lane.road_id, road_lane.lane_num) for light in lights
+                                 for road_lane in light], dtype=np.int64).reshape(-1, 2),
+        "light_lanes_offsets": __offsets([len(light) for light in lights]),
+    }
@@ -10,8 +10,9 @@ from gui.utils.button import Button
 from gui.utils.colors import RED
 from server.cars_generator import generate_cars
 from server.geometry.point import Point
-from server.map_creation import create_map
+from server.map_cache import maps_cache, reset_map_state
 from server.server_runner import next_iter
+from server.simulation_objects.cars.active_cars import ActiveCars
 from server.simulation_objects.cars.i_car import ICar
 from server.simulation_objects.junctions.i_junction import IJunction
 from server.simulation_objects.roadsections.i_road_section import IRoadSection
@@ -42,7 +43,7 @@ class SimulationData:
     roads: List[IRoadSection]
     lights: List[ITrafficLight]
     junctions: List[IJunction]
-    cars: List[ICar]
+    cars: ActiveCars
     lights_algo: List
     reporter: StatsReporter
     with_small_map: bool
@@ -74,15 +75,18 @@ class SimulationRunner(PathScreen):
 
     def __create_simulation_data(self, conf: SimulationConfiguration, error_screen) -> SimulationData:
         # get the simulation map
-        roads, traffic_lights, all_junctions = create_map(self.screen.get_width(),
-                                                          self.screen.get_height(), conf.map_path)
+        roads, traffic_lights, all_junctions = maps_cache.get_map(self.screen.get_width(),
+                                                                  self.screen.get_height(), conf.map_path)
+        self.map_path = conf.map_path
         # init cars list
         cars = generate_cars(roads, conf.cars_amount, p=0.9, min_len=conf.path_min_len, with_prints=False)
         if cars is None:
+            self.__release_map()
             error_screen.display()
             raise Exception("couldnt create cars path")
         for car in cars:
             car.enter_first_road()
+        cars = ActiveCars(cars)
         # init traffic lights algorithm
         lights_algo = [conf.chosen_algo(junction) for junction in all_junctions]
         # init simulation's stats reporter
@@ -91,11 +95,13 @@ class SimulationRunner(PathScreen):
 
     def __create_configuration_data(self, conf: ComparisonConfiguration, error_screen):
         # get the simulation map
-        roads, traffic_lights, all_junctions = create_map(self.screen.get_width(),
-                                                          self.screen.get_height(), conf.map_path)
+        roads, traffic_lights, all_junctions = maps_cache.get_map(self.screen.get_width(),
+                                                                  self.screen.get_height(), conf.map_path)
+        self.map_path = conf.map_path
         # init cars list
         cars = generate_cars(roads, conf.cars_amount, p=0.9, min_len=conf.path_min_len, with_prints=False)
         if cars is None:
+            self.__release_map()
             error_screen.display()
             raise Exception("couldnt create cars path")
         # init simulation's stats reporter
@@ -136,6 +142,7 @@ class SimulationRunner(PathScreen):
                         self.paused = not self.paused
 
         # when run is over, report the stats
+        self.__release_map()
         return self.data.reporter
 
     def run_silent(self) -> List[Tuple[str, StatsReporter]]:
@@ -147,9 +154,12 @@ class SimulationRunner(PathScreen):
             if self.data.show_runs:
                 gm = SimulationGraphics(self.screen, title=lights_algo_class.__name__)
             frames_counter = 0
+            # every algorithm starts from the same clean map
+            reset_map_state(self.data.roads, self.data.lights, self.data.junctions)
             curr_cars = self.__init_cars()
             for car in curr_cars:
                 car.enter_first_road()
+            curr_cars = ActiveCars(curr_cars)
             curr_lights = self.data.lights
             reporter = StatsReporter(curr_cars, lights_algo_class.__name__)
             lights_algo = [lights_algo_class(junc) for junc in self.data.junctions]
@@ -167,11 +177,15 @@ class SimulationRunner(PathScreen):
                     if event.type == pygame.QUIT:
                         exit()
             reporters.append((lights_algo_class.__name__, reporter))
+        self.__release_map()
         return reporters
 
     def __init_cars(self):
         return [car.car_with_same_path() for car in self.data.cars]
 
+    def __release_map(self):
+        maps_cache.release_map(self.screen.get_width(), self.screen.get_height(), self.map_path)
+
     def __draw_comparison_init(self, index, algo_name):
         self.screen.fill(self.background)
         # write the text
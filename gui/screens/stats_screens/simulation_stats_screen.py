@@ -12,6 +12,8 @@ class SimulationStatsScreen(StatsScreenParent):
     def __init__(self, screen: pygame.Surface, reporter: StatsReporter):
         super().__init__(screen)
         self.reporter = reporter
+        # the report is created once, so its graphs are drawn once for all of the redraws and the saving
+        self.__report = None
 
     def _draw_all_data(self, total_delta_y, reporter_data: ReportSimulationData):
         self.screen.fill(self.background)
@@ -58,7 +60,9 @@ class SimulationStatsScreen(StatsScreenParent):
         pygame.display.update()
 
     def _reporters_data(self):
-        return self.reporter.report()
+        if self.__report is None:
+            self.__report = self.reporter.report()
+        return self.__report
 
     @property
     def max_scroll(self):
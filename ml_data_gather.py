@@ -5,9 +5,9 @@ import os
 from algorithms.algo_to_index import algo_to_index, algos_list_to_num, index_to_algo
 from algorithms.ml_algo import MLAlgo
 from algorithms.tl_manager import TLManager
-from server.cars_generator import generate_cars
+from server.batch_runner import Scenario, create_light_algos, generate_scenario_cars, run_batch
 from server.map_creation import create_map
-from server.server_runner import next_iter
+from server.server_runner import run_until_done
 from server.simulation_objects.junctions.junction import Junction
 
 
@@ -30,7 +30,7 @@ class ReporterJunction:
         self.depth = depth
 
     def _get_simulation_state(self):
-        local_traffics = [str(len(tl.all_cars)) for tl in self.lights]
+        local_traffics = [str(tl.cars_amount) for tl in self.lights]
         local_traffics += ["0"] * (4 - len(local_traffics))
         expected_traffics = [str(MLAlgo.expected_traffic(tl, self.depth - 1)) for tl in self.lights]
         expected_traffics += ["0"] * (4 - len(expected_traffics))
@@ -63,23 +63,27 @@ class ReporterJunction:
         return getattr(self.junction, item)
 
 
-def run(i, roads, traffic_lights, algos_indices, junctions_with_lights, reporting_junctions):
+CARS_NUM = 30
+TIME_INTERVAL = 40
+REPORTING_JUNCTIONS = [2, 3, 5]
+MAP_PATH = "db/databases/handmade/tel_aviv"
+
+
+def run(scenario: Scenario, roads, traffic_lights, all_junctions):
+    i = scenario.name
     print("start", i)
-    cars_num = 30
-    time_interval = 40
 
-    algos = [index_to_algo[index] for index in algos_indices]
-    light_algos = [algo(junction) for algo, junction in zip(algos, junctions_with_lights)]
+    junctions_with_lights = [junction for junction in all_junctions if len(junction.lights) > 0]
+    light_algos = create_light_algos(scenario, all_junctions)
 
     # Some output paths
     # All junctions' reports
-    report_path = f"algorithms/ml_algo_files/data/test_{cars_num}_{time_interval}_updated/{i}.csv"
+    report_path = f"algorithms/ml_algo_files/data/test_{CARS_NUM}_{TIME_INTERVAL}_updated/{i}.csv"
 
     # Amount of iterations.
-    txt_path = f"algorithms/ml_algo_files/data/test_{cars_num}_{time_interval}_updated/{i}.txt"
+    txt_path = f"algorithms/ml_algo_files/data/test_{CARS_NUM}_{TIME_INTERVAL}_updated/{i}.txt"
 
-    if not os.path.exists(os.path.dirname(report_path)):
-        os.makedirs(os.path.dirname(report_path))
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
 
     with open(report_path, 'w', newline='') as report_file:
         writer = csv.writer(report_file)
@@ -89,37 +93,30 @@ def run(i, roads, traffic_lights, algos_indices, junctions_with_lights, reportin
                          *[f"expected_traffic{i}" for i in range(4)], *[f"nearby_algos{i}" for i in range(4)]])
 
     # Wrap relevant junctions with reporter decorator.
-    for idx in reporting_junctions:
+    for idx in REPORTING_JUNCTIONS:
         light_algos[idx] = ReporterJunction(junctions_with_lights[idx], report_path, 10)
 
-    cars = generate_cars(roads, cars_num, p=0.9, min_len=6, with_prints=False)
-    for car in cars:
-        car.enter_first_road()
-
-    j = 0
-    while len(cars) > 0:
-        j += 1
-        traffic_lights, cars = next_iter(light_algos, traffic_lights, cars)
+    cars = generate_scenario_cars(scenario, roads)
+    j = run_until_done(light_algos, traffic_lights, cars)
 
     with open(txt_path, "w") as txt_file:
         txt_file.write(str(j))
 
     print("end", i)
+    return i, j
 
 
 def main():
-    # Graphics measures
-    win_width, win_height = (800, 800)
-
-    # get the simulation map
-    roads, traffic_lights, all_junctions = create_map(win_width, win_height, "db/databases/handmade/tel_aviv")
-
-    junctions_with_lights = [junction for junction in all_junctions if len(junction.lights) > 0]
-    reporting_junctions = [2, 3, 5]
-
-    for i, comb in enumerate(
-            combinations_with_replacement(sorted(index_to_algo.keys())[1:], len(junctions_with_lights))):
-        run(i, roads, traffic_lights, comb, junctions_with_lights, reporting_junctions)
+    # count the junctions that get an algorithm, from a single map
+    _, _, all_junctions = create_map(800, 800, MAP_PATH)
+    junctions_amount = len([junction for junction in all_junctions if len(junction.lights) > 0])
+
+    combs = combinations_with_replacement(sorted(index_to_algo.keys())[1:], junctions_amount)
+    scenarios = [Scenario(MAP_PATH, tuple(index_to_algo[index] for index in comb), CARS_NUM, path_min_len=6,
+                          name=str(i)) for i, comb in enumerate(combs)]
+    # each run writes its own files, so the runs are independent of each other
+    for _ in run_batch(scenarios, simulation=run):
+        pass
 
 
 if __name__ == '__main__':
@@ -0,0 +1,106 @@
+import argparse
+import os
+import random
+from time import perf_counter
+
+import matplotlib
+
+# never touch the display stack, the reporter only draws into memory
+matplotlib.use("Agg")
+
+from algorithms.algo_to_index import algo_to_index
+from algorithms.ml_algo import MLAlgo
+from algorithms.ml_model import set_model_path
+from server.cars_generator import generate_cars_bulk
+from server import profiling
+from server.demand import CarsInjector, PoissonDemand, entry_roads, traces_from_csv
+from server.map_creation import create_map
+from server.profiling import HistogramSink
+from server.server_runner import run_until_done
+from server.simulation_objects.cars.active_cars import ActiveCars
+from server.statistics.runs_data import DIR_PATH
+from server.statistics.stats_reporter import StatsReporter
+from server.vectorized_engine import VectorizedCars
+
+MAP_SIZE = (800, 800)
+# the results directory of the repository, wherever the script is run from
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), *DIR_PATH.split("/"))
+ALGOS = {algo.__name__: algo for algo in [*algo_to_index, MLAlgo] if algo is not None}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="run a traffic simulation without the gui")
+    parser.add_argument("map_path", help="path of the map directory, e.g. db/databases/handmade/tel_aviv")
+    parser.add_argument("-a", "--algo", choices=sorted(ALGOS), default="NaiveAlgo",
+                        help="the traffic lights algorithm of all junctions")
+    parser.add_argument("-c", "--cars", type=int, default=30, help="amount of cars")
+    parser.add_argument("-l", "--min-len", type=int, default=1, help="minimal amount of roads in a car's path")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="seed of the cars generation")
+    parser.add_argument("-i", "--max-iterations", type=int, default=None,
+                        help="stop after this amount of iterations, even if there are still cars")
+    parser.add_argument("--demand-rate", type=float, default=None,
+                        help="cars also enter each entry road of the map while it runs, this many per iteration")
+    parser.add_argument("--demand-ticks", type=int, default=None,
+                        help="the amount of iterations that the demand rate lasts, no limit if not given")
+    parser.add_argument("--demand-trace", default=None,
+                        help="a csv file of (tick, road_id) rows, of cars that enter while the map runs")
+    parser.add_argument("--model-path", default=None, help="the model file of MLAlgo")
+    parser.add_argument("--vectorized", action="store_true", help="drive the cars with the vectorized engine")
+    parser.add_argument("--profile", action="store_true", help="print the time of each phase of the iterations")
+    parser.add_argument("-o", "--output", default=RESULTS_PATH,
+                        help="the directory to write the results into, the repository's results directory by default")
+    parser.add_argument("--no-save", action="store_true", help="only print the results, do not write them")
+    return parser.parse_args()
+
+
+def create_demand(args, roads):
+    if args.demand_trace is not None:
+        return CarsInjector(roads, traces_from_csv(args.demand_trace), seed=args.seed, p=0.9, min_len=args.min_len)
+    if args.demand_rate is not None:
+        demand = {road._id: PoissonDemand(args.demand_rate, end_tick=args.demand_ticks)
+                  for road in entry_roads(roads) or roads}
+        return CarsInjector(roads, demand, seed=args.seed, p=0.9, min_len=args.min_len)
+    return None
+
+
+def main():
+    args = parse_args()
+    if args.model_path is not None:
+        set_model_path(args.model_path)
+    roads, traffic_lights, all_junctions = create_map(*MAP_SIZE, args.map_path)
+    random.seed(args.seed)
+    cars = generate_cars_bulk(roads, args.cars, seed=args.seed, p=0.9, min_len=args.min_len)
+    if cars is None:
+        raise Exception("couldnt create cars path")
+    if args.vectorized:
+        cars = VectorizedCars(roads, cars)
+    else:
+        for car in cars:
+            car.enter_first_road()
+        cars = ActiveCars(cars)
+    demand = create_demand(args, roads)
+    algo = ALGOS[args.algo]
+    lights_algo = [algo(junction) for junction in all_junctions]
+    reporter = StatsReporter(cars, algo.__name__)
+
+    sink = HistogramSink()
+    if args.profile:
+        profiling.enable(sink)
+    start = perf_counter()
+    iterations = run_until_done(lights_algo, traffic_lights, cars, on_iter=reporter.next_iter,
+                                max_iterations=args.max_iterations, demand=demand)
+    run_time = perf_counter() - start
+    profiling.disable()
+
+    print(f"{iterations} iterations in {run_time:.3f} seconds ({iterations / max(run_time, 1e-9):.1f} per second)")
+    print(f"{len(cars)} cars did not arrive")
+    for phase, histogram in sink.by_phase().items():
+        print(f"{phase}: {histogram}")
+    report = reporter.report()
+    print(f"total waiting time: {report.total_waiting_time}, total deceleration time: {report.total_dec_time}")
+    if not args.no_save:
+        print("results saved to", report.save_to_file(args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from algorithms.ml_algo import MLAlgo
+from algorithms.ml_model import preload_model
+from algorithms.tl_manager import TLManager
+from db.dataclasses.junction_data import JunctionData
+from db.dataclasses.road_data import RoadData
+from server.cars_generator import generate_cars_bulk
+from server.map_cache import maps_cache, reset_map_state
+from server.map_creation import load_map
+from server.server_runner import run_until_done
+from server.simulation_objects.cars.active_cars import ActiveCars
+from server.snapshot import restore_snapshot, take_snapshot
+from server.statistics.runs_data import ReportComparisonData
+from server.statistics.stats_reporter import StatsReporter
+
+DEF_MAP_SIZE = (800, 800)
+DEF_P = 0.9
+
+# the parsed maps of the batch and their size, set once in each worker process by _init_worker
+__maps_data: Dict[str, Tuple[List[RoadData], List[JunctionData]]] = dict()
+__map_size: Tuple[int, int] = DEF_MAP_SIZE
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    a single headless simulation run.
+    algos: the algorithm class of each junction that has traffic lights, by the junctions order.
+           a single class is used for all of the junctions, like in the gui.
+    seed: the seed of the cars generation. None for a random run.
+    max_iterations: stop the run after this amount of iterations, or None for no limit.
+    name: any identifier of the scenario, for the caller's use.
+    """
+    map_path: str
+    algos: Tuple[Type[TLManager], ...]
+    cars_amount: int
+    path_min_len: int = 1
+    seed: Optional[int] = None
+    max_iterations: Optional[int] = None
+    name: str = ""
+
+
+@dataclass
+class ScenarioResult:
+    scenario: Scenario
+    iterations: int
+    report: ReportComparisonData
+
+
+def create_light_algos(scenario: Scenario, junctions) -> List[TLManager]:
+    """
+    :return: the traffic lights algorithms of the scenario, one for each managed junction
+    """
+    if len(scenario.algos) == 1:
+        return [scenario.algos[0](junction) for junction in junctions]
+    junctions_with_lights = [junction for junction in junctions if len(junction.lights) > 0]
+    if len(scenario.algos) != len(junctions_with_lights):
+        raise Exception(f"got {len(scenario.algos)} algorithms for {len(junctions_with_lights)} junctions")
+    return [algo(junction) for algo, junction in zip(scenario.algos, junctions_with_lights)]
+
+
+def generate_scenario_cars(scenario: Scenario, roads):
+    # the workers are forked with the same random state, so always reseed. the cars of scenarios without a seed
+    # are seeded from it
+    random.seed(scenario.seed)
+    cars = generate_cars_bulk(roads, scenario.cars_amount, seed=scenario.seed, p=DEF_P, min_len=scenario.path_min_len)
+    if cars is None:
+        raise Exception(f"couldnt create cars path for scenario {scenario}")
+    for car in cars:
+        car.enter_first_road()
+    return ActiveCars(cars)
+
+
+def run_scenario(scenario: Scenario, roads, traffic_lights, junctions) -> ScenarioResult:
+    """
+    the default simulation of a batch: run the scenario to its end and report its stats
+    :param roads, traffic_lights, junctions: a clean map, that belongs only to this run
+    """
+    light_algos = create_light_algos(scenario, junctions)
+    cars = generate_scenario_cars(scenario, roads)
+    reporter = StatsReporter(cars, "/".join(algo.__name__ for algo in scenario.algos))
+    iterations = run_until_done(light_algos, traffic_lights, cars, on_iter=reporter.next_iter,
+                                max_iterations=scenario.max_iterations)
+    return ScenarioResult(scenario, iterations, reporter.report_compare())
+
+
+def run_branches(scenario: Scenario, roads, traffic_lights, junctions, branches: Iterable[Tuple[Type[TLManager], ...]],
+                 warm_up_iterations: int) -> List[ScenarioResult]:
+    """
+    warm the scenario up once with its own algorithms, then run each branch from the same mid-run state, instead of
+    running each of them from the first iteration.
+    to run it in run_batch, give it as the simulation with the branches and warm up bound by functools.partial
+    :param roads, traffic_lights, junctions: a clean map, that belongs only to this run
+    :param branches: the algorithms of each branch, like Scenario.algos
+    :param warm_up_iterations: the amount of iterations that all branches share
+    :return: the result of each branch, with its algorithms in its scenario. the iterations include the warm up,
+             and the reports are of the iterations after it
+    """
+    light_algos = create_light_algos(scenario, junctions)
+    cars = generate_scenario_cars(scenario, roads)
+    warm_up = run_until_done(light_algos, traffic_lights, cars, max_iterations=warm_up_iterations)
+    snapshot = take_snapshot(roads, traffic_lights, cars, light_algos, iteration=warm_up)
+    max_iterations = None if scenario.max_iterations is None else max(0, scenario.max_iterations - warm_up)
+    results = list()
+    for algos in branches:
+        branch = replace(scenario, algos=tuple(algos))
+        reset_map_state(roads, traffic_lights, junctions)
+        branch_algos = create_light_algos(branch, junctions)
+        branch_cars = restore_snapshot(snapshot, roads, traffic_lights, branch_algos)
+        reporter = StatsReporter(branch_cars, "/".join(algo.__name__ for algo in branch.algos))
+        iterations = run_until_done(branch_algos, traffic_lights, branch_cars, on_iter=reporter.next_iter,
+                                    max_iterations=max_iterations)
+        results.append(ScenarioResult(branch, warm_up + iterations, reporter.report_compare()))
+    return results
+
+
+def run_batch(scenarios: Iterable[Scenario], max_workers: Optional[int] = None,
+              simulation: Callable = run_scenario, map_size: Tuple[int, int] = DEF_MAP_SIZE) -> Iterator:
+    """
+    run the scenarios in parallel, over a pool of processes.
+    each map is parsed once here, and each worker builds its own map objects from the parsed data.
+    :param max_workers: amount of processes, None for the amount of cpus
+    :param simulation: a module level function that gets a scenario and a clean map (roads, traffic lights, junctions)
+                       and returns a picklable result
+    :param map_size: the size to normalize the maps to
+    :return: a generator of the simulation results, in the order they complete
+    """
+    scenarios = list(scenarios)
+    if any(algo is MLAlgo for scenario in scenarios for algo in scenario.algos):
+        # load the model once here, the forked workers share it
+        preload_model()
+    maps_data = {path: load_map(*map_size, path) for path in {scenario.map_path for scenario in scenarios}}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(maps_data, map_size)) as executor:
+        futures = [executor.submit(_run_in_worker, simulation, scenario) for scenario in scenarios]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _init_worker(maps_data: Dict[str, Tuple[List[RoadData], List[JunctionData]]], map_size: Tuple[int, int]):
+    global __maps_data, __map_size
+    __maps_data = maps_data
+    __map_size = map_size
+
+
+def _run_in_worker(simulation: Callable, scenario: Scenario):
+    # the worker builds each map once, and reuses it for its next scenarios of the same map
+    roads, traffic_lights, junctions = maps_cache.get_map(*__map_size, scenario.map_path,
+                                                          __maps_data[scenario.map_path])
+    try:
+        return simulation(scenario, roads, traffic_lights, junctions)
+    finally:
+        maps_cache.release_map(*__map_size, scenario.map_path)
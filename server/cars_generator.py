@@ -1,6 +1,9 @@
-from typing import List, Optional
-from random import random, choice
+from typing import List, Optional, Tuple
+from random import random, choice, getrandbits
 
+import numpy as np
+
+from server.map_graph import MapGraph, map_graph_of
 from server.simulation_objects.cars.car import Car
 from server.simulation_objects.cars.i_car import ICar
 from server.simulation_objects.roadsections.i_road_section import IRoadSection
@@ -42,3 +45,147 @@ def generate_car(roads: List[IRoadSection],  p=DEF_P, min_len=MIN_LEN, with_prin
     if with_prints:
         print(path)
     return Car(path)
+
+
+def generate_cars_bulk(roads: List[IRoadSection], amount: int, seed: Optional[int] = None, p=DEF_P,
+                       min_len=MIN_LEN) -> Optional[List[ICar]]:
+    """
+    generate the cars of generate_cars at once, with their own random generator.
+    the same seed always gives the same paths on the same map.
+    :param seed: None to seed from the random module, so random.seed still makes the cars reproducible
+    :return: the cars, or None if there are not enough paths of min_len roads
+    """
+    paths = generate_paths(roads, amount, seed, p, min_len)
+    if paths is None:
+        return None
+    return paths_to_cars(roads, *paths)
+
+
+def paths_to_cars(roads: List[IRoadSection], indptr: np.ndarray, path_roads: np.ndarray) -> List[ICar]:
+    """
+    :return: a car for each path of generate_paths
+    """
+    path_roads = [roads[i] for i in path_roads.tolist()]
+    indptr = indptr.tolist()
+    return [Car(path_roads[indptr[i]:indptr[i + 1]]) for i in range(len(indptr) - 1)]
+
+
+def create_rng(seed: Optional[int] = None) -> np.random.Generator:
+    """
+    :param seed: None to seed from the random module, so random.seed still makes the generator reproducible
+    """
+    return np.random.default_rng(getrandbits(64) if seed is None else seed)
+
+
+def generate_paths(roads: List[IRoadSection], amount: int, seed: Optional[int] = None, p=DEF_P,
+                   min_len=MIN_LEN) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    sample the paths of generate_car for many cars at once, over the roads' successors table.
+    like generate_car, a path starts on a random road and goes on to a random next road with probability p,
+    until it stops or gets to a road with no next roads. paths shorter than min_len are not used.
+    the length that a path tries to get to is geometric, so the paths are sampled with their wanted length
+    conditioned on it being at least min_len, and only paths that were cut by a dead end are rejected.
+    :return: the paths in CSR form: the roads indices of path i are path_roads[indptr[i]:indptr[i+1]].
+             None if there are not enough paths of min_len roads
+    """
+    __check_p(p)
+    if amount == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    rng = create_rng(seed)
+    map_graph = map_graph_of(roads)
+    min_len = max(min_len, 1)
+    lengths_parts, roads_parts = list(), list()
+    found = tries = 0
+    # the first round assumes that no path is cut, the next rounds use the amount of paths that were cut so far
+    accept_rate = 1.0
+    while found < amount:
+        if tries >= 100 * amount:
+            return None
+        batch = min(int((amount - found) / accept_rate * 1.1) + 16, 100 * amount - tries)
+        tries += batch
+        # the wanted length of each path, given that it is at least min_len
+        wanted = rng.geometric(1 - p, batch) + (min_len - 1)
+        starts = rng.integers(0, len(roads), batch)
+        indptr, path_roads, lengths = __walk_paths(map_graph, starts, wanted, rng)
+        accepted = np.flatnonzero(lengths >= min_len)[:amount - found]
+        accept_rate = max((found + len(accepted)) / tries, 0.01)
+        found += len(accepted)
+        lengths_parts.append(lengths[accepted])
+        roads_parts.append(path_roads[__segments_index(indptr[accepted], lengths[accepted])])
+    indptr = np.zeros(amount + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(lengths_parts), out=indptr[1:])
+    return indptr, np.concatenate(roads_parts)
+
+
+def generate_paths_from(roads: List[IRoadSection], starts: np.ndarray, rng: np.random.Generator, p=DEF_P,
+                        min_len=MIN_LEN) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    like generate_paths, but path i starts on the road of index starts[i].
+    a path that was cut by a dead end before min_len roads is sampled again, from the same road.
+    :param rng: the random generator to sample with, e.g. of create_rng
+    :return: the paths in CSR form, by the order of starts. None if some road has no paths of min_len roads
+    """
+    __check_p(p)
+    if len(starts) == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    map_graph = map_graph_of(roads)
+    min_len = max(min_len, 1)
+    slots_parts, lengths_parts, roads_parts = list(), list(), list()
+    pending = np.arange(len(starts))
+    tries = 0
+    while len(pending) > 0:
+        if tries >= 100 * len(starts):
+            return None
+        tries += len(pending)
+        wanted = rng.geometric(1 - p, len(pending)) + (min_len - 1)
+        indptr, path_roads, lengths = __walk_paths(map_graph, starts[pending], wanted, rng)
+        accepted = np.flatnonzero(lengths >= min_len)
+        slots_parts.append(pending[accepted])
+        lengths_parts.append(lengths[accepted])
+        roads_parts.append(path_roads[__segments_index(indptr[accepted], lengths[accepted])])
+        pending = pending[lengths < min_len]
+    # put the paths of all rounds back in the order of their starts
+    lengths = np.concatenate(lengths_parts)
+    path_roads = np.concatenate(roads_parts)
+    order = np.argsort(np.concatenate(slots_parts), kind="stable")
+    found_indptr = np.concatenate([[0], np.cumsum(lengths)])
+    indptr = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(lengths[order], out=indptr[1:])
+    return indptr, path_roads[__segments_index(found_indptr[order], lengths[order])]
+
+
+def __check_p(p):
+    if p < 0.01 or p > 0.99:
+        raise Exception("p should be in [0.01,0.99]")
+
+
+def __walk_paths(map_graph: MapGraph, starts: np.ndarray, wanted: np.ndarray, rng: np.random.Generator):
+    """
+    walk all paths one road at a time, each step over the paths that are still going
+    :return: indptr, path_roads, lengths: path i is path_roads[indptr[i]:indptr[i] + lengths[i]]
+    """
+    successors_indptr, successors = map_graph.roads_out_indptr, map_graph.roads_out_indices
+    degrees = np.diff(successors_indptr)
+    indptr = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(wanted, out=indptr[1:])
+    path_roads = np.empty(indptr[-1], dtype=np.int64)
+    path_roads[indptr[:-1]] = starts
+    lengths = np.ones(len(starts), dtype=np.int64)
+    going = np.flatnonzero(wanted > 1)
+    while len(going) > 0:
+        last = path_roads[indptr[going] + lengths[going] - 1]
+        going = going[degrees[last] > 0]
+        last = path_roads[indptr[going] + lengths[going] - 1]
+        choices = (rng.random(len(going)) * degrees[last]).astype(np.int64)
+        path_roads[indptr[going] + lengths[going]] = successors[successors_indptr[last] + choices]
+        lengths[going] += 1
+        going = going[lengths[going] < wanted[going]]
+    return indptr, path_roads, lengths
+
+
+def __segments_index(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    :return: the indices of the segments [starts[i], starts[i] + lengths[i]), one after the other
+    """
+    segments_starts = np.cumsum(lengths) - lengths
+    return np.repeat(starts - segments_starts, lengths) + np.arange(lengths.sum())
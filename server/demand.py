@@ -0,0 +1,207 @@
+import csv
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from server.cars_generator import DEF_P, MIN_LEN, create_rng, generate_paths_from, paths_to_cars
+from server.map_graph import map_graph_of
+from server.simulation_objects.cars.i_car import ICar
+from server.simulation_objects.roadsections.i_road_section import IRoadSection
+
+# the demand of a run: cars that enter the map while it runs, instead of all cars entering it on the first iteration.
+# each source road has a profile of the amount of cars that enter it on each iteration, and a CarsInjector
+# creates the cars of each iteration only when the iteration is run.
+
+
+class DemandProfile(ABC):
+    """
+    the amount of cars that enter a source road on each iteration
+    """
+
+    @abstractmethod
+    def arrivals(self, tick: int, rng: np.random.Generator) -> int:
+        """
+        :param tick: the iteration, from the start of the run
+        :param rng: the random generator of the demand
+        :return: the amount of cars that enter the road on the iteration
+        """
+        pass
+
+    @property
+    def end_tick(self) -> Optional[int]:
+        """
+        :return: the first iteration that no more cars enter on, or None if cars can always enter
+        """
+        return None
+
+
+class PoissonDemand(DemandProfile):
+    """
+    cars enter in a constant rate, the amount of cars of each iteration is a poisson sample
+    """
+
+    def __init__(self, rate: float, start_tick: int = 0, end_tick: Optional[int] = None):
+        """
+        :param rate: the average amount of cars of an iteration
+        :param start_tick, end_tick: cars enter only on iterations in [start_tick, end_tick)
+        """
+        self.__rate = rate
+        self.__start_tick = start_tick
+        self.__end_tick = end_tick
+
+    def arrivals(self, tick: int, rng: np.random.Generator) -> int:
+        if tick < self.__start_tick or (self.__end_tick is not None and tick >= self.__end_tick):
+            return 0
+        return int(rng.poisson(self.__rate))
+
+    @property
+    def end_tick(self) -> Optional[int]:
+        return self.__end_tick
+
+
+class PiecewiseDemand(DemandProfile):
+    """
+    cars enter in a rate that changes linearly between points of (iteration, rate), like a rush hours curve.
+    the amount of cars of each iteration is a poisson sample of the rate of the iteration.
+    """
+
+    def __init__(self, points: List[Tuple[int, float]], period: Optional[int] = None):
+        """
+        :param points: the (iteration, rate) points of the curve, sorted by the iterations
+        :param period: repeat the curve every period iterations, e.g. every day.
+                       None for a single curve, that ends on its last point
+        """
+        if len(points) == 0:
+            raise Exception("demand curve has no points")
+        self.__ticks = np.array([tick for tick, _ in points], dtype=float)
+        self.__rates = np.array([rate for _, rate in points], dtype=float)
+        if np.any(np.diff(self.__ticks) < 0):
+            raise Exception("demand curve points are not sorted")
+        self.__period = period
+
+    def rate(self, tick: int) -> float:
+        if self.__period is not None:
+            tick %= self.__period
+        elif tick > self.__ticks[-1]:
+            return 0.0
+        return float(np.interp(tick, self.__ticks, self.__rates))
+
+    def arrivals(self, tick: int, rng: np.random.Generator) -> int:
+        rate = self.rate(tick)
+        return int(rng.poisson(rate)) if rate > 0 else 0
+
+    @property
+    def end_tick(self) -> Optional[int]:
+        return None if self.__period is not None else int(self.__ticks[-1]) + 1
+
+
+class TraceDemand(DemandProfile):
+    """
+    replays recorded entries: a car enters on each iteration of the trace
+    """
+
+    def __init__(self, ticks: Iterable[int]):
+        """
+        :param ticks: the iteration of each car, an iteration appears once for each car that enters on it
+        """
+        self.__ticks = np.sort(np.fromiter(ticks, dtype=np.int64))
+
+    def arrivals(self, tick: int, rng: np.random.Generator) -> int:
+        return int(np.searchsorted(self.__ticks, tick, side="right") - np.searchsorted(self.__ticks, tick))
+
+    @property
+    def end_tick(self) -> Optional[int]:
+        return int(self.__ticks[-1]) + 1 if len(self.__ticks) > 0 else 0
+
+
+def traces_from_csv(path: str) -> Dict[int, TraceDemand]:
+    """
+    read recorded entries from a csv file with the columns tick, road_id: a row for each car
+    :return: the trace of each road id
+    """
+    ticks: Dict[int, List[int]] = defaultdict(list)
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            ticks[int(row["road_id"])].append(int(row["tick"]))
+    return {road_id: TraceDemand(road_ticks) for road_id, road_ticks in ticks.items()}
+
+
+def entry_roads(roads: List[IRoadSection]) -> List[IRoadSection]:
+    """
+    :return: the roads that no road goes to, where cars come into the map from outside of it
+    """
+    map_graph = map_graph_of(roads)
+    has_prev = np.zeros(len(roads), dtype=bool)
+    has_prev[map_graph.roads_out_indices] = True
+    return [road for road, road_has_prev in zip(roads, has_prev.tolist()) if not road_has_prev]
+
+
+class CarsInjector:
+    """
+    creates the cars of the demand of each iteration, when the iteration is run.
+    the cars of all source roads of an iteration are generated at once, with the paths of generate_paths_from,
+    and with the same random generator for the whole run, so the same seed gives the same cars.
+    """
+
+    def __init__(self, roads: List[IRoadSection], demand: Dict[int, DemandProfile], seed: Optional[int] = None,
+                 p=DEF_P, min_len=MIN_LEN):
+        """
+        :param roads: all roads of the map
+        :param demand: the profile of each source road, by the road's id
+        :param seed: the seed of the cars' paths and of the profiles' samples, None to seed from the random module
+        """
+        self.__roads = roads
+        map_graph = map_graph_of(roads)
+        roads_by_id = {road._id: road for road in roads}
+        missing = set(demand).difference(roads_by_id)
+        if len(missing) != 0:
+            raise Exception(f"there is demand for roads that are not in the map: {missing}")
+        self.__sources = np.array([map_graph.road_index(roads_by_id[road_id]) for road_id in demand],
+                                  dtype=np.int64)
+        self.__profiles = list(demand.values())
+        self.__rng = create_rng(seed)
+        self.__p = p
+        self.__min_len = min_len
+        self.__tick = 0
+        ends = [profile.end_tick for profile in self.__profiles]
+        self.__end_tick = None if any(end is None for end in ends) else max(ends, default=0)
+
+    @property
+    def tick(self) -> int:
+        """
+        :return: the iteration of the next cars
+        """
+        return self.__tick
+
+    @property
+    def done(self) -> bool:
+        """
+        :return: True if no more cars will enter
+        """
+        return self.__end_tick is not None and self.__tick >= self.__end_tick
+
+    def next_cars(self) -> List[ICar]:
+        """
+        create the cars that enter on the next iteration, they did not enter their first road yet.
+        the cars are counted as if they were activated on all iterations before, like the cars that exist since
+        the start of the run, since the cars compare their iterations to each other.
+        """
+        tick = self.__tick
+        self.__tick += 1
+        counts = np.array([profile.arrivals(tick, self.__rng) for profile in self.__profiles], dtype=np.int64)
+        if counts.sum() == 0:
+            return list()
+        starts = np.repeat(self.__sources, counts)
+        paths = generate_paths_from(self.__roads, starts, self.__rng, self.__p, self.__min_len)
+        if paths is None:
+            raise Exception(f"couldnt create cars path from the source roads on iteration {tick}")
+        cars = paths_to_cars(self.__roads, *paths)
+        for car in cars:
+            car._iteration = tick
+        return cars
+
+    def __iter__(self) -> Iterator[List[ICar]]:
+        while not self.done:
+            yield self.next_cars()
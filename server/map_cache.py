@@ -0,0 +1,97 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from db.dataclasses.junction_data import JunctionData
+from db.dataclasses.road_data import RoadData
+from server.map_creation import create_map_from_data, load_map
+from server.simulation_objects.junctions.i_junction import IJunction
+from server.simulation_objects.lanes.i_notified_lane import INotifiedLane
+from server.simulation_objects.roadsections.i_road_section import IRoadSection
+from server.simulation_objects.trafficlights.i_traffic_light import ITrafficLight
+
+DEF_MAX_MAPS = 4
+
+
+class MapCache:
+    """
+    an LRU cache of built maps, keyed by the map path and the size it was normalized to.
+    the roads, lanes geometry, traffic lights and junctions of a map are built once. each get_map gives the same
+    objects with a fresh simulation state: empty lanes, red lights and no junction algorithms.
+    so a map can only be used by one simulation at a time: get_map checks the map out, and it can not be taken again
+    until the simulation is done with it and calls release_map.
+    """
+
+    def __init__(self, max_maps: int = DEF_MAX_MAPS):
+        if max_maps < 1:
+            raise Exception("the cache should hold at least one map")
+        self.__max_maps = max_maps
+        self.__maps: OrderedDict = OrderedDict()
+        # the keys of the maps that are checked out by a simulation
+        self.__in_use = set()
+
+    def get_map(self, x_border, y_border, path: str,
+                map_data: Optional[Tuple[List[RoadData], List[JunctionData]]] = None) \
+            -> Tuple[List[IRoadSection], List[ITrafficLight], List[IJunction]]:
+        """
+        :param map_data: the parsed map, from map_creation.load_map. if None, the map is loaded from the path
+        :return: the roads, traffic lights and junctions of the map, ready for a new simulation
+        """
+        key = (path, x_border, y_border)
+        if key in self.__in_use:
+            raise Exception(f"the map {path} is used by another simulation, release it before getting it again")
+        if key in self.__maps:
+            self.__maps.move_to_end(key)
+        else:
+            if map_data is None:
+                map_data = load_map(x_border, y_border, path)
+            self.__maps[key] = create_map_from_data(map_data)
+        self.__in_use.add(key)
+        self.__remove_unused_maps()
+        roads, traffic_lights, junctions = self.__maps[key]
+        reset_map_state(roads, traffic_lights, junctions)
+        # new lists, so a simulation that changes its lists does not change the cached map
+        return list(roads), list(traffic_lights), list(junctions)
+
+    def release_map(self, x_border, y_border, path: str):
+        """
+        give back a map that was taken by get_map, after its simulation is done with it
+        """
+        key = (path, x_border, y_border)
+        if key not in self.__in_use:
+            raise Exception(f"the map {path} is not used by a simulation")
+        self.__in_use.remove(key)
+        self.__remove_unused_maps()
+
+    def __remove_unused_maps(self):
+        # remove the least recently used maps, that no simulation uses, until the cache is not over its size
+        for key in list(self.__maps):
+            if len(self.__maps) <= self.__max_maps:
+                break
+            if key not in self.__in_use:
+                del self.__maps[key]
+
+    def clear(self):
+        self.__maps.clear()
+
+    def __len__(self):
+        return len(self.__maps)
+
+
+def reset_map_state(roads: List[IRoadSection], traffic_lights: List[ITrafficLight], junctions: List[IJunction]):
+    """
+    reset the simulation state of the map objects to the state they had when the map was created
+    """
+    for road in roads:
+        for lane in road.lanes:
+            if isinstance(lane, INotifiedLane):
+                # the listener is the algorithm of the previous run
+                lane.cars_listener = None
+            lane.clear_cars()
+    for light in traffic_lights:
+        light.reset_state()
+    for junction in junctions:
+        junction.set_algo(None)
+
+
+# the maps cache of the process
+maps_cache = MapCache()
@@ -1,12 +1,14 @@
 from collections import defaultdict
 from typing import Dict, List, Tuple, Set
 
+from db.compiled_map import is_map_compiled, load_compiled_map_data
 from db.dataclasses.junction_data import JunctionData
 from db.dataclasses.road_data import RoadData
 from db.dataclasses.road_lane import RoadLane
 from db.dataclasses.traffic_light_data import TrafficLightData
 from db.load_map_data import get_db_junctions, get_db_road_sections
 from server.geometry.point import Point
+from server.map_graph import MapGraph
 from server.simulation_objects.junctions.i_junction import IJunction
 from server.simulation_objects.junctions.junction import Junction
 from server.simulation_objects.roadsections.i_road_section import IRoadSection
@@ -16,12 +18,38 @@ from server.simulation_objects.trafficlights.traffic_light import TrafficLight
 
 
 def create_map(x_border, y_border, path: str):
-    roads, traffic_lights, junctions = __create_objects_from_data(path)
-    __normalize_map(roads, traffic_lights, junctions, x_border, y_border)
+    return create_map_from_data(load_map(x_border, y_border, path))
+
+
+def load_map(x_border, y_border, path: str) -> Tuple[List[RoadData], List[JunctionData]]:
+    """
+    parse and normalize the map data, without creating the simulation objects.
+    uses the compiled form of the map if it exists, and the json files otherwise.
+    creating the objects does not change the data, so the same parsed map can create many separate maps.
+    :return: the map's roads data and junctions data
+    """
+    if is_map_compiled(path):
+        # the compiled map is normalized on its arrays, before the data objects are created
+        return load_compiled_map_data(path, x_border, y_border)
+    roads_data = get_db_road_sections(path)
+    junctions_data = get_db_junctions(path)
+    # normalize the data before creating the objects, so the lanes' geometry is calculated once, on the final points
+    __normalize_map(roads_data, junctions_data, x_border, y_border)
+    return roads_data, junctions_data
+
+
+def create_map_from_data(map_data: Tuple[List[RoadData], List[JunctionData]]):
+    """
+    create new simulation objects of a map
+    :param map_data: the result of load_map
+    :return: the roads, traffic lights and junctions of the map
+    """
+    roads_data, junctions_data = map_data
+    roads, traffic_lights, junctions = __create_objects_from_data(roads_data, junctions_data)
     return roads, traffic_lights, junctions
 
 
-def __create_objects_from_data(path: str):
+def __create_objects_from_data(roads_data: List[RoadData], junctions_data: List[JunctionData]):
     """
     order of operations:
     1. get and store all data about junction:
@@ -40,12 +68,14 @@ def __create_objects_from_data(path: str):
         traffic light's constructor, which sets them to have the light as theirs.
     4. create the lane movements, based on the data from part 1, and now that all lanes have been created.
     5. create all junctions, they need the traffic lights and road section in their constructor.
+    6. index the movements of all lanes and roads as adjacency arrays, now that they are final, and give every
+       road section the graph.
     """
     # part 1
-    from_roads, all_traffic_lights, junctions_data = __get_junctions_data(path)
+    from_roads, all_traffic_lights = __get_junctions_data(junctions_data)
     # part 2
     notified_lanes_dict: Dict[int, Set[int]] = __get_notified_lanes_dict(set(from_roads), all_traffic_lights)
-    roads: Dict[int, IRoadSection] = __get_roads(notified_lanes_dict, path)
+    roads: Dict[int, IRoadSection] = __get_roads(notified_lanes_dict, roads_data)
     # part 3
     traffic_lights = __get_traffic_lights(all_traffic_lights, roads)
     # part 4
@@ -58,27 +88,28 @@ def __create_objects_from_data(path: str):
             for lane in road.lanes:
                 lane.set_prev_junction(junction)
 
+    # part 6
     roads_list = list(roads.values())
+    map_graph = MapGraph(roads_list)
+    for road in roads_list:
+        road.map_graph = map_graph
     return roads_list, traffic_lights, all_junctions
 
 
-def __normalize_map(roads: List[IRoadSection], traffic_lights: List[ITrafficLight], junctions: List[IJunction],
-                    x_border, y_border):
+def __normalize_map(roads_data: List[RoadData], junctions_data: List[JunctionData], x_border, y_border):
     """
-    get min and max x,y values of the whole map and normalize all points accordingly
+    get min and max x,y values of the whole map and normalize all points accordingly.
+    the lanes' points are splits of the roads' points, so normalizing the roads data normalizes them too.
     :param x_border: max x value to convert to
     :param y_border: max y value to convert to
     """
     all_points: List[Point] = list()
     # get all points of the simulation
-    for road in roads:
-        all_points += [point for pair in road.coordinates for point in pair]
-        for lane in road.lanes:
-            all_points += [point for line in lane.coordinates for point in line]
-    for light in traffic_lights:
-        all_points.append(light.coordinate)
-    for junc in junctions:
-        all_points += junc.coordinates
+    for road_data in roads_data:
+        all_points += [point for pair in road_data.coordinates for point in pair]
+    for junction_data in junctions_data:
+        all_points += junction_data.traffic_lights_coords
+        all_points += junction_data.coordinates
     # get min and max x,y values of the whole map
     x_values = [p.x for p in all_points]
     y_values = [p.y for p in all_points]
@@ -93,22 +124,14 @@ def __normalize_map(roads: List[IRoadSection], traffic_lights: List[ITrafficLigh
         point.normalize(norm_x, norm_y)
 
 
-def __get_junctions_data(path: str):
+def __get_junctions_data(junctions_data: List[JunctionData]):
     # from_roads: a dictionary from road id to a list of all road movements that are from the road.
     #   they are of form: (from: (road_id,lane_num), to: (road_id,lane_num)). all ints
     from_roads: Dict[int, List[Tuple[RoadLane, RoadLane]]] = defaultdict(list)
     # all_traffic_lights: a list of traffic lights, each one is represented as a list of (road_id,lane_num),
     #   which listen to the traffic light.
     all_traffic_lights: List[TrafficLightData] = list()
-    # roads_movements: a list of (from: (road_id,lane_num), to: (road_id,lane_num)). all ints
-    # traffic_lights: a list of lists of (road_id,lane_num), which are all ints.
-    #   each sub list is a traffic light, and its list contains lanes listening to it.
-    #   if the junction has no traffic lights, traffic_lights is an empty list.
-    junctions_data: List[JunctionData] = list()
-    for junction_data in get_db_junctions(path):
-        junction_data: JunctionData
-        # add to list of total data
-        junctions_data.append(junction_data)
+    for junction_data in junctions_data:
         # add the road movement
         for single_roads_movement in junction_data.goes_to:
             from_roads[single_roads_movement[0].road_id].append(single_roads_movement)
@@ -118,7 +141,7 @@ def __get_junctions_data(path: str):
             raise Exception("traffic lights lists are not the same length!")
         all_traffic_lights += [TrafficLightData(roadlane, coor) for roadlane, coor in
                                zip(junction_data.traffic_lights, junction_data.traffic_lights_coords)]
-    return from_roads, all_traffic_lights, junctions_data
+    return from_roads, all_traffic_lights
 
 
 def __get_notified_lanes_dict(all_road_ids: Set[int], all_traffic_lights: List[TrafficLightData]) \
@@ -140,11 +163,10 @@ def __get_notified_lanes_dict(all_road_ids: Set[int], all_traffic_lights: List[T
     return notified_lanes_dict
 
 
-def __get_roads(notified_lanes_dict: Dict[int, Set[int]], path: str) -> Dict[int, IRoadSection]:
+def __get_roads(notified_lanes_dict: Dict[int, Set[int]], roads_data: List[RoadData]) -> Dict[int, IRoadSection]:
     roads: Dict[int, IRoadSection] = dict()
     # create all roads
-    for road_data in get_db_road_sections(path):
-        road_data: RoadData
+    for road_data in roads_data:
         # create the road section
         roads[road_data.idnum] = RoadSection(road_data, notified_lanes_dict[road_data.idnum])
     # make sure there are no errors in the db
@@ -0,0 +1,98 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from server.simulation_objects.lanes.i_lane import ILane
+from server.simulation_objects.roadsections.i_road_section import IRoadSection
+
+
+class MapGraph:
+    """
+    the movements of a map as integer indexed adjacency arrays, in CSR form:
+    the successors of item i are indices[indptr[i]:indptr[i+1]].
+    lanes are indexed by the order of the roads, and by their order inside their road.
+    the graph only holds the map's topology, so it is shared by all cars and copies of the map objects.
+    """
+
+    def __init__(self, roads: List[IRoadSection]):
+        self.roads: List[IRoadSection] = roads
+        self.lanes: List[ILane] = [lane for road in roads for lane in road.lanes]
+        # road sections compare by their id, so they are indexed by identity
+        self.__road_index: Dict[int, int] = {id(road): i for i, road in enumerate(roads)}
+        self.__lane_index: Dict[ILane, int] = {lane: i for i, lane in enumerate(self.lanes)}
+        self.lane_road = np.array([self.__road_index[id(lane.road)] for lane in self.lanes], dtype=np.int64)
+        # lane -> lane, in the order of each lane's movements. a movement may appear more than once
+        self.lanes_out_indptr, self.lanes_out_indices = _csr(
+            [[self.__lane_index[to_lane] for to_lane in lane.goes_to_lanes] for lane in self.lanes])
+        self.lanes_in_indptr, self.lanes_in_indices = _csr(
+            [[self.__lane_index[from_lane] for from_lane in lane._comes_from] for lane in self.lanes])
+        # road -> lanes: the lanes of road i are lanes[road_lanes_indptr[i]:road_lanes_indptr[i+1]]
+        self.road_lanes_indptr = np.zeros(len(roads) + 1, dtype=np.int64)
+        np.cumsum([len(road.lanes) for road in roads], out=self.road_lanes_indptr[1:])
+        # road -> road: the distinct next roads, by the order of their first movement from the road's lanes
+        next_roads_indices = list()
+        for road_index in range(len(roads)):
+            first_lane, end_lane = self.road_lanes_indptr[road_index], self.road_lanes_indptr[road_index + 1]
+            movements = self.lanes_out_indices[self.lanes_out_indptr[first_lane]:self.lanes_out_indptr[end_lane]]
+            next_roads_indices.append(list(dict.fromkeys(self.lane_road[movements].tolist())))
+        self.roads_out_indptr, self.roads_out_indices = _csr(next_roads_indices)
+        # tuples, so the callers of the roads' goes_to_roads cannot change the graph
+        self.__next_roads: List[Tuple[IRoadSection, ...]] = [tuple(roads[i] for i in self.road_successors(road_index))
+                                                             for road_index in range(len(roads))]
+        # grows whenever a car enters or leaves a lane of the map, so computations over the cars of the lanes can
+        # be memoized
+        self.occupancy_version = 0
+        # the UpstreamLoad of the map's lanes, created by the first algorithm that asks for it
+        self.upstream_load = None
+
+    def __deepcopy__(self, memodict={}):
+        return self
+
+    def road_index(self, road: IRoadSection) -> int:
+        return self.__road_index[id(road)]
+
+    def lane_index(self, lane: ILane) -> int:
+        return self.__lane_index[lane]
+
+    def road_successors(self, road_index: int) -> np.ndarray:
+        return self.roads_out_indices[self.roads_out_indptr[road_index]:self.roads_out_indptr[road_index + 1]]
+
+    def lane_successors(self, lane_index: int) -> np.ndarray:
+        return self.lanes_out_indices[self.lanes_out_indptr[lane_index]:self.lanes_out_indptr[lane_index + 1]]
+
+    def lane_predecessors(self, lane_index: int) -> np.ndarray:
+        return self.lanes_in_indices[self.lanes_in_indptr[lane_index]:self.lanes_in_indptr[lane_index + 1]]
+
+    def next_roads(self, road: IRoadSection) -> Tuple[IRoadSection, ...]:
+        """
+        :return: the roads that the road's lanes go to, without duplicates
+        """
+        return self.__next_roads[self.__road_index[id(road)]]
+
+    def lanes_movements(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: the movements of all lanes as (to lanes, from lanes) arrays, by the order of the incoming movements
+        """
+        to_lanes = np.repeat(np.arange(len(self.lanes), dtype=np.int64), np.diff(self.lanes_in_indptr))
+        return to_lanes, self.lanes_in_indices
+
+
+def map_graph_of(roads: List[IRoadSection]) -> MapGraph:
+    """
+    :return: the graph of the roads' map if it is indexed by the same roads list, or a new graph of the roads
+    """
+    map_graph = roads[0].map_graph if len(roads) > 0 else None
+    if map_graph is not None and len(map_graph.roads) == len(roads) and \
+            all(graph_road is road for graph_road, road in zip(map_graph.roads, roads)):
+        return map_graph
+    return MapGraph(roads)
+
+
+def _csr(rows: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: the indptr and indices arrays of the rows
+    """
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    indices = np.array([item for row in rows for item in row], dtype=np.int64)
+    return indptr, indices
@@ -0,0 +1,188 @@
+# opt-in timing of the simulation phases.
+# the simulation checks active_sink before timing anything, so when profiling is disabled (active_sink is None)
+# a phase costs a single attribute check.
+import csv
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from math import frexp
+from typing import Callable, Dict, Optional, Tuple
+
+# the phases that the simulation records
+CARS_ACTIVATION = "cars_activation"
+ARRIVALS = "arrivals"
+LIGHTS_ACTIVATION = "lights_activation"
+MANAGE_LIGHTS = "manage_lights"
+
+
+class ProfilingSink(ABC):
+    """
+    receives the timing of each recorded phase
+    """
+
+    @abstractmethod
+    def record(self, phase: str, seconds: float, algo: Optional[str] = None, junction: Optional[str] = None):
+        """
+        :param phase: the name of the phase
+        :param seconds: the time the phase took
+        :param algo: the traffic lights algorithm class name, for phases of a junction's algorithm
+        :param junction: the junction id, for phases of a junction's algorithm
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class TimingHistogram:
+    """
+    a histogram of timings, with a bucket for each power of two of seconds
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        # the bucket e holds the timings in [2^(e-1), 2^e)
+        self.buckets: Dict[int, int] = dict()
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = frexp(seconds)[1]
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        :param q: in [0,100]
+        :return: the upper bound of the bucket of the q percentile
+        """
+        needed = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= needed:
+                return min(2.0 ** bucket, self.max)
+        return self.max
+
+    def __repr__(self):
+        return f"count: {self.count}, total: {self.total:.6f}, mean: {self.mean:.6f}, max: {self.max:.6f}"
+
+
+class HistogramSink(ProfilingSink):
+    """
+    aggregates the timings in memory, by phase, algorithm and junction
+    """
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Optional[str], Optional[str]], TimingHistogram] = dict()
+
+    def record(self, phase: str, seconds: float, algo: Optional[str] = None, junction: Optional[str] = None):
+        key = (phase, algo, junction)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = TimingHistogram()
+        histogram.add(seconds)
+
+    def by_phase(self) -> Dict[str, TimingHistogram]:
+        return self.__merged(lambda phase, algo, junction: phase)
+
+    def by_algo(self) -> Dict[Tuple[str, str], TimingHistogram]:
+        """
+        :return: the histograms of the algorithms' phases, by (phase, algorithm class name)
+        """
+        return self.__merged(lambda phase, algo, junction: (phase, algo) if algo is not None else None)
+
+    def by_junction(self) -> Dict[Tuple[str, str], TimingHistogram]:
+        """
+        :return: the histograms of the algorithms' phases, by (phase, junction id)
+        """
+        return self.__merged(lambda phase, algo, junction: (phase, junction) if junction is not None else None)
+
+    def __merged(self, group: Callable):
+        res = dict()
+        for key, histogram in self.histograms.items():
+            group_key = group(*key)
+            if group_key is None:
+                continue
+            if group_key not in res:
+                res[group_key] = TimingHistogram()
+            res[group_key].merge(histogram)
+        return res
+
+
+class CsvSink(ProfilingSink):
+    """
+    writes every timing as a row of a csv file
+    """
+
+    def __init__(self, path: str):
+        self.__file = open(path, "w", newline="")
+        self.__writer = csv.writer(self.__file)
+        self.__writer.writerow(["phase", "seconds", "algo", "junction"])
+
+    def record(self, phase: str, seconds: float, algo: Optional[str] = None, junction: Optional[str] = None):
+        self.__writer.writerow([phase, seconds, algo or "", junction or ""])
+
+    def close(self):
+        self.__file.close()
+
+
+class CallbackSink(ProfilingSink):
+    """
+    calls a function with every timing
+    """
+
+    def __init__(self, callback: Callable[[str, float, Optional[str], Optional[str]], None]):
+        self.__callback = callback
+
+    def record(self, phase: str, seconds: float, algo: Optional[str] = None, junction: Optional[str] = None):
+        self.__callback(phase, seconds, algo, junction)
+
+
+# the sink that the simulation records to. None when profiling is disabled
+active_sink: Optional[ProfilingSink] = None
+
+
+def enable(sink: ProfilingSink):
+    global active_sink
+    active_sink = sink
+
+
+def disable():
+    """
+    stop profiling, and close the sink
+    """
+    global active_sink
+    if active_sink is not None:
+        active_sink.close()
+    active_sink = None
+
+
+@contextmanager
+def profile(sink: ProfilingSink):
+    """
+    profile the simulation inside a with block:
+        with profile(HistogramSink()) as sink:
+            run_until_done(...)
+        print(sink.by_phase())
+    """
+    enable(sink)
+    try:
+        yield sink
+    finally:
+        disable()
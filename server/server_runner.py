@@ -1,32 +1,107 @@
-def next_iter(light_algos, traffic_lights, cars):
+from time import perf_counter
+
+from server import profiling
+from server.simulation_objects.cars.active_cars import ActiveCars
+from server.vectorized_engine import VectorizedCars
+
+
+def next_iter(light_algos, traffic_lights, cars, demand=None):
     """
     calculate the next iteration of the simulation
     :param light_algos: traffic lights manager
     :param traffic_lights: the traffic lights objects, including their state (red/green)
-    :param cars: the current cars on the map, should calculate their next position
+    :param cars: the current cars on the map, should calculate their next position.
+                 an ActiveCars, a list of cars, or a VectorizedCars object that advances all of its cars in one
+                 batched step. ActiveCars and VectorizedCars keep the cars that arrived in the iteration
+                 in last_arrived
+    :param demand: a CarsInjector whose cars of the iteration enter the map before the cars are activated, or None.
+                   the cars should be an ActiveCars, which keeps the entered cars in last_entered
     :return: new traffic lights and cars lists
     """
-    __handle_cars(cars)
-    __handle_lights(light_algos, traffic_lights)
+    if demand is not None:
+        __enter_cars(cars, demand.next_cars())
+    if profiling.active_sink is None:
+        __retire_cars(cars, __activate_cars(cars))
+        __activate_lights(traffic_lights)
+    else:
+        __profiled_iter(profiling.active_sink, cars, traffic_lights)
+    __manage_lights(light_algos)
     return traffic_lights, cars
 
 
-def __handle_cars(cars):
-    # we want to remove all cars that have finished theit path
-    to_remove = list()
+def run_until_done(light_algos, traffic_lights, cars, on_iter=None, max_iterations=None, demand=None) -> int:
+    """
+    run the simulation until all cars have arrived their destination
+    :param on_iter: a function that is called with the cars after each iteration, or None
+    :param max_iterations: stop after this amount of iterations even if there are still cars, or None for no limit
+    :param demand: a CarsInjector of cars that enter while the simulation runs, or None.
+                   with demand, the simulation also runs until no more cars will enter
+    :return: the amount of iterations that were run
+    """
+    iterations = 0
+    while (len(cars) > 0 or (demand is not None and not demand.done)) and \
+            (max_iterations is None or iterations < max_iterations):
+        traffic_lights, cars = next_iter(light_algos, traffic_lights, cars, demand)
+        iterations += 1
+        if on_iter is not None:
+            on_iter(cars)
+    return iterations
+
+
+def __enter_cars(cars, entered):
+    if not isinstance(cars, ActiveCars):
+        raise Exception("cars can enter only an ActiveCars while the simulation runs")
+    for car in entered:
+        car.enter_first_road()
+    cars.enter(entered)
+
+
+def __profiled_iter(sink, cars, traffic_lights):
+    start = perf_counter()
+    arrived = __activate_cars(cars)
+    activated = perf_counter()
+    __retire_cars(cars, arrived)
+    retired = perf_counter()
+    __activate_lights(traffic_lights)
+    end = perf_counter()
+    sink.record(profiling.CARS_ACTIVATION, activated - start)
+    sink.record(profiling.ARRIVALS, retired - activated)
+    sink.record(profiling.LIGHTS_ACTIVATION, end - retired)
+
+
+def __activate_cars(cars):
+    """
+    :return: the cars that have finished their path
+    """
+    if isinstance(cars, VectorizedCars):
+        # the vectorized engine moves all cars, and removes the ones that arrived, by itself
+        cars.step()
+        return list()
+    arrived = list()
     for car in cars:
         car.activate()
         if car.has_arrived_destination():
-            to_remove.append(car)
-    for car in to_remove:
-        cars.remove(car)
+            arrived.append(car)
+    return arrived
+
+
+def __retire_cars(cars, arrived):
+    if isinstance(cars, ActiveCars):
+        cars.retire(arrived)
+    elif len(arrived) > 0:
+        # a plain list is filtered in one pass, instead of removing each car by a search of the list
+        arrived_set = set(arrived)
+        cars[:] = [car for car in cars if car not in arrived_set]
+    for car in arrived:
         car.reached_destination()
-        del car
 
 
-def __handle_lights(light_algos, traffic_lights):
+def __activate_lights(traffic_lights):
     for tl in traffic_lights:
         tl.activate()
 
-    for i,light_algo in enumerate(light_algos):
+
+def __manage_lights(light_algos):
+    # the algorithms record their own timing, per junction
+    for light_algo in light_algos:
         light_algo.manage_lights()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List
+
+from server.simulation_objects.cars.i_car import ICar
+
+
+class ActiveCars:
+    """
+    the cars that are still driving in a simulation.
+    the cars are kept in a dict, which keeps their order (the order they are activated in each iteration)
+    and removes a car in O(1), so retiring the arrived cars of an iteration costs only the amount of arrived cars.
+    the cars that arrived in the last iteration are kept in last_arrived, until the next retirement, and the cars
+    that entered in the last iteration are kept in last_entered, until the next entering.
+    """
+
+    def __init__(self, cars: Iterable[ICar] = ()):
+        self.__cars: Dict[ICar, None] = dict.fromkeys(cars)
+        self.__last_arrived: List[ICar] = list()
+        self.__last_entered: List[ICar] = list()
+        self.__arrived_amount = 0
+
+    def __copy__(self) -> ActiveCars:
+        res = ActiveCars(self.__cars)
+        res.__last_arrived = list(self.__last_arrived)
+        res.__last_entered = list(self.__last_entered)
+        res.__arrived_amount = self.__arrived_amount
+        return res
+
+    def __len__(self) -> int:
+        return len(self.__cars)
+
+    def __iter__(self) -> Iterator[ICar]:
+        return iter(self.__cars)
+
+    def __contains__(self, car) -> bool:
+        return car in self.__cars
+
+    def add(self, car: ICar):
+        self.__cars[car] = None
+
+    def enter(self, cars: List[ICar]):
+        """
+        add the cars that entered the map in this iteration, after they entered their first road
+        """
+        for car in cars:
+            self.__cars[car] = None
+        self.__last_entered = cars
+
+    def retire(self, arrived: List[ICar]):
+        """
+        remove the cars that arrived their destination in this iteration
+        """
+        for car in arrived:
+            del self.__cars[car]
+        self.__last_arrived = arrived
+        self.__arrived_amount += len(arrived)
+
+    @property
+    def last_arrived(self) -> List[ICar]:
+        """
+        :return: the cars that were retired in the last iteration
+        """
+        return self.__last_arrived
+
+    @property
+    def last_entered(self) -> List[ICar]:
+        """
+        :return: the cars that entered in the last iteration
+        """
+        return self.__last_entered
+
+    @property
+    def arrived_amount(self) -> int:
+        """
+        :return: the amount of cars that were retired since the container was created
+        """
+        return self.__arrived_amount
@@ -13,7 +13,7 @@ from server.geometry.point import Point
 from server.simulation_objects.cars.car_state import CarState
 from server.simulation_objects.cars.i_car import ICar
 from server.simulation_objects.cars.position import Position
-from server.simulation_objects.lanes.lane import Lane
+from server.simulation_objects.lanes.i_lane import ILane
 from server.simulation_objects.lanes.notified_lane import NotifiedLane
 from server.simulation_objects.roadsections.i_road_section import IRoadSection
 from server.simulation_objects.trafficlights.i_traffic_light import ITrafficLight
@@ -36,6 +36,10 @@ class Car(ICar):
         self.__next_road_idx = 0
         self.__idx = Car.next_car_index
         Car.next_car_index += 1
+        # the canonical position of the car is its distance from the start of its current lane.
+        # the x,y position is derived from it only when it is asked for
+        self.__distance = 0
+        self.__current_lane_part = 0
         self.__position = None
         self.__current_road = None
         self.__current_lane = None
@@ -47,7 +51,6 @@ class Car(ICar):
         res = Car.__new__(Car)
         res.__dict__ = copy.copy(self.__dict__)
 
-        res.__position = copy.copy(self.position)
         res.__current_road = deepcopy(self.__current_road)
         res.__current_lane = deepcopy(self.__current_lane)
         res.__path = deepcopy(self.__path)
@@ -68,10 +71,9 @@ class Car(ICar):
         self.__current_lane = road.get_lane(self.__current_road.get_most_right_lane_index())
 
         self.__current_lane.add_car(self)
-        self.__current_lane_part = 0
         # put on the initial_distance from start of the road
         assert initial_distance <= self.__current_lane.lane_length()
-        self.__position = Line(*self.__current_lane.coordinates[0]).middle()
+        self._set_distance(0)
         self._advance(initial_distance)
 
     def activate(self):
@@ -96,9 +98,13 @@ class Car(ICar):
             self._enter_road_section(self.__path[self.__next_road_idx])
 
     def _update_speed(self):
+        was_waiting = self.is_waiting()
         self.__speed += self.__acceleration
         self.__speed = max(0, min(self.__speed, self.__max_speed))
         self.__acceleration = min(self.__acceleration, self.__current_road.max_speed - self.__speed)
+        if self.is_waiting() != was_waiting:
+            # the lane only tracks the changes of the waiting cars
+            self.__current_lane.update_car_waiting(self)
 
     def _full_gass(self):
         if self.__speed + self.__max_speed_change <= self.__current_road.max_speed:
@@ -128,8 +134,9 @@ class Car(ICar):
                 else:
                     # there is a red light.
                     # update speed s.t. we do not pass the max speed, max deceleration, and light distance
-                    lane_end_coordinates = self.__current_lane.coordinates[-1]
-                    distance_to_stop = self._distance_to_part_end(self.position, lane_end_coordinates)
+                    # the straight distance to the middle of the lane's end, like the positions of the cars
+                    geometry = self.__current_lane.geometry
+                    distance_to_stop = Line(self.position, geometry.middle(geometry.parts_amount)).length()
 
                     if self.__acceleration == 0:
                         if self.__speed == 0:
@@ -152,10 +159,7 @@ class Car(ICar):
                 else:
                     distance_to_keep = self.__speed * 1.1 + self.__current_lane.lane_length() / 10
 
-                    simulation_car = deepcopy(front_car)
-                    simulation_car._advance(simulation_car.estimated_speed())
-
-                    estimated_front_car_pos = simulation_car.position
+                    estimated_front_car_pos = front_car.position_after(front_car.estimated_speed())
 
                     distance_to_move = Line(self.position, estimated_front_car_pos).length() - distance_to_keep
 
@@ -165,8 +169,36 @@ class Car(ICar):
 
     @property
     def position(self):
+        if self.__position is None:
+            self.__position = Position(*self.__current_lane.geometry.point_at(self.__distance).to_tuple())
         return self.__position
 
+    @property
+    def distance_in_lane(self) -> float:
+        return self.__distance
+
+    def position_after(self, distance: float) -> Point:
+        # the same walk as _advance, but on local variables only
+        lane = self.__current_lane
+        next_road_idx = self.__next_road_idx
+        # a negative distance, e.g. of a braking car's estimated speed, does not move the car backwards
+        new_distance = self.__distance + max(0, distance)
+        while new_distance > lane.lane_length() and next_road_idx < len(self.__path):
+            new_distance -= lane.lane_length()
+            next_road = self.__path[next_road_idx]
+            next_road_idx += 1
+            lane = next_road.get_lane(next_road.get_most_right_lane_index())
+        return lane.geometry.point_at(min(new_distance, lane.lane_length()))
+
+    def _set_distance(self, distance: float):
+        """
+        set the distance of the car from the start of its current lane
+        """
+        self.__distance = distance
+        self.__current_lane_part = self.__current_lane.geometry.part_at(distance)
+        # the x,y position is calculated again when it is asked for
+        self.__position = None
+
     def _stop(self, distance: float):
         self.__state.stopping = True
 
@@ -202,51 +234,21 @@ class Car(ICar):
             return self.__current_lane.traffic_light
         return None
 
-    @staticmethod
-    def _distance_to_part_end(current_position: Point, coordinates: Tuple[Point, Point]) -> float:
-        next_middle = Line(*coordinates).middle()
-        path = Line(current_position, next_middle)
-
-        return path.length()
-
-    def _move_in_part(self, dist_to_move: float) -> float:
-        """
-        move forward in the part of the lane
-        :param dist_to_move: the distance to move
-        :return: the distance left to move, if got to end of part. 0 if finished inside the part.
-        """
-        # We have the current part of the road, calculate the line to the next part.
-        # We want to meet the next part's start line at the middle of the line.
-        next_line_points = self.__current_lane.coordinates[self.__current_lane_part + 1]
-
-        next_middle = Line(*next_line_points).middle()
-        path = Line(self.position, next_middle)
-        dist = path.length()
-
-        if dist > dist_to_move:
-            self.__position = path.split_by_ratio(dist_to_move / dist)
-            return 0
-
-        # else, move to next_middle and return distance left
-        self.__position = Position(next_middle.x, next_middle.y)
-        self.__current_lane_part += 1
-        return dist_to_move - dist
-
     def _move_in_lane(self, dist_to_move: float) -> float:
         """
-        move through the parts of the lane until we finished the distance or the lane.
+        move forward in the lane until we finished the distance or the lane.
         :param dist_to_move: the distance to move
         :return: the distance left to move, if got to end of the lane. 0 if finished inside the lane.
         """
-        dist_left = dist_to_move
-        number_of_parts = len(self.__current_road.coordinates)
-
-        while dist_left > 0 and self.__current_lane_part < number_of_parts - 1:
-            # continue while we have distance to cover and parts to move forward to
-            dist_left = self._move_in_part(dist_left)
+        if dist_to_move <= 0:
+            # cars never move backwards
+            return 0
+        lane_length = self.__current_lane.lane_length()
+        new_distance = self.__distance + dist_to_move
+        self._set_distance(min(new_distance, lane_length))
 
         # return the distance left. if it is 0, we are done. else, we have to move to the next road.
-        return dist_left
+        return max(0, new_distance - lane_length)
 
     def _should_move_lane(self) -> bool:
         if self.__next_road_idx == len(self.__path):
@@ -255,15 +257,12 @@ class Car(ICar):
         return not self.__current_lane.is_going_to_road(next_road)
 
     def move_lane(self, lane):
-        current_part_as_line = Lane.part_as_line(self.__current_lane.coordinates[self.__current_lane_part],
-                                                 self.__current_lane.coordinates[self.__current_lane_part + 1])
-        new_part_as_line = Lane.part_as_line(lane.coordinates[self.__current_lane_part],
-                                             lane.coordinates[self.__current_lane_part + 1])
-
-        self.__position = self._position_in_new_line(current_part_as_line, new_part_as_line)
+        new_distance = Car.distance_in_new_lane(self.position, self.__current_lane_part, self.__current_lane.geometry,
+                                                lane.geometry)
 
         self.__current_lane.remove_car(self)
         self.__current_lane = lane
+        self._set_distance(new_distance)
 
         before_car: Car = lane.get_car_before(self)
         lane.insert_before(self, before_car)
@@ -273,23 +272,27 @@ class Car(ICar):
 
         self.__state.moving_lane = lane
 
-    @property
-    def current_part_in_lane(self):
-        return self.__current_lane_part
-
-    def lane_to_move_in(self):
-        if self.__next_road_idx == len(self.__path):
-            return self.__current_lane
-
-        next_road = self.__path[self.__next_road_idx]
-        for lane in self.__current_road.lanes:
-            if lane.is_going_to_road(next_road):
-                return lane
-
-        raise Exception
+    @staticmethod
+    def distance_in_new_lane(position: Point, part: int, current_geometry, new_geometry) -> float:
+        """
+        move to the point of the matching part of the new lane, that is in front of the car: on the perpendicular
+        of the current part, through the car's position
+        :param position: the position of the car in its current lane
+        :param part: the part of the current lane that the car is in
+        :return: the distance of the point from the start of the new lane
+        """
+        current_part_line = Line(current_geometry.middle(part), current_geometry.middle(part + 1))
+        new_part_line = Line(new_geometry.middle(part), new_geometry.middle(part + 1))
+        new_position = Car._position_in_new_line(position, current_part_line, new_part_line)
+        # the distance of the point along the new part, it is on the line of the part
+        dx, dy = new_geometry.directions[part]
+        part_start = new_geometry.middle(part)
+        distance_in_part = (new_position.x - part_start.x) * dx + (new_position.y - part_start.y) * dy
+        return new_geometry.part_start_distance(part) + max(0, min(distance_in_part, new_geometry.part_length(part)))
 
-    def _position_in_new_line(self, current_line, line_to_move_to):
-        x_current, y_current = self.position.to_tuple()
+    @staticmethod
+    def _position_in_new_line(position: Point, current_line: Line, line_to_move_to: Line) -> Position:
+        x_current, y_current = position.to_tuple()
         m1 = current_line.m
         m2 = line_to_move_to.m
         b2 = line_to_move_to.b
@@ -308,6 +311,21 @@ class Car(ICar):
 
         return Position(x_expected, y_expected)
 
+    @property
+    def current_part_in_lane(self):
+        return self.__current_lane_part
+
+    def lane_to_move_in(self):
+        if self.__next_road_idx == len(self.__path):
+            return self.__current_lane
+
+        next_road = self.__path[self.__next_road_idx]
+        for lane in self.__current_road.lanes:
+            if lane.is_going_to_road(next_road):
+                return lane
+
+        raise Exception
+
     def wants_to_enter_lane(self, car: Car) -> None:
         # current_part_as_line = Lane.part_as_line(self.__current_lane.coordinates[self.__current_lane_part],
         #                                          self.__current_lane.coordinates[self.__current_lane_part + 1])
@@ -329,11 +347,19 @@ class Car(ICar):
 
     def get_angle(self):
         # the line from the middle of the start of the current part, to the middle of the end of the current part
-        curr_line = Line(
-            Line(*self.__current_lane.coordinates[self.__current_lane_part]).middle(),
-            Line(*self.__current_lane.coordinates[self.__current_lane_part + 1]).middle())
-        x_diff = curr_line.p2.x - curr_line.p1.x
-        y_diff = curr_line.p1.y - curr_line.p2.y  # y axis is upside down
+        geometry = self.__current_lane.geometry
+        return Car.heading_angle(geometry.middle(self.__current_lane_part),
+                                 geometry.middle(self.__current_lane_part + 1))
+
+    @staticmethod
+    def heading_angle(start: Point, end: Point) -> float:
+        """
+        :param start: the point the car drives from
+        :param end: the point the car drives to
+        :return: the angle at which a car driving from start to end should appear, counter clock wise.
+        """
+        x_diff = end.x - start.x
+        y_diff = start.y - end.y  # y axis is upside down
         if x_diff == 0:
             if y_diff > 0:
                 return 0
@@ -358,5 +384,51 @@ class Car(ICar):
     def car_with_same_path(self) -> ICar:
         return Car(self.__path)
 
+    def snapshot(self) -> Tuple[int, ILane, float, float, float, CarState]:
+        """
+        :return: the simulation state of the car, that Car.restore continues from:
+                 (next road index, current lane, distance in lane, speed, acceleration, state)
+        """
+        return self.__next_road_idx, self.__current_lane, self.__distance, self.__speed, self.__acceleration, \
+            self.__state
+
+    @staticmethod
+    def restore(idx: int, path: List[IRoadSection], max_speed: float, max_speed_change: float, next_road_idx: int,
+                lane: ILane, distance: float, speed: float, acceleration: float, iteration: int) -> Car:
+        """
+        create a car in the middle of its path, from the values of Car.snapshot.
+        the car keeps its id, and is not added to its lane. its state should be set with restore_state once all cars
+        of the snapshot exist, since it may refer to other cars.
+        """
+        res = Car.__new__(Car)
+        res.__max_speed = max_speed
+        res.__max_speed_change = max_speed_change
+        res.__speed = speed
+        res.__acceleration = acceleration
+        res.__state = CarState()
+        res.__path = path
+        res.__next_road_idx = next_road_idx
+        res.__idx = idx
+        res.__current_road = lane.road
+        res.__current_lane = lane
+        res._set_distance(distance)
+        res._iteration = iteration
+        return res
+
+    def restore_state(self, state: CarState):
+        self.__state = state
+
+    @property
+    def path(self) -> List[IRoadSection]:
+        return self.__path
+
+    @property
+    def max_speed(self) -> float:
+        return self.__max_speed
+
+    @property
+    def max_speed_change(self) -> float:
+        return self.__max_speed_change
+
     def is_waiting(self):
         return self.__speed < 0.01
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 
+from server.geometry.point import Point
 from server.simulation_objects.iteration_trackable import IterationTrackable
 
 
@@ -34,11 +35,28 @@ class ICar(ABC, metaclass=IterationTrackable):
         """
         pass
 
+    @abstractmethod
+    def position_after(self, distance: float) -> Point:
+        """
+        predict where the car will be, without changing it.
+        :param distance: a distance to drive along the car's path
+        :return: the position the car would have after driving the distance
+        """
+        pass
+
     @property
     @abstractmethod
     def current_part_in_lane(self):
         pass
 
+    @property
+    @abstractmethod
+    def distance_in_lane(self) -> float:
+        """
+        :return: the distance of the car from the start of its current lane
+        """
+        pass
+
     @abstractmethod
     def has_arrived_destination(self):
         pass
@@ -123,3 +123,17 @@ class ILane(ABC):
     @abstractmethod
     def get_all_cars(self):
         pass
+
+    @abstractmethod
+    def update_car_waiting(self, car: ic.ICar):
+        """
+        called when a car of the lane starts or stops waiting, so the lane can track its waiting cars
+        """
+        pass
+
+    @abstractmethod
+    def clear_cars(self):
+        """
+        remove all cars from the lane, for a new simulation run on the same map
+        """
+        pass
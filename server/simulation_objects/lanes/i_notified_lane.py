@@ -1,5 +1,6 @@
 from __future__ import annotations
 from abc import abstractmethod
+from typing import Dict
 
 import server.simulation_objects.lanes.i_lane as il
 import server.simulation_objects.trafficlights.i_traffic_light as itl
@@ -15,3 +16,48 @@ class INotifiedLane(il.ILane):
     @abstractmethod
     def traffic_light(self, new_traffic_light):
         pass
+
+    @property
+    @abstractmethod
+    def cars_listener(self):
+        """
+        :return: the object that is told about each car that enters the lane (car_entered(car)) and leaves it
+                 (car_left(car)), e.g. the algorithm of the junction of the lane. None if there is no such object
+        """
+        pass
+
+    @cars_listener.setter
+    @abstractmethod
+    def cars_listener(self, listener):
+        pass
+
+    @abstractmethod
+    def waiting_cars_amount(self) -> int:
+        """
+        :return: amount of cars in the lane that are waiting
+        """
+        pass
+
+    @abstractmethod
+    def max_waiting_time(self) -> int:
+        """
+        :return: the iterations of the traffic light since the longest waiting car of the lane started waiting.
+                 0 if no car waits
+        """
+        pass
+
+    @abstractmethod
+    def waiting_since(self) -> Dict:
+        """
+        :return: the waiting cars of the lane, each with the iteration of the traffic light it started waiting at,
+                 from the longest waiting car. the dict should not be changed
+        """
+        pass
+
+    @abstractmethod
+    def restore_waiting(self, waiting_since: Dict):
+        """
+        set the waiting cars of the lane, from the result of waiting_since, e.g. of a snapshot of the simulation.
+        the cars should already be in the lane
+        """
+        pass
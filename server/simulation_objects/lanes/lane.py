@@ -1,10 +1,11 @@
 import copy
-from collections import deque
 from typing import List, Optional, Tuple
 from copy import deepcopy
 
 from server.geometry.line import Line
 from server.geometry.point import Point
+from server.simulation_objects.lanes.lane_cars import LaneCars
+from server.simulation_objects.lanes.lane_geometry import LaneGeometry
 
 import server.simulation_objects.cars.i_car as ic
 import server.simulation_objects.lanes.i_lane as il
@@ -12,10 +13,11 @@ import server.simulation_objects.roadsections.i_road_section as irs
 
 
 class Lane(il.ILane):
-
-    def __init__(self, road: irs.IRoadSection, coordinates: List[Tuple[Point, Point]]):
-        self._cars = deque()
+    def __init__(self, road: irs.IRoadSection, coordinates: List[Tuple[Point, Point]],
+                 geometry: Optional[LaneGeometry] = None):
+        self._cars = LaneCars()
         self.__coordinates = deepcopy(coordinates)
+        self.__geometry: LaneGeometry = geometry if geometry is not None else LaneGeometry(self.__coordinates)
         self._goes_to: List[il.ILane] = list()
         self._comes_from: List[il.ILane] = list()
         self.__road: irs.IRoadSection = road
@@ -38,6 +40,10 @@ class Lane(il.ILane):
     def road(self) -> irs.IRoadSection:
         return self.__road
 
+    @property
+    def geometry(self) -> LaneGeometry:
+        return self.__geometry
+
     @property
     def goes_to_lanes(self):
         return self._goes_to
@@ -61,79 +67,72 @@ class Lane(il.ILane):
         main_line = Line(start_middle, end_middle)
         return main_line
 
-    @staticmethod
-    def _calculate_part_length(start: Tuple[Point, Point], end: Tuple[Point, Point]):
-        """
-        calculate the lengtth of a lane part
-        :param start: the pair of points of the start
-        :param end: the pair of points of the end
-        :return: the length of the part
-        """
-        main_line = Lane.part_as_line(start, end)
-        return main_line.length()
-
     def lane_length(self) -> float:
-        return sum([self._calculate_part_length(c1, c2) for c1, c2 in zip(self.coordinates, self.coordinates[1:])])
+        return self.__geometry.length
 
     def is_going_to_road(self, road: irs.IRoadSection):
         return road in [lane.road for lane in self._goes_to]
 
     def get_car_ahead(self, car: ic.ICar) -> Optional[ic.ICar]:
-        car_index = self._cars.index(car)
-
-        if car_index == 0:
-            return None
-
-        return self._cars[car_index - 1]
+        return self._cars.car_ahead(car)
 
     def cars_amount(self) -> int:
         return len(self._cars)
 
     def add_car(self, car):
         self._cars.append(car)
+        self._cars_changed()
 
     def remove_car(self, car):
         self._cars.remove(car)
+        self._cars_changed()
 
     def cars_from_end(self, distance: float) -> List[ic.ICar]:
         return self.get_cars_between(self.lane_length() - distance, self.lane_length())
 
     def get_cars_between(self, start: float, end: float) -> List[ic.ICar]:
-        res = list()
-
-        for car in reversed(self._cars):
-            position_in_line = self.car_position_in_lane(car)
-
-            if start <= position_in_line <= end:
-                res.append(car)
-
-            elif position_in_line < start:
-                break
-
-        return res
+        # the cars are ordered by their distance, so the cars in range are a slice of the lane's cars
+        first = self._cars.first_index_behind(end, self.car_position_in_lane, inclusive=True)
+        last = self._cars.first_index_behind(start, self.car_position_in_lane)
+        # from the back of the range to its front
+        return [self._cars[i] for i in range(last - 1, first - 1, -1)]
 
     def car_position_in_lane(self, car):
-        current_part = car.current_part_in_lane
-        distance_of_previous_parts = sum(
-            self._calculate_part_length(self.__coordinates[i], self.__coordinates[i + 1]) for i in range(current_part))
-
-        current_part_start = Line(*self.__coordinates[current_part]).middle()
-        distance_in_current_part = Line(current_part_start, car.position).length()
-
-        return distance_of_previous_parts + distance_in_current_part
+        return car.distance_in_lane
 
     def get_all_cars(self):
         return self._cars
 
-    def get_car_before(self, car):
-        position_in_line = self.car_position_in_lane(car)
+    def update_car_waiting(self, car):
+        # a lane without a traffic light does not track its waiting cars
+        pass
 
-        for lane_car in reversed(self._cars):
-            if self.car_position_in_lane(lane_car) < position_in_line:
-                return lane_car
+    def clear_cars(self):
+        self._cars = LaneCars()
+        self._cars_changed()
 
-        return None
+    def get_car_before(self, car):
+        """
+        the cars are found by their distance along the lane, so a car that moves into the lane is placed by its
+        distance with insert_before, and not at the back or the front of the lane.
+        :param car: a car that is getting into the lane
+        :return: the closest car of the lane that is behind the input car. cars at the same distance as the input car
+                 count as ahead of it. None if there is no such car
+        """
+        index = self._cars.first_index_behind(self.car_position_in_lane(car), self.car_position_in_lane)
+        return self._cars[index] if index < len(self._cars) else None
 
     def insert_before(self, car_to_insert, before_car):
-        index_of_before_car = self._cars.index(before_car) if before_car is not None else -1
-        self._cars.insert(index_of_before_car + 1, car_to_insert)
+        """
+        put the car in the lane, right in front of before_car. at the back of the lane if before_car is None.
+        with before_car from get_car_before, the lane stays ordered by the distances of its cars
+        """
+        index = self._cars.index(before_car) if before_car is not None else len(self._cars)
+        self._cars.insert(index, car_to_insert)
+        self._cars_changed()
+
+    def _cars_changed(self):
+        # the map's graph counts the changes of the cars of its lanes, so computations over them can be memoized
+        map_graph = self.__road.map_graph
+        if map_graph is not None:
+            map_graph.occupancy_version += 1
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional
+
+import server.simulation_objects.cars.i_car as ic
+
+
+class LaneCars:
+    """
+    the cars of a lane, ordered from the front of the lane (index 0) to its back.
+    cars never pass each other inside a lane, so the order is also the order of their distances along the lane.
+    each car gets an ordering key when it enters, and the keys are kept sorted next to the cars,
+    so finding a car's index is a binary search instead of a scan of the lane.
+    """
+
+    def __init__(self):
+        self.__cars: List[ic.ICar] = list()
+        self.__keys: List[float] = list()
+        self.__key_of: Dict[ic.ICar, float] = dict()
+
+    def __copy__(self) -> LaneCars:
+        res = LaneCars()
+        res.__cars = list(self.__cars)
+        res.__keys = list(self.__keys)
+        res.__key_of = dict(self.__key_of)
+        return res
+
+    def __len__(self) -> int:
+        return len(self.__cars)
+
+    def __iter__(self) -> Iterator[ic.ICar]:
+        return iter(self.__cars)
+
+    def __reversed__(self) -> Iterator[ic.ICar]:
+        return reversed(self.__cars)
+
+    def __getitem__(self, index: int) -> ic.ICar:
+        return self.__cars[index]
+
+    def __contains__(self, car) -> bool:
+        return car in self.__key_of
+
+    def __repr__(self):
+        return repr(self.__cars)
+
+    def index(self, car: ic.ICar) -> int:
+        """
+        :return: the index of the car, from the front of the lane
+        """
+        return bisect_left(self.__keys, self.__key_of[car])
+
+    def append(self, car: ic.ICar):
+        """
+        add a car to the back of the lane
+        """
+        self.insert(len(self.__cars), car)
+
+    def appendleft(self, car: ic.ICar):
+        """
+        add a car to the front of the lane
+        """
+        self.insert(0, car)
+
+    def insert(self, index: int, car: ic.ICar):
+        """
+        add a car to the lane, so it will be in the input index
+        """
+        if len(self.__keys) == 0:
+            key = 0.0
+        elif index == 0:
+            key = self.__keys[0] - 1
+        elif index >= len(self.__keys):
+            key = self.__keys[-1] + 1
+        else:
+            key = (self.__keys[index - 1] + self.__keys[index]) / 2
+            if not self.__keys[index - 1] < key < self.__keys[index]:
+                # no more room between the neighbours' keys, spread all keys again
+                self.__renumber()
+                key = index - 0.5
+        self.__cars.insert(index, car)
+        self.__keys.insert(index, key)
+        self.__key_of[car] = key
+
+    def remove(self, car: ic.ICar):
+        index = self.index(car)
+        del self.__cars[index]
+        del self.__keys[index]
+        del self.__key_of[car]
+
+    def car_ahead(self, car: ic.ICar) -> Optional[ic.ICar]:
+        index = self.index(car)
+        return self.__cars[index - 1] if index > 0 else None
+
+    def car_behind(self, car: ic.ICar) -> Optional[ic.ICar]:
+        index = self.index(car)
+        return self.__cars[index + 1] if index + 1 < len(self.__cars) else None
+
+    def first_index_behind(self, distance: float, distance_of: Callable[[ic.ICar], float],
+                           inclusive: bool = False) -> int:
+        """
+        binary search by the cars' distances along the lane.
+        :param distance: a distance from the start of the lane
+        :param distance_of: a function that returns the distance of a car from the start of the lane
+        :param inclusive: if True, cars that are exactly at the distance count as behind it
+        :return: the index of the first car (from the front) that is behind the distance.
+                 the amount of cars if there is none.
+        """
+        low, high = 0, len(self.__cars)
+        while low < high:
+            middle = (low + high) // 2
+            middle_distance = distance_of(self.__cars[middle])
+            if middle_distance < distance or (inclusive and middle_distance == distance):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def __renumber(self):
+        self.__keys = [float(i) for i in range(len(self.__cars))]
+        self.__key_of = {car: key for car, key in zip(self.__cars, self.__keys)}
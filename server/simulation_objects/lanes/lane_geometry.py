@@ -0,0 +1,93 @@
+from bisect import bisect_right
+from math import sqrt
+from typing import List, Tuple
+
+from server.geometry.point import Point
+
+
+class LaneGeometry:
+    """
+    an immutable arc-length table of a lane.
+    cars drive on the lines between the middle points of the lane's coordinates pairs, so the lane is a chain of
+    parts, where part i is the line from middle i to middle i+1.
+    the table holds the middle points, the distance of each middle point from the start of the lane,
+    and the unit direction vector of each part, so every distance query is a lookup instead of a calculation.
+    """
+
+    def __init__(self, coordinates: List[Tuple[Point, Point]]):
+        """
+        :param coordinates: the coordinates pairs of the lane
+        """
+        middles = tuple(((p1.x + p2.x) / 2, (p1.y + p2.y) / 2) for p1, p2 in coordinates)
+        cumulative_lengths = [0.0]
+        directions = list()
+        for (x1, y1), (x2, y2) in zip(middles, middles[1:]):
+            part_length = sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+            cumulative_lengths.append(cumulative_lengths[-1] + part_length)
+            directions.append(((x2 - x1) / part_length, (y2 - y1) / part_length) if part_length > 0 else (0.0, 0.0))
+        self.__middles: Tuple[Tuple[float, float], ...] = middles
+        self.__cumulative_lengths: Tuple[float, ...] = tuple(cumulative_lengths)
+        self.__directions: Tuple[Tuple[float, float], ...] = tuple(directions)
+
+    @property
+    def middles(self) -> Tuple[Tuple[float, float], ...]:
+        """
+        :return: the (x,y) middle point of each coordinates pair of the lane
+        """
+        return self.__middles
+
+    @property
+    def cumulative_lengths(self) -> Tuple[float, ...]:
+        """
+        :return: for each middle point, its distance from the start of the lane
+        """
+        return self.__cumulative_lengths
+
+    @property
+    def directions(self) -> Tuple[Tuple[float, float], ...]:
+        """
+        :return: the unit direction vector of each part of the lane
+        """
+        return self.__directions
+
+    @property
+    def length(self) -> float:
+        return self.__cumulative_lengths[-1]
+
+    @property
+    def parts_amount(self) -> int:
+        return len(self.__directions)
+
+    def middle(self, index: int) -> Point:
+        """
+        :param index: index of a coordinates pair of the lane
+        :return: the middle point of the pair
+        """
+        return Point(*self.__middles[index])
+
+    def part_start_distance(self, part: int) -> float:
+        """
+        :return: the distance of the start of the part from the start of the lane
+        """
+        return self.__cumulative_lengths[part]
+
+    def part_length(self, part: int) -> float:
+        return self.__cumulative_lengths[part + 1] - self.__cumulative_lengths[part]
+
+    def part_at(self, distance: float) -> int:
+        """
+        :param distance: distance from the start of the lane
+        :return: the index of the part that the distance is in. the end of the lane is in the last part
+        """
+        return max(0, min(bisect_right(self.__cumulative_lengths, distance) - 1, self.parts_amount - 1))
+
+    def point_at(self, distance: float) -> Point:
+        """
+        :param distance: distance from the start of the lane
+        :return: the point on the lane at that distance
+        """
+        part = self.part_at(distance)
+        x, y = self.__middles[part]
+        dx, dy = self.__directions[part]
+        distance_in_part = distance - self.__cumulative_lengths[part]
+        return Point(x + dx * distance_in_part, y + dy * distance_in_part)
@@ -1,6 +1,7 @@
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from server.geometry.point import Point
+from server.simulation_objects.lanes.lane_geometry import LaneGeometry
 import server.simulation_objects.lanes.i_notified_lane as inlane
 import server.simulation_objects.lanes.lane as lane
 import server.simulation_objects.roadsections.i_road_section as irs
@@ -8,9 +9,14 @@ import server.simulation_objects.trafficlights.i_traffic_light as itl
 
 
 class NotifiedLane(inlane.INotifiedLane, lane.Lane):
-    def __init__(self, road: irs.IRoadSection, coordinates: List[Tuple[Point, Point]]):
-        lane.Lane.__init__(self, road, coordinates)
+    def __init__(self, road: irs.IRoadSection, coordinates: List[Tuple[Point, Point]],
+                 geometry: Optional[LaneGeometry] = None):
+        lane.Lane.__init__(self, road, coordinates, geometry)
         self.__light = None
+        self.__cars_listener = None
+        # the waiting cars of the lane, each with the iteration of the light it started waiting at.
+        # the iterations only grow, so the dict is ordered from the longest waiting car
+        self.__waiting_since: Dict = dict()
 
     @property
     def traffic_light(self) -> itl.ITrafficLight:
@@ -21,3 +27,79 @@ class NotifiedLane(inlane.INotifiedLane, lane.Lane):
         if self.__light is not None:
             raise Exception("traffic light is already set!")
         self.__light = new_traffic_light
+
+    @property
+    def cars_listener(self):
+        return self.__cars_listener
+
+    @cars_listener.setter
+    def cars_listener(self, listener):
+        self.__cars_listener = listener
+
+    def add_car(self, car):
+        lane.Lane.add_car(self, car)
+        self.__car_entered(car)
+
+    def insert_before(self, car_to_insert, before_car):
+        lane.Lane.insert_before(self, car_to_insert, before_car)
+        self.__car_entered(car_to_insert)
+
+    def remove_car(self, car):
+        lane.Lane.remove_car(self, car)
+        self.__car_left(car)
+
+    def clear_cars(self):
+        for car in list(self.get_all_cars()):
+            self.__car_left(car)
+        lane.Lane.clear_cars(self)
+
+    def update_car_waiting(self, car):
+        is_waiting = car.is_waiting()
+        if is_waiting and car not in self.__waiting_since:
+            self.__start_waiting(car, self.__now())
+        elif not is_waiting and car in self.__waiting_since:
+            self.__stop_waiting(car)
+
+    def waiting_cars_amount(self) -> int:
+        return len(self.__waiting_since)
+
+    def max_waiting_time(self) -> int:
+        if len(self.__waiting_since) == 0:
+            return 0
+        return self.__now() - next(iter(self.__waiting_since.values()))
+
+    def waiting_since(self) -> Dict:
+        return self.__waiting_since
+
+    def restore_waiting(self, waiting_since: Dict):
+        for car in list(self.__waiting_since):
+            self.__stop_waiting(car)
+        for car, since in waiting_since.items():
+            self.__start_waiting(car, since)
+
+    def __car_entered(self, car):
+        self.__update_light(1, 0, 0)
+        self.update_car_waiting(car)
+        if self.__cars_listener is not None:
+            self.__cars_listener.car_entered(car)
+
+    def __car_left(self, car):
+        self.__update_light(-1, 0, 0)
+        if car in self.__waiting_since:
+            self.__stop_waiting(car)
+        if self.__cars_listener is not None:
+            self.__cars_listener.car_left(car)
+
+    def __start_waiting(self, car, since: int):
+        self.__waiting_since[car] = since
+        self.__update_light(0, 1, since)
+
+    def __stop_waiting(self, car):
+        self.__update_light(0, -1, -self.__waiting_since.pop(car))
+
+    def __update_light(self, cars_change: int, waiting_change: int, waiting_since_change: int):
+        if self.__light is not None:
+            self.__light.update_counters(cars_change, waiting_change, waiting_since_change)
+
+    def __now(self) -> int:
+        return self.__light.iteration if self.__light is not None else 0
@@ -66,5 +66,21 @@ class IRoadSection(ABC):
         pass
 
     @abstractmethod
-    def goes_to_roads(self):
+    def goes_to_roads(self) -> Tuple[IRoadSection, ...]:
+        """
+        :return: the roads that the road's lanes go to, without duplicates
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def map_graph(self):
+        """
+        :return: the MapGraph of the road's map, or None if the map's movements are not final yet
+        """
+        pass
+
+    @map_graph.setter
+    @abstractmethod
+    def map_graph(self, new_map_graph):
         pass
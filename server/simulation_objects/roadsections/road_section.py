@@ -9,6 +9,7 @@ import server.simulation_objects.lanes.i_lane as il
 import server.simulation_objects.lanes.notified_lane as nlane
 import server.simulation_objects.roadsections.i_road_section as irs
 from server.simulation_objects.lanes.lane import Lane
+from server.simulation_objects.lanes.lane_geometry import LaneGeometry
 
 
 class RoadSection(irs.IRoadSection):
@@ -20,15 +21,29 @@ class RoadSection(irs.IRoadSection):
         self.__number_of_lanes: int = road_data.num_lanes
         self.__max_speed: float = road_data.max_speed
         self.__lanes: List[il.ILane] = self._create_lanes(road_data.num_lanes, notified_lanes_nums)
+        # the movements graph of the whole map, set once by map_creation after all movements were created
+        self.__map_graph = None
+
+    @property
+    def map_graph(self):
+        return self.__map_graph
+
+    @map_graph.setter
+    def map_graph(self, new_map_graph):
+        if self.__map_graph is not None:
+            raise Exception("map graph is already set!")
+        self.__map_graph = new_map_graph
 
     def goes_to_roads(self):
+        if self.__map_graph is not None:
+            return self.__map_graph.next_roads(self)
         roads = list()
         for ll in self.lanes:
             roads += [goes_to_lane.road for goes_to_lane in ll.goes_to_lanes]
         roads_dict = dict()
         for road in roads:
             roads_dict[road._id] = road
-        return list(roads_dict.values())
+        return tuple(roads_dict.values())
 
     @property
     def coordinates(self) -> List[Tuple[Point, Point]]:
@@ -46,14 +61,16 @@ class RoadSection(irs.IRoadSection):
                                coordinates_lines_split[points_pair_index][lane_left_index + 1])
                               for points_pair_index in range(len(self.__coordinates))]
                              for lane_left_index in range(number_of_lanes)]
-        # now, each index in the lanes_coordinates list is a list of coordinates points, as we wanted
+        # now, each index in the lanes_coordinates list is a list of coordinates points, as we wanted.
+        # build the arc-length table of each lane once, all distance queries of the lane use it
+        lanes_geometry = [LaneGeometry(coordinates) for coordinates in lanes_coordinates]
         lanes: List[il.ILane] = list()
         for i in range(number_of_lanes):
             # now check if the lane should have a traffic light, and act accordingly
             if i in notified_lanes_nums:
-                lanes.append(nlane.NotifiedLane(self, lanes_coordinates[i]))
+                lanes.append(nlane.NotifiedLane(self, lanes_coordinates[i], lanes_geometry[i]))
             else:
-                lanes.append(Lane(self, lanes_coordinates[i]))
+                lanes.append(Lane(self, lanes_coordinates[i], lanes_geometry[i]))
         return lanes
 
     def get_lane(self, index: int) -> il.ILane:
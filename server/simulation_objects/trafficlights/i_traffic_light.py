@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from typing import Tuple
 
 from server.geometry.point import Point
+from server.simulation_objects.iteration_trackable import IterationTrackable
 
 
-class ITrafficLight(ABC):
+class ITrafficLight(ABC, metaclass=IterationTrackable):
 
     @abstractmethod
     def change_light(self, turn_to_green) -> None:
@@ -47,6 +49,70 @@ class ITrafficLight(ABC):
     def all_cars(self):
         pass
 
+    @property
+    @abstractmethod
+    def cars_amount(self) -> int:
+        """
+        :return: amount of cars in the lanes of the light
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def waiting_cars_amount(self) -> int:
+        """
+        :return: amount of waiting cars in the lanes of the light
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def total_waiting_time(self) -> int:
+        """
+        :return: the sum of the iterations that each waiting car in the lanes of the light has been waiting
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def max_waiting_time(self) -> int:
+        """
+        :return: the iterations that the longest waiting car in the lanes of the light has been waiting
+        """
+        pass
+
+    @abstractmethod
+    def update_counters(self, cars_change: int, waiting_change: int, waiting_since_change: int):
+        """
+        called by the lanes of the light when their cars change
+        :param cars_change: the change of the amount of cars
+        :param waiting_change: the change of the amount of waiting cars
+        :param waiting_since_change: the change of the sum of the iterations that the waiting cars started waiting at
+        """
+        pass
+
     @abstractmethod
     def reset_time(self):
         pass
+
+    @abstractmethod
+    def reset_state(self):
+        """
+        turn the light back to its initial state (red, with no light time), for a new simulation run on the same map
+        """
+        pass
+
+    @abstractmethod
+    def get_state(self) -> Tuple[bool, int]:
+        """
+        :return: the simulation state of the light, (can pass, light time)
+        """
+        pass
+
+    @abstractmethod
+    def set_state(self, can_pass: bool, light_time: int, iteration: int):
+        """
+        continue from a state of get_state, e.g. of a snapshot of the simulation
+        :param iteration: the iteration of the simulation that the light continues from
+        """
+        pass
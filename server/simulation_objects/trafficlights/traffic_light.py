@@ -1,5 +1,6 @@
 from copy import deepcopy
-from typing import List
+from itertools import chain
+from typing import List, Tuple
 
 import server.simulation_objects.lanes.i_notified_lane as nlane
 import server.simulation_objects.trafficlights.i_traffic_light as itl
@@ -17,6 +18,10 @@ class TrafficLight(itl.ITrafficLight):
         self.__can_pass = False
         self.__coming_from_lanes = lanes
         self.__light_time = 0
+        # the counters of the cars in the lanes, that the lanes update
+        self.__cars_amount = 0
+        self.__waiting_cars_amount = 0
+        self.__waiting_since_sum = 0
         # set the lanes to have this traffic light
         for lane in lanes:
             lane.traffic_light = self
@@ -43,7 +48,42 @@ class TrafficLight(itl.ITrafficLight):
 
     @property
     def all_cars(self):
-        return sum([[car for car in lane.get_all_cars()] for lane in self.lanes], [])
+        return list(chain.from_iterable(lane.get_all_cars() for lane in self.lanes))
+
+    @property
+    def cars_amount(self) -> int:
+        return self.__cars_amount
+
+    @property
+    def waiting_cars_amount(self) -> int:
+        return self.__waiting_cars_amount
+
+    @property
+    def total_waiting_time(self) -> int:
+        # the waiting times are counted in the iterations of the light
+        return self.__waiting_cars_amount * self.iteration - self.__waiting_since_sum
+
+    @property
+    def max_waiting_time(self) -> int:
+        return max(lane.max_waiting_time() for lane in self.lanes)
+
+    def update_counters(self, cars_change: int, waiting_change: int, waiting_since_change: int):
+        self.__cars_amount += cars_change
+        self.__waiting_cars_amount += waiting_change
+        self.__waiting_since_sum += waiting_since_change
 
     def reset_time(self):
         self.__light_time = 0
+
+    def reset_state(self):
+        self.__can_pass = False
+        self.__light_time = 0
+        self._iteration = 0
+
+    def get_state(self) -> Tuple[bool, int]:
+        return self.__can_pass, self.__light_time
+
+    def set_state(self, can_pass: bool, light_time: int, iteration: int):
+        self.__can_pass = can_pass
+        self.__light_time = light_time
+        self._iteration = iteration
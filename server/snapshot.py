@@ -0,0 +1,217 @@
+import pickle
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from algorithms.tl_manager import TLManager
+from server.map_graph import map_graph_of
+from server.simulation_objects.cars.active_cars import ActiveCars
+from server.simulation_objects.cars.car import Car
+from server.simulation_objects.cars.car_state import CarState
+from server.simulation_objects.lanes.i_notified_lane import INotifiedLane
+from server.simulation_objects.roadsections.i_road_section import IRoadSection
+from server.simulation_objects.trafficlights.i_traffic_light import ITrafficLight
+
+# the snapshot of a simulation in the middle of its run: the cars, the order of the cars in each lane, the lights and
+# the algorithms' own state, by the indices of the map graph instead of by the map objects.
+# restoring it on a clean map of the same map file continues the run exactly where it was taken, so a scenario can
+# be warmed up once and all algorithms can be run from the same mid-run state.
+
+# the letting_car_in of a car, that refers to no car
+NO_CAR = -1
+# the letting_car_in of a car, that refers to a car that already left the map
+ARRIVED_CAR = -2
+
+
+class _ArrivedCar:
+    """
+    stands for a car that left the map in a restored car state. no car of the lanes is equal to it, like the car it
+    stands for
+    """
+    pass
+
+
+@dataclass
+class SimulationSnapshot:
+    """
+    the cars are indexed by their order in the active cars, and their paths are in CSR form:
+    the roads of car i are path_roads[paths_indptr[i]:paths_indptr[i+1]].
+    the cars of lane i are cars lane_cars[lane_cars_indptr[i]:lane_cars_indptr[i+1]], from the front of the lane,
+    and its waiting cars are waiting_cars in the same ranges of waiting_indptr, from the longest waiting car, with the
+    iterations they have been waiting in waiting_times.
+    the lights are by the order of the traffic lights list.
+    """
+    iteration: int
+    # the cars
+    car_ids: np.ndarray
+    car_iterations: np.ndarray
+    max_speeds: np.ndarray
+    max_speed_changes: np.ndarray
+    paths_indptr: np.ndarray
+    path_roads: np.ndarray
+    next_road_indices: np.ndarray
+    car_lanes: np.ndarray
+    distances: np.ndarray
+    speeds: np.ndarray
+    accelerations: np.ndarray
+    stopping: np.ndarray
+    moving_lanes: np.ndarray
+    letting_cars_in: np.ndarray
+    # the lanes
+    lane_cars_indptr: np.ndarray
+    lane_cars: np.ndarray
+    waiting_indptr: np.ndarray
+    waiting_cars: np.ndarray
+    waiting_times: np.ndarray
+    # the traffic lights
+    lights_can_pass: np.ndarray
+    lights_time: np.ndarray
+    # the class name and get_state of each algorithm, by the order of the algorithms list
+    algos_states: List[Tuple[str, dict]]
+
+    @property
+    def cars_amount(self) -> int:
+        return len(self.car_ids)
+
+    def save_to_file(self, path: str):
+        with open(path, "wb") as file:
+            pickle.dump(self, file)
+
+    @staticmethod
+    def load_from_file(path: str):
+        with open(path, "rb") as file:
+            return pickle.load(file)
+
+
+def take_snapshot(roads: List[IRoadSection], traffic_lights: List[ITrafficLight], cars: ActiveCars,
+                  light_algos: Optional[List[TLManager]] = None, iteration: Optional[int] = None) \
+        -> SimulationSnapshot:
+    """
+    :param roads, traffic_lights: the map of the simulation
+    :param cars: the active cars of the simulation, between iterations
+    :param light_algos: the algorithms of the simulation, or None to keep only the lights
+    :param iteration: the amount of iterations that were run, None for the ticks of the lights
+    :return: the snapshot of the simulation
+    """
+    if not isinstance(cars, ActiveCars):
+        raise Exception("only the cars of an ActiveCars can be snapshot")
+    map_graph = map_graph_of(roads)
+    cars_list: List[Car] = list(cars)
+    car_index = {car: i for i, car in enumerate(cars_list)}
+    snapshots = [car.snapshot() for car in cars_list]
+    paths_indptr = np.zeros(len(cars_list) + 1, dtype=np.int64)
+    np.cumsum([len(car.path) for car in cars_list], out=paths_indptr[1:])
+    states: List[CarState] = [state for *_, state in snapshots]
+
+    lanes_cars = [[car_index[car] for car in lane.get_all_cars()] for lane in map_graph.lanes]
+    lanes_waiting = [[(car, lane.traffic_light.iteration - since) for car, since in lane.waiting_since().items()]
+                     if isinstance(lane, INotifiedLane) else list() for lane in map_graph.lanes]
+    lights_states = [light.get_state() for light in traffic_lights]
+    if iteration is None:
+        iteration = max((light.iteration for light in traffic_lights), default=0)
+
+    return SimulationSnapshot(
+        iteration=iteration,
+        car_ids=np.fromiter((car.get_id() for car in cars_list), dtype=np.int64, count=len(cars_list)),
+        car_iterations=np.fromiter((car.iteration for car in cars_list), dtype=np.int64, count=len(cars_list)),
+        max_speeds=np.array([car.max_speed for car in cars_list], dtype=float),
+        max_speed_changes=np.array([car.max_speed_change for car in cars_list], dtype=float),
+        paths_indptr=paths_indptr,
+        path_roads=np.fromiter((map_graph.road_index(road) for car in cars_list for road in car.path),
+                               dtype=np.int64, count=paths_indptr[-1]),
+        next_road_indices=np.array([snapshot[0] for snapshot in snapshots], dtype=np.int64),
+        car_lanes=np.array([map_graph.lane_index(snapshot[1]) for snapshot in snapshots], dtype=np.int64),
+        distances=np.array([snapshot[2] for snapshot in snapshots], dtype=float),
+        speeds=np.array([snapshot[3] for snapshot in snapshots], dtype=float),
+        accelerations=np.array([snapshot[4] for snapshot in snapshots], dtype=float),
+        stopping=np.array([state.stopping for state in states], dtype=bool),
+        moving_lanes=np.array([map_graph.lane_index(state.moving_lane) if state.moving_lane is not None else NO_CAR
+                               for state in states], dtype=np.int64),
+        letting_cars_in=np.array([__car_reference(state.letting_car_in, car_index) for state in states],
+                                 dtype=np.int64),
+        lane_cars_indptr=__indptr(lanes_cars),
+        lane_cars=np.array([i for lane_cars in lanes_cars for i in lane_cars], dtype=np.int64),
+        waiting_indptr=__indptr(lanes_waiting),
+        waiting_cars=np.array([car_index[car] for waiting in lanes_waiting for car, _ in waiting], dtype=np.int64),
+        waiting_times=np.array([time for waiting in lanes_waiting for _, time in waiting], dtype=np.int64),
+        lights_can_pass=np.array([state[0] for state in lights_states], dtype=bool),
+        lights_time=np.array([state[1] for state in lights_states], dtype=np.int64),
+        algos_states=[(algo.__class__.__name__, algo.get_state()) for algo in light_algos or ()],
+    )
+
+
+def restore_snapshot(snapshot: SimulationSnapshot, roads: List[IRoadSection], traffic_lights: List[ITrafficLight],
+                     light_algos: Optional[List[TLManager]] = None) -> ActiveCars:
+    """
+    continue a simulation from the snapshot, on a clean map (e.g. from maps_cache or reset_map_state) of the map that
+    the snapshot was taken on. the restored cars are new objects with the ids of the snapshot's cars.
+    :param light_algos: the algorithms to continue with, created on the clean map. an algorithm of the same class
+                        as the snapshot's algorithm in its place continues from its state, any other algorithm
+                        takes over the lights as they are
+    :return: the active cars of the simulation, in the order they were in when the snapshot was taken
+    """
+    map_graph = map_graph_of(roads)
+    if len(map_graph.lanes) + 1 != len(snapshot.lane_cars_indptr) or \
+            len(traffic_lights) != len(snapshot.lights_can_pass):
+        raise Exception("the snapshot was taken on another map")
+    lanes = map_graph.lanes
+    paths_indptr = snapshot.paths_indptr.tolist()
+    path_roads = [roads[i] for i in snapshot.path_roads.tolist()]
+    cars = [Car.restore(idx, path_roads[paths_indptr[i]:paths_indptr[i + 1]], max_speed, max_speed_change,
+                        next_road_idx, lanes[lane], distance, speed, acceleration, iteration)
+            for i, (idx, max_speed, max_speed_change, next_road_idx, lane, distance, speed, acceleration, iteration)
+            in enumerate(zip(snapshot.car_ids.tolist(), snapshot.max_speeds.tolist(),
+                             snapshot.max_speed_changes.tolist(), snapshot.next_road_indices.tolist(),
+                             snapshot.car_lanes.tolist(), snapshot.distances.tolist(), snapshot.speeds.tolist(),
+                             snapshot.accelerations.tolist(), snapshot.car_iterations.tolist()))]
+    # the states refer to other cars, so they are set once all cars exist
+    arrived_car = _ArrivedCar()
+    for car, stopping, moving_lane, letting_car_in in zip(cars, snapshot.stopping.tolist(),
+                                                          snapshot.moving_lanes.tolist(),
+                                                          snapshot.letting_cars_in.tolist()):
+        car.restore_state(CarState(moving_lane=lanes[moving_lane] if moving_lane != NO_CAR else None,
+                                   stopping=stopping,
+                                   letting_car_in=cars[letting_car_in] if letting_car_in >= 0 else
+                                   (arrived_car if letting_car_in == ARRIVED_CAR else None)))
+
+    lane_cars_indptr, lane_cars = snapshot.lane_cars_indptr.tolist(), snapshot.lane_cars.tolist()
+    for i, lane in enumerate(lanes):
+        lane.clear_cars()
+        for car in lane_cars[lane_cars_indptr[i]:lane_cars_indptr[i + 1]]:
+            lane.add_car(cars[car])
+
+    cars_by_id: Dict[int, Car] = {car.get_id(): car for car in cars}
+    matching_algos = list()
+    for i, algo in enumerate(light_algos or ()):
+        if i < len(snapshot.algos_states) and snapshot.algos_states[i][0] == algo.__class__.__name__:
+            # the state is set before the lights, since an algorithm may create its inner algorithms again
+            algo.set_state(snapshot.algos_states[i][1], cars_by_id)
+            matching_algos.append(algo)
+    for light, can_pass, light_time in zip(traffic_lights, snapshot.lights_can_pass.tolist(),
+                                           snapshot.lights_time.tolist()):
+        light.set_state(can_pass, light_time, snapshot.iteration)
+    # the waiting cars started waiting by the iterations of the lights
+    waiting_indptr, waiting_cars = snapshot.waiting_indptr.tolist(), snapshot.waiting_cars.tolist()
+    waiting_times = snapshot.waiting_times.tolist()
+    for i, lane in enumerate(lanes):
+        if isinstance(lane, INotifiedLane):
+            lane.restore_waiting({cars[car]: snapshot.iteration - time for car, time in
+                                  zip(waiting_cars[waiting_indptr[i]:waiting_indptr[i + 1]],
+                                      waiting_times[waiting_indptr[i]:waiting_indptr[i + 1]])})
+    for algo in light_algos or ():
+        if not any(algo is matching for matching in matching_algos):
+            algo.follow_lights()
+    return ActiveCars(cars)
+
+
+def __car_reference(car, car_index: Dict) -> int:
+    if car is None:
+        return NO_CAR
+    return car_index.get(car, ARRIVED_CAR)
+
+
+def __indptr(rows: List[list]) -> np.ndarray:
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    return indptr
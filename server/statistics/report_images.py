@@ -0,0 +1,119 @@
+from concurrent.futures import Executor, Future
+from io import BytesIO
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from matplotlib.figure import Figure
+from PIL import Image
+
+# the graphs of a simulation report, by the names of their images
+TOTAL_WAITING = "total_waiting"
+CARS_WAITING = "cars_waiting"
+TOTAL_DEC = "total_dec"
+CARS_DEC = "cars_dec"
+
+
+def render_images(iterations: np.ndarray, waiting_cars: np.ndarray, total_waiting_time: np.ndarray,
+                  dec_cars: np.ndarray, total_dec_time: np.ndarray) -> Dict[str, bytes]:
+    """
+    draw the graphs of a report, from the values of each iteration.
+    each graph is drawn on its own Figure instead of the global pyplot figure, so graphs can be drawn in background
+    threads and processes.
+    :return: the png file of each graph, by its name
+    """
+    return {
+        TOTAL_WAITING: __render('plot', iterations, total_waiting_time, 'Iterations', 'Aggregated Waiting Time',
+                                'Aggregated waiting time of the entire simulation\nin each iteration'),
+        CARS_WAITING: __render('scatter', iterations, waiting_cars, 'Iteration', 'Waiting Cars',
+                               'Total Waiting cars in the entire simulation\nin each iteration'),
+        TOTAL_DEC: __render('plot', iterations, total_dec_time, 'Iterations', 'Aggregated Dec Time',
+                            'Aggregated deceleration time of the\n entire simulation in each iteration'),
+        CARS_DEC: __render('scatter', iterations, dec_cars, 'Iteration', 'Dec Cars',
+                           'Total deceleration cars in the\nentire simulation in each iteration'),
+    }
+
+
+def __render(kind: str, x: np.ndarray, y: np.ndarray, x_label: str, y_label: str, title: str) -> bytes:
+    figure = Figure()
+    axes = figure.add_subplot(111)
+    getattr(axes, kind)(x, y)
+    axes.set_xlabel(x_label)
+    axes.set_ylabel(y_label)
+    axes.set_title(title)
+    image_mem = BytesIO()
+    figure.savefig(image_mem, format='png')
+    return image_mem.getvalue()
+
+
+class ReportImages:
+    """
+    the graphs of a simulation report, drawn only when one of them is first used.
+    the graphs can also be drawn ahead in an executor, e.g. a process pool that draws the reports of many runs.
+    """
+
+    def __init__(self, iterations: np.ndarray, waiting_cars: np.ndarray, total_waiting_time: np.ndarray,
+                 dec_cars: np.ndarray, total_dec_time: np.ndarray):
+        """
+        :params: the values of each iteration, like render_images
+        """
+        self.__columns = (iterations, waiting_cars, total_waiting_time, dec_cars, total_dec_time)
+        self.__pngs: Optional[Dict[str, bytes]] = None
+        self.__future: Optional[Future] = None
+        self.__images: Dict[str, Image.Image] = dict()
+
+    @property
+    def is_rendered(self) -> bool:
+        return self.__pngs is not None
+
+    def render(self):
+        """
+        draw the graphs now, or wait for the executor that draws them
+        """
+        if self.__pngs is not None:
+            return
+        self.__pngs = self.__future.result() if self.__future is not None else render_images(*self.__columns)
+        self.__future = None
+
+    def render_in(self, executor: Executor):
+        """
+        start drawing the graphs in the executor. using a graph before they are done waits for them
+        """
+        if self.__pngs is None and self.__future is None:
+            self.__future = executor.submit(render_images, *self.__columns)
+
+    def image(self, name: str) -> Image.Image:
+        if name not in self.__images:
+            self.render()
+            self.__images[name] = Image.open(BytesIO(self.__pngs[name]))
+        return self.__images[name]
+
+    def png(self, name: str) -> bytes:
+        """
+        :return: the png file of the graph
+        """
+        self.render()
+        return self.__pngs[name]
+
+    @property
+    def total_waiting_image(self) -> Image.Image:
+        return self.image(TOTAL_WAITING)
+
+    @property
+    def cars_waiting_image(self) -> Image.Image:
+        return self.image(CARS_WAITING)
+
+    @property
+    def total_dec_image(self) -> Image.Image:
+        return self.image(TOTAL_DEC)
+
+    @property
+    def cars_dec_image(self) -> Image.Image:
+        return self.image(CARS_DEC)
+
+
+def render_in_background(reports_images: Iterable[ReportImages], executor: Executor):
+    """
+    start drawing the graphs of many reports in the executor, e.g. a ProcessPoolExecutor
+    """
+    for report_images in reports_images:
+        report_images.render_in(executor)
@@ -1,11 +1,13 @@
 import os
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 from PIL.Image import Image
-from pandas import DataFrame
+
+from server.statistics.report_images import CARS_DEC, CARS_WAITING, TOTAL_DEC, TOTAL_WAITING, ReportImages
 
 FILE_NAME_FORMAT = "%d_%m_%Y__%H_%M_%S"
 DIR_PATH = "server/statistics/results"
@@ -21,19 +23,37 @@ class ReportSimulationData:
     median_car_waiting: float
     var_car_waiting: float
     car_num: int
-    total_waiting_image: Image
-    cars_waiting_image: Image
     avg_car_dec: float
     median_car_dec: float
     var_car_dec: float
-    total_dec_image: Image
-    cars_dec_image: Image
+    # the graphs, drawn when they are first used
+    images: ReportImages
     waiting_per_car_avg: float
     waiting_per_car_median: float
     waiting_per_car_variance: float
     inner_path = "/simulation"
 
-    def save_to_file(self) -> Optional[str]:
+    @property
+    def total_waiting_image(self) -> Image:
+        return self.images.total_waiting_image
+
+    @property
+    def cars_waiting_image(self) -> Image:
+        return self.images.cars_waiting_image
+
+    @property
+    def total_dec_image(self) -> Image:
+        return self.images.total_dec_image
+
+    @property
+    def cars_dec_image(self) -> Image:
+        return self.images.cars_dec_image
+
+    def save_to_file(self, dir_path: str = DIR_PATH) -> Optional[str]:
+        """
+        :param dir_path: the results directory, that the results are written into a new directory of
+        :return: the directory of the results
+        """
         data = {
             "Algorithm Name": self.algo_name,
             "Number of Iteration": self.iteration_number,
@@ -51,21 +71,25 @@ class ReportSimulationData:
             "Variance Waiting Per Car": self.waiting_per_car_variance
         }
         df = pd.DataFrame(data, index=[0])
-        create_required_dirs(self.inner_path)
+        create_required_dirs(self.inner_path, dir_path)
         now = datetime.now()
         dt_string = now.strftime(FILE_NAME_FORMAT)
-        total_path = DIR_PATH + self.inner_path + "/" + dt_string
+        total_path = dir_path + self.inner_path + "/" + dt_string
         os.mkdir(total_path)
         df.to_csv(total_path + "/" + "data.csv", index=False)
-        self.total_dec_image.save(total_path + "/" + "Total Deceleration.png")
-        self.total_waiting_image.save(total_path + "/" + "Total Waiting.png")
-        self.cars_dec_image.save(total_path + "/" + "Cars Deceleration.png")
-        self.cars_waiting_image.save(total_path + "/" + "Cars Waiting.png")
+        # the graphs are already png files, they are written as they are
+        for name, file_name in ((TOTAL_DEC, "Total Deceleration.png"), (TOTAL_WAITING, "Total Waiting.png"),
+                                (CARS_DEC, "Cars Deceleration.png"), (CARS_WAITING, "Cars Waiting.png")):
+            with open(total_path + "/" + file_name, "wb") as file:
+                file.write(self.images.png(name))
         return total_path
 
 
 @dataclass
 class ReportComparisonData:
+    """
+    the *_df fields are the columns of the values of each iteration, as arrays by the column names
+    """
     iteration_number: int
     total_waiting_time: int
     total_dec_time: int
@@ -73,13 +97,13 @@ class ReportComparisonData:
     median_car_waiting: float
     var_car_waiting: float
     car_num: int
-    total_waiting_df: DataFrame
-    cars_waiting_df: DataFrame
+    total_waiting_df: Dict[str, np.ndarray]
+    cars_waiting_df: Dict[str, np.ndarray]
     avg_car_dec: float
     median_car_dec: float
     var_car_dec: float
-    total_dec_df: DataFrame
-    cars_dec_df: DataFrame
+    total_dec_df: Dict[str, np.ndarray]
+    cars_dec_df: Dict[str, np.ndarray]
     waiting_per_car_avg: float
     waiting_per_car_median: float
     waiting_per_car_variance: float
@@ -105,7 +129,11 @@ class ComparisonListData:
     waiting_per_car_variance: List[float]
     inner_path = "/comparison"
 
-    def save_to_file(self) -> Optional[str]:
+    def save_to_file(self, dir_path: str = DIR_PATH) -> Optional[str]:
+        """
+        :param dir_path: the results directory, that the results are written into a new directory of
+        :return: the directory of the results
+        """
         data = {"Algorithm Names": self.algo_names, "Number of Iterations": self.iteration_number,
                 "Total Waiting Time": self.total_waiting_time, "Total Deceleration Time": self.total_dec_time,
                 "Average Cars Waiting Per Iteration": self.avg_car_waiting,
@@ -117,10 +145,10 @@ class ComparisonListData:
                 "Median Waiting Per Car": self.waiting_per_car_median,
                 "Variance Waiting Per Car": self.waiting_per_car_variance}
         df = pd.DataFrame(data, index=list(range(len(self.algo_names))))
-        create_required_dirs(self.inner_path)
+        create_required_dirs(self.inner_path, dir_path)
         now = datetime.now()
         dt_string = now.strftime(FILE_NAME_FORMAT)
-        total_path = DIR_PATH + self.inner_path + "/" + dt_string
+        total_path = dir_path + self.inner_path + "/" + dt_string
         os.mkdir(total_path)
         df.to_csv(total_path + "/" + "data.csv", index=False)
         self.total_dec_image.save(total_path + "/" + "Total Deceleration.png")
@@ -128,14 +156,14 @@ class ComparisonListData:
         return total_path
 
 
-def create_required_dirs(inner_path):
+def create_required_dirs(inner_path, dir_path=DIR_PATH):
     try:
-        dirs = os.listdir(DIR_PATH)
+        dirs = os.listdir(dir_path)
     except FileNotFoundError:
         # no "generated" dir. create it
-        os.mkdir(DIR_PATH)
+        os.mkdir(dir_path)
     try:
-        dirs = os.listdir(DIR_PATH + inner_path)
+        dirs = os.listdir(dir_path + inner_path)
     except FileNotFoundError:
         # no "generated" dir. create it
-        os.mkdir(DIR_PATH + inner_path)
+        os.mkdir(dir_path + inner_path)
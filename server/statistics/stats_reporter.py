@@ -1,156 +1,207 @@
-from copy import copy
-from io import BytesIO
+from copy import copy, deepcopy
 
-import matplotlib.pyplot as plt
-import pandas as pd
 import numpy as np
 
-from PIL import Image
-
+from server.statistics.report_images import ReportImages
 from server.statistics.runs_data import ReportComparisonData, ReportSimulationData
+from server.statistics.streaming_stats import StreamSummary
+from server.statistics.tick_recorder import TickRecorder
+from server.vectorized_engine import VectorizedCars
 
 MAGIC_ITER_NUMBER = 10
+# the columns of the values of each iteration
+ITERATION = 'Iteration'
+WAITING_CARS = 'Waiting Cars'
+TOTAL_WAITING_TIME = 'Total Waiting Time'
+DEC_CARS = 'Dec Cars'
+TOTAL_DEC_TIME = 'Total Dec Time'
+# a car counts for the total waiting time below STOPPED_SPEED, and for its own waiting time below WAITING_SPEED,
+# like ICar.is_waiting
+STOPPED_SPEED = 0.0001
+WAITING_SPEED = 0.01
 
 
 class StatsReporter:
-    def __init__(self, cars, algo_name, file_name='server/statistics/stats/try.xls'):
+    def __init__(self, cars, algo_name, file_name='server/statistics/stats/try.xls', spill_path=None):
+        """
+        :param spill_path: a csv file to write the values of the iterations to while the simulation runs.
+                           None to write them to a temporary file only once the run is long
+        """
         self.algo_name = algo_name
         self.file_name = file_name
         self.cars = copy(cars)
         self.car_num = len(cars)
-        self.sum_waiting_data = {'Iterations': [], 'Total Waiting Time': []}
-        self.waiting_data = {'Iteration': [], 'Waiting Cars': []}
-        self.sum_dec_data = {'Iterations': [], 'Total Dec Time': []}
-        self.dec_data = {'Iteration': [], 'Dec Cars': []}
+        self.iters_data = TickRecorder([ITERATION, WAITING_CARS, TOTAL_WAITING_TIME, DEC_CARS, TOTAL_DEC_TIME],
+                                       spill_path=spill_path)
         self.curr_iter = 0
         self.total_waiting_time = 0
         self.total_dec_time = 0
-        self.cars_waiting_time = {car.get_id(): 0 for car in cars}
+        # the running stats of the waiting and decelerating cars of each iteration, and of the waiting time of
+        # the cars that arrived. they answer at any iteration without the history of the run
+        self.waiting_cars_stats = StreamSummary()
+        self.dec_cars_stats = StreamSummary()
+        self.arrived_waiting_stats = StreamSummary()
+        # the waiting iterations of each car that did not arrive yet, by the car's index in __cars_ids.
+        # the ids are looked up in bulk, with __sorted_ids and __sorted_index.
+        # arrived cars are only marked in __arrived, and removed once they are half of the cars
+        self.__cars_ids = np.zeros(0, dtype=np.int64)
+        self.__cars_waiting = np.zeros(0, dtype=np.int64)
+        self.__arrived = np.zeros(0, dtype=bool)
+        self.__arrived_amount = 0
+        self.__sorted_ids = self.__cars_ids
+        self.__sorted_index = np.zeros(0, dtype=np.int64)
+        self.add_cars([car.get_id() for car in cars])
+
+    @property
+    def cars_waiting_time(self):
+        """
+        :return: the amount of iterations that each car that did not arrive yet waited, by the car's id
+        """
+        driving = ~self.__arrived
+        return dict(zip(self.__cars_ids[driving].tolist(), self.__cars_waiting[driving].tolist()))
+
+    def add_cars(self, ids):
+        """
+        count the waiting time of more cars, from now on
+        """
+        if len(ids) == 0:
+            return
+        self.__cars_ids = np.concatenate([self.__cars_ids, np.asarray(ids, dtype=np.int64)])
+        self.__cars_waiting = np.concatenate([self.__cars_waiting, np.zeros(len(ids), dtype=np.int64)])
+        self.__arrived = np.concatenate([self.__arrived, np.zeros(len(ids), dtype=bool)])
+        self.__index_cars()
+
+    def cars_arrived(self, ids):
+        """
+        move the waiting time of the cars that arrived into the running stats
+        """
+        if len(ids) == 0:
+            return
+        arrived = self.__cars_index(np.asarray(ids, dtype=np.int64))
+        self.arrived_waiting_stats.add_many(self.__cars_waiting[arrived])
+        self.__arrived[arrived] = True
+        self.__arrived_amount += len(arrived)
+        if 2 * self.__arrived_amount > len(self.__cars_ids):
+            driving = ~self.__arrived
+            self.__cars_ids = self.__cars_ids[driving]
+            self.__cars_waiting = self.__cars_waiting[driving]
+            self.__arrived = self.__arrived[driving]
+            self.__arrived_amount = 0
+            self.__index_cars()
+
+    def __index_cars(self):
+        self.__sorted_index = np.argsort(self.__cars_ids, kind="stable")
+        self.__sorted_ids = self.__cars_ids[self.__sorted_index]
+
+    def __cars_index(self, ids: np.ndarray) -> np.ndarray:
+        return self.__sorted_index[np.searchsorted(self.__sorted_ids, ids)]
 
     def next_iter(self, cars):
+        # cars that entered while the simulation runs (with a demand) are counted from their first iteration
+        entered = getattr(cars, 'last_entered', ())
+        if len(entered) > 0:
+            self.add_cars([car.get_id() for car in entered])
+            self.car_num += len(entered)
+        self.next_iter_arrays(*cars_state(cars))
+        # containers that track arrivals (ActiveCars, VectorizedCars) give the cars that arrived in this iteration
+        self.cars_arrived([car.get_id() for car in getattr(cars, 'last_arrived', ())])
+
+    def next_iter_arrays(self, ids: np.ndarray, speeds: np.ndarray, accelerations: np.ndarray):
+        """
+        count the next iteration from the state of all cars at once
+        :param ids, speeds, accelerations: the id, speed and acceleration of each car, by the same order
+        """
         self.curr_iter += 1
-        waiting_curr = 0
-        dec_curr = 0
-        for car in cars:
-            if car.get_speed() < 0.0001:
-                self.total_waiting_time += 1
-                waiting_curr += 1
-            if car.get_acceleration() < 0:
-                self.total_dec_time += 1
-                dec_curr += 1
-            if car.is_waiting():
-                self.cars_waiting_time[car.get_id()] += 1
-        self.waiting_data['Iteration'] += [self.curr_iter]
-        self.waiting_data['Waiting Cars'] += [waiting_curr]
-        self.sum_waiting_data['Iterations'] += [self.curr_iter]
-        self.sum_waiting_data['Total Waiting Time'] += [self.total_waiting_time]
-        self.dec_data['Iteration'] += [self.curr_iter]
-        self.dec_data['Dec Cars'] += [dec_curr]
-        self.sum_dec_data['Iterations'] += [self.curr_iter]
-        self.sum_dec_data['Total Dec Time'] += [self.total_dec_time]
+        waiting_curr = int(np.count_nonzero(speeds < STOPPED_SPEED))
+        dec_curr = int(np.count_nonzero(accelerations < 0))
+        self.total_waiting_time += waiting_curr
+        self.total_dec_time += dec_curr
+        self.waiting_cars_stats.add(waiting_curr)
+        self.dec_cars_stats.add(dec_curr)
+        waiting_ids = ids[speeds < WAITING_SPEED]
+        if len(waiting_ids) > 0:
+            # the ids are of different cars, so each car is counted once
+            self.__cars_waiting[self.__cars_index(waiting_ids)] += 1
+        self.iters_data.append(self.curr_iter, waiting_curr, self.total_waiting_time, dec_curr, self.total_dec_time)
+
+    def running_summary(self):
+        """
+        :return: the stats of the run so far, of the waiting and decelerating cars of each iteration and of the
+                 waiting time of the cars that arrived: count, mean, variance and the median, p95 and p99
+        """
+        return {'waiting_cars': self.waiting_cars_stats.to_dict(ddof=1),
+                'dec_cars': self.dec_cars_stats.to_dict(ddof=1),
+                'waiting_per_car': self.arrived_waiting_stats.to_dict()}
 
     def report_compare(self):
         # Waiting data
-        sum_waiting_df = pd.DataFrame(self.sum_waiting_data)
-        sum_waiting_df.reset_index(drop=True, inplace=True)
-        waiting_df = pd.DataFrame(self.waiting_data)
-        waiting_df.reset_index(drop=True, inplace=True)
-        avg_car_waiting = waiting_df['Waiting Cars'].mean()
-        median_car_waiting = waiting_df['Waiting Cars'].median()
-        var_car_waiting = waiting_df['Waiting Cars'].var()
-
+        avg_car_waiting, median_car_waiting, var_car_waiting = self.__iters_summary(self.waiting_cars_stats)
         # Deceleration data
-        sum_dec_df = pd.DataFrame(self.sum_dec_data)
-        sum_dec_df.reset_index(drop=True, inplace=True)
-        dec_df = pd.DataFrame(self.dec_data)
-        dec_df.reset_index(drop=True, inplace=True)
-        avg_car_dec = dec_df['Dec Cars'].mean()
-        median_car_dec = dec_df['Dec Cars'].median()
-        var_car_dec = dec_df['Dec Cars'].var()
-
+        avg_car_dec, median_car_dec, var_car_dec = self.__iters_summary(self.dec_cars_stats)
         # waiting time per car
-        w_values = np.array(list(self.cars_waiting_time.values()))
-        w_avg = np.average(w_values)
-        w_med = np.median(w_values)
-        w_var = np.var(w_values)
+        w_avg, w_med, w_var = self.__waiting_per_car()
 
         return ReportComparisonData(total_waiting_time=self.total_waiting_time, total_dec_time=self.total_dec_time,
                                     avg_car_waiting=avg_car_waiting, median_car_waiting=median_car_waiting,
                                     var_car_waiting=var_car_waiting, car_num=self.car_num,
-                                    total_waiting_df=sum_waiting_df, cars_waiting_df=waiting_df,
+                                    total_waiting_df=self.iters_data.to_dict({ITERATION: 'Iterations',
+                                                                              TOTAL_WAITING_TIME: TOTAL_WAITING_TIME}),
+                                    cars_waiting_df=self.iters_data.to_dict({ITERATION: ITERATION,
+                                                                             WAITING_CARS: WAITING_CARS}),
                                     avg_car_dec=avg_car_dec, median_car_dec=median_car_dec,
-                                    var_car_dec=var_car_dec, total_dec_df=sum_dec_df,
-                                    cars_dec_df=dec_df, iteration_number=self.curr_iter, waiting_per_car_avg=w_avg,
+                                    var_car_dec=var_car_dec,
+                                    total_dec_df=self.iters_data.to_dict({ITERATION: 'Iterations',
+                                                                          TOTAL_DEC_TIME: TOTAL_DEC_TIME}),
+                                    cars_dec_df=self.iters_data.to_dict({ITERATION: ITERATION, DEC_CARS: DEC_CARS}),
+                                    iteration_number=self.curr_iter, waiting_per_car_avg=w_avg,
                                     waiting_per_car_median=w_med,
                                     waiting_per_car_variance=w_var)
 
     def report(self):
+        """
+        :return: the report of the run. its graphs are drawn only when they are first used
+        """
         # Waiting data
-        sum_waiting_df = pd.DataFrame(self.sum_waiting_data)
-        sum_waiting_df.reset_index(drop=True, inplace=True)
-        waiting_df = pd.DataFrame(self.waiting_data)
-        waiting_df.reset_index(drop=True, inplace=True)
-
-        plt.clf()
-        plt.plot(sum_waiting_df['Iterations'], sum_waiting_df['Total Waiting Time'])
-        plt.xlabel('Iterations')
-        plt.ylabel('Aggregated Waiting Time')
-        plt.title('Aggregated waiting time of the entire simulation\nin each iteration')
-        temp_image_mem = BytesIO()
-        plt.savefig(temp_image_mem)
-        total_waiting_image = Image.open(temp_image_mem)
-
-        plt.clf()
-        plt.scatter(waiting_df['Iteration'], waiting_df['Waiting Cars'])
-        plt.xlabel('Iteration')
-        plt.ylabel('Waiting Cars')
-        plt.title('Total Waiting cars in the entire simulation\nin each iteration')
-        temp_image_mem2 = BytesIO()
-        plt.savefig(temp_image_mem2)
-        cars_waiting_image = Image.open(temp_image_mem2)
-        avg_car_waiting = waiting_df['Waiting Cars'].mean()
-        median_car_waiting = waiting_df['Waiting Cars'].median()
-        var_car_waiting = waiting_df['Waiting Cars'].var()
-
+        avg_car_waiting, median_car_waiting, var_car_waiting = self.__iters_summary(self.waiting_cars_stats)
         # Deceleration data
-        plt.clf()
-        sum_dec_df = pd.DataFrame(self.sum_dec_data)
-        sum_dec_df.reset_index(drop=True, inplace=True)
-        dec_df = pd.DataFrame(self.dec_data)
-        dec_df.reset_index(drop=True, inplace=True)
-        plt.plot(sum_dec_df['Iterations'], sum_dec_df['Total Dec Time'])
-        plt.xlabel('Iterations')
-        plt.ylabel('Aggregated Dec Time')
-        plt.title('Aggregated deceleration time of the\n entire simulation in each iteration')
-        temp_image_mem3 = BytesIO()
-        plt.savefig(temp_image_mem3)
-        total_dec_image = Image.open(temp_image_mem3)
-
-        plt.clf()
-        plt.scatter(dec_df['Iteration'], dec_df['Dec Cars'])
-        plt.xlabel('Iteration')
-        plt.ylabel('Dec Cars')
-        plt.title('Total deceleration cars in the\nentire simulation in each iteration')
-        temp_image_mem4 = BytesIO()
-        plt.savefig(temp_image_mem4)
-        cars_dec_image = Image.open(temp_image_mem4)
-        avg_car_dec = dec_df['Dec Cars'].mean()
-        median_car_dec = dec_df['Dec Cars'].median()
-        var_car_dec = dec_df['Dec Cars'].var()
-
+        avg_car_dec, median_car_dec, var_car_dec = self.__iters_summary(self.dec_cars_stats)
         # waiting time per car
-        w_values = np.array(list(self.cars_waiting_time.values()))
-        w_avg = np.average(w_values)
-        w_med = np.median(w_values)
-        w_var = np.var(w_values)
+        w_avg, w_med, w_var = self.__waiting_per_car()
+        images = ReportImages(*(self.iters_data.column(name) for name in
+                                (ITERATION, WAITING_CARS, TOTAL_WAITING_TIME, DEC_CARS, TOTAL_DEC_TIME)))
 
         return ReportSimulationData(algo_name=self.algo_name, total_waiting_time=self.total_waiting_time,
                                     total_dec_time=self.total_dec_time,
                                     avg_car_waiting=avg_car_waiting, median_car_waiting=median_car_waiting,
                                     var_car_waiting=var_car_waiting, car_num=self.car_num,
-                                    total_waiting_image=total_waiting_image, cars_waiting_image=cars_waiting_image,
                                     avg_car_dec=avg_car_dec, median_car_dec=median_car_dec,
-                                    var_car_dec=var_car_dec, total_dec_image=total_dec_image,
-                                    cars_dec_image=cars_dec_image, iteration_number=self.curr_iter,
+                                    var_car_dec=var_car_dec, images=images, iteration_number=self.curr_iter,
                                     waiting_per_car_avg=w_avg, waiting_per_car_median=w_med,
                                     waiting_per_car_variance=w_var)
+
+    def __waiting_per_car(self):
+        # the cars that did not arrive are counted by their waiting time so far
+        w_stats = deepcopy(self.arrived_waiting_stats)
+        w_stats.add_many(self.__cars_waiting[~self.__arrived])
+        return w_stats.mean, w_stats.quantile(0.5), w_stats.variance()
+
+    @staticmethod
+    def __iters_summary(stats: StreamSummary):
+        """
+        :return: the mean, median and sample variance of the values of the iterations
+        """
+        return stats.mean, stats.quantile(0.5), stats.variance(ddof=1)
+
+
+def cars_state(cars):
+    """
+    :param cars: the cars of the simulation, a VectorizedCars keeps their state in arrays already
+    :return: the ids, speeds and accelerations of the cars, as arrays
+    """
+    if isinstance(cars, VectorizedCars):
+        return cars.ids, cars.speeds, cars.accelerations
+    amount = len(cars)
+    ids = np.fromiter((car.get_id() for car in cars), dtype=np.int64, count=amount)
+    speeds = np.fromiter((car.get_speed() for car in cars), dtype=np.float64, count=amount)
+    accelerations = np.fromiter((car.get_acceleration() for car in cars), dtype=np.float64, count=amount)
+    return ids, speeds, accelerations
@@ -0,0 +1,146 @@
+from math import floor
+from typing import Dict
+
+import numpy as np
+
+# estimators of a stream of values that keep a bounded amount of memory, and answer at any time without the
+# history of the stream
+
+
+class RunningStats:
+    """
+    the count, mean and variance of a stream, by welford's algorithm
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # the sum of the squared differences from the mean
+        self.__m2 = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.__m2 += delta * (value - self.mean)
+
+    def add_many(self, values: np.ndarray):
+        """
+        add the values at once, by merging their own mean and variance into the stream's (chan et al.)
+        """
+        count = len(values)
+        if count == 0:
+            return
+        mean = float(np.mean(values))
+        m2 = float(np.sum((values - mean) ** 2))
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.__m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def variance(self, ddof: int = 0) -> float:
+        """
+        :param ddof: 0 for the variance of the values, 1 for the sample variance
+        :return: the variance, nan if there are not enough values
+        """
+        if self.count - ddof <= 0:
+            return float("nan")
+        return self.__m2 / (self.count - ddof)
+
+
+class CountsQuantiles:
+    """
+    the exact quantiles of a stream of non negative integers, from the amount of times each value was added.
+    the memory is bounded by the largest value, not by the length of the stream, e.g. the amount of cars that wait
+    in an iteration is at most the amount of cars.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.__counts = np.zeros(16, dtype=np.int64)
+        # the cumulative counts, calculated on the first query after values were added
+        self.__cumulative = None
+
+    def add(self, value: int):
+        self.__grow(value)
+        self.__counts[value] += 1
+        self.count += 1
+        self.__cumulative = None
+
+    def add_many(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        self.__grow(int(values.max()))
+        counts = np.bincount(values)
+        self.__counts[:len(counts)] += counts
+        self.count += len(values)
+        self.__cumulative = None
+
+    def __grow(self, value: int):
+        if value < 0:
+            raise Exception("only non negative values can be counted")
+        if value >= len(self.__counts):
+            counts = np.zeros(max(2 * len(self.__counts), value + 1), dtype=np.int64)
+            counts[:len(self.__counts)] = self.__counts
+            self.__counts = counts
+
+    def __order_statistic(self, k: int) -> int:
+        """
+        :return: the k-th smallest value, 0 based
+        """
+        return int(np.searchsorted(self.__cumulative, k, side="right"))
+
+    def quantile(self, q: float) -> float:
+        """
+        :return: the quantile, with the linear interpolation of numpy's quantile. nan if there are no values
+        """
+        if self.count == 0:
+            return float("nan")
+        if self.__cumulative is None:
+            self.__cumulative = np.cumsum(self.__counts)
+        index = q * (self.count - 1)
+        low = floor(index)
+        low_value = self.__order_statistic(low)
+        high_value = self.__order_statistic(min(low + 1, self.count - 1))
+        return float(low_value + (index - low) * (high_value - low_value))
+
+
+class StreamSummary:
+    """
+    the running mean, variance and exact quantiles of a stream of non negative integers, like the amounts of cars
+    and iterations of the statistics
+    """
+
+    def __init__(self, quantiles=(0.5, 0.95, 0.99)):
+        self.stats = RunningStats()
+        self.__counts = CountsQuantiles()
+        self.__quantiles = tuple(quantiles)
+
+    def add(self, value: int):
+        self.stats.add(value)
+        self.__counts.add(value)
+
+    def add_many(self, values: np.ndarray):
+        self.stats.add_many(values)
+        self.__counts.add_many(values)
+
+    @property
+    def count(self) -> int:
+        return self.stats.count
+
+    @property
+    def mean(self) -> float:
+        return self.stats.mean if self.stats.count > 0 else float("nan")
+
+    def variance(self, ddof: int = 0) -> float:
+        return self.stats.variance(ddof)
+
+    def quantile(self, q: float) -> float:
+        return self.__counts.quantile(q)
+
+    def to_dict(self, ddof: int = 0) -> Dict[str, float]:
+        res = {"count": self.count, "mean": self.mean, "variance": self.variance(ddof)}
+        for q in self.__quantiles:
+            res[f"p{round(q * 100)}"] = self.quantile(q)
+        return res
@@ -0,0 +1,112 @@
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEF_CHUNK_SIZE = 4096
+# the most rows that are kept in memory, before the rows are spilled to a temporary file
+DEF_MAX_ROWS_IN_MEMORY = 1 << 16
+
+
+class TickRecorder:
+    """
+    the values of each iteration of a run, in columns.
+    the rows are written into preallocated numpy buffers, which are doubled when they are full.
+    with a spill path, every chunk_size rows are appended to a csv file and the buffers are reused instead,
+    so the memory of a run of any length is bounded by the chunk size.
+    without a spill path, the buffers grow up to max_rows_in_memory rows, and then they are spilled the same way to a
+    temporary csv file, that is deleted with the recorder.
+    """
+
+    def __init__(self, columns: List[str], chunk_size: int = DEF_CHUNK_SIZE, spill_path: Optional[str] = None,
+                 dtype=np.int64, max_rows_in_memory: Optional[int] = DEF_MAX_ROWS_IN_MEMORY):
+        """
+        :param columns: the names of the columns, by the order of the values of a row
+        :param chunk_size: the initial capacity of the buffers, and the amount of rows of each spilled chunk
+        :param spill_path: the csv file to spill the rows to, or None to spill them to a temporary file only once
+                           there are too many of them
+        :param max_rows_in_memory: the amount of rows to keep in memory without a spill path, before spilling them.
+                                   None to keep all rows in memory
+        """
+        self.__columns = list(columns)
+        self.__column_index: Dict[str, int] = {name: i for i, name in enumerate(self.__columns)}
+        self.__chunk_size = chunk_size
+        self.__spill_path = spill_path
+        self.__max_rows_in_memory = max_rows_in_memory
+        # the temporary file of the spilled rows, when there is no spill path
+        self.__spill_file = None
+        self.__dtype = dtype
+        # each row of the buffer is a column, so a column is a contiguous slice
+        self.__buffer = np.zeros((len(self.__columns), chunk_size), dtype=dtype)
+        self.__size = 0
+        self.__spilled = 0
+        if spill_path is not None:
+            with open(spill_path, "w") as file:
+                file.write(",".join(self.__columns) + "\n")
+
+    def __len__(self) -> int:
+        return self.__spilled + self.__size
+
+    @property
+    def columns(self) -> List[str]:
+        return self.__columns
+
+    def append(self, *values):
+        """
+        add a row, with a value for each column
+        """
+        if self.__size == self.__buffer.shape[1]:
+            if self.__spill_path is not None or self.__spill_file is not None:
+                self.__spill()
+            elif self.__max_rows_in_memory is not None and 2 * self.__size > self.__max_rows_in_memory:
+                self.__spill_file = tempfile.TemporaryFile("w+")
+                self.__spill_file.write(",".join(self.__columns) + "\n")
+                self.__spill()
+            else:
+                self.__grow()
+        self.__buffer[:, self.__size] = values
+        self.__size += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        :return: all values of the column, including the spilled ones
+        """
+        index = self.__column_index[name]
+        in_memory = self.__buffer[index, :self.__size]
+        if self.__spilled == 0:
+            return in_memory.copy()
+        if self.__spill_file is not None:
+            self.__spill_file.seek(0)
+        spilled = np.loadtxt(self.__spill_path if self.__spill_file is None else self.__spill_file, delimiter=",",
+                             skiprows=1, usecols=index, dtype=self.__dtype, ndmin=1)
+        return np.concatenate([spilled, in_memory])
+
+    def to_dict(self, names: Optional[Dict[str, str]] = None) -> Dict[str, np.ndarray]:
+        """
+        :param names: the names to give the columns in the result, by their names in the recorder.
+                      None for all columns with their own names
+        :return: the columns as arrays
+        """
+        if names is None:
+            names = {name: name for name in self.__columns}
+        return {new_name: self.column(name) for name, new_name in names.items()}
+
+    def __grow(self):
+        buffer = np.zeros((len(self.__columns), self.__buffer.shape[1] * 2), dtype=self.__dtype)
+        buffer[:, :self.__size] = self.__buffer[:, :self.__size]
+        self.__buffer = buffer
+
+    def __spill(self):
+        if self.__spill_file is not None:
+            # the file may have been read since the last spill
+            self.__spill_file.seek(0, 2)
+            self.__write_rows(self.__spill_file)
+        else:
+            with open(self.__spill_path, "a") as file:
+                self.__write_rows(file)
+        self.__spilled += self.__size
+        self.__size = 0
+
+    def __write_rows(self, file):
+        np.savetxt(file, self.__buffer[:, :self.__size].T, delimiter=",",
+                   fmt="%d" if np.issubdtype(self.__dtype, np.integer) else "%.18g")
@@ -0,0 +1,649 @@
+from __future__ import annotations
+
+from math import sqrt
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from server.geometry.point import Point
+from server.map_graph import map_graph_of
+from server.simulation_objects.cars.car import Car
+from server.simulation_objects.cars.i_car import ICar
+from server.simulation_objects.cars.position import Position
+from server.simulation_objects.roadsections.i_road_section import IRoadSection
+
+# the smallest distance a car is asked to stop within, avoids dividing by zero at the stop line
+MIN_STOP_DISTANCE = 1e-6
+# the speed under which a car is waiting, like Car.is_waiting
+WAITING_SPEED = 0.01
+# the car ahead of the first car of a lane, and the lane a car that is not moving lane moves to
+NO_CAR = -1
+NO_LANE = -1
+
+
+class VectorizedCars:
+    """
+    a structure-of-arrays replacement for the list of Car objects that next_iter gets.
+    the state of all cars (road, lane, lane part, position, speed, acceleration and state flags) is kept in numpy
+    arrays, and step() advances the cars in batched calculations instead of activating the cars one by one.
+    the object behaves like the cars list (len, iteration), and the cars it yields are CarView objects that answer
+    the same queries as Car, so StatsReporter and SimulationGraphics work with it unchanged.
+
+    the cars follow Car's driving rules in the order of the list, so a run gives the same results as a run of the
+    Car objects. in that order, a car sees the new state of the cars before it and the old state of the cars after
+    it, and a car only looks at the cars of its own lane, gets into a lane that its road has, or drives into the
+    lanes of the next roads of its path. so each lane has a queue of the cars that may touch it in the iteration,
+    in the order of the list, and the iteration is run in rounds: in each round, every car that is the first of all
+    of its queues is activated, together with the cars of the other lanes.
+    """
+
+    def __init__(self, roads: List[IRoadSection], cars: List[Car]):
+        """
+        :param roads: all roads of the map
+        :param cars: cars that have not entered their first road yet, their paths and speed limits are used
+        """
+        self.__create_network(roads)
+        self.__create_cars(cars)
+        self.last_arrived: List[CarView] = list()
+
+    def __create_network(self, roads: List[IRoadSection]):
+        """
+        create the constant tables of the map that the batched step looks into
+        """
+        self._roads = list(roads)
+        # road sections are not hashable, so index them by their object id
+        self._road_index: Dict[int, int] = {id(road): i for i, road in enumerate(self._roads)}
+        self._lanes = [lane for road in self._roads for lane in road.lanes]
+        self._lane_index = {lane: i for i, lane in enumerate(self._lanes)}
+        self._geometries = [lane.geometry for lane in self._lanes]
+        roads_amount = len(self._roads)
+
+        self._road_max_speed = np.array([road.max_speed for road in self._roads], dtype=float)
+        self._road_right_lane = np.array(
+            [self._lane_index[road.get_lane(road.get_most_right_lane_index())] for road in self._roads])
+        self._lane_road = np.array([self._road_index[id(lane.road)] for lane in self._lanes])
+
+        # the lanes' arc-length tables, flattened into single arrays. the middle points of lane i start at
+        # _lane_offset[i], and the direction of each part is in the place of the middle point it starts at
+        self._lane_offset = np.zeros(len(self._lanes), dtype=int)
+        self._lane_parts = np.zeros(len(self._lanes), dtype=int)
+        self._lane_length = np.zeros(len(self._lanes), dtype=float)
+        middles_x, middles_y, cum_local, cum_global, directions_x, directions_y = list(), list(), list(), list(), \
+            list(), list()
+        base = 0.0
+        for i, geometry in enumerate(self._geometries):
+            self._lane_offset[i] = len(middles_x)
+            self._lane_parts[i] = geometry.parts_amount
+            self._lane_length[i] = geometry.length
+            middles_x += [x for x, _ in geometry.middles]
+            middles_y += [y for _, y in geometry.middles]
+            cum_local += geometry.cumulative_lengths
+            directions_x += [dx for dx, _ in geometry.directions] + [0.0]
+            directions_y += [dy for _, dy in geometry.directions] + [0.0]
+            # shift every lane by the lengths of the lanes before it, so a single sorted array covers all lanes
+            cum_global += [base + d for d in geometry.cumulative_lengths]
+            base += geometry.length + 1
+        self._middle_x = np.array(middles_x, dtype=float)
+        self._middle_y = np.array(middles_y, dtype=float)
+        self._direction_x = np.array(directions_x, dtype=float)
+        self._direction_y = np.array(directions_y, dtype=float)
+        self._cum_local = np.array(cum_local, dtype=float)
+        self._cum = np.array(cum_global, dtype=float)
+        self._lane_base = self._cum[self._lane_offset]
+        # the middle of the end of each lane, where a car stops for a red light
+        self._lane_end_x = self._middle_x[self._lane_offset + self._lane_parts]
+        self._lane_end_y = self._middle_y[self._lane_offset + self._lane_parts]
+
+        # which (lane, road) pairs are movements, and which lane of a road should be used to get to another road.
+        # both are sorted keys of the form: first_index * roads_amount + road_index
+        self._roads_amount = roads_amount
+        map_graph = map_graph_of(self._roads)
+        from_lanes = np.repeat(np.arange(len(self._lanes), dtype=np.int64), np.diff(map_graph.lanes_out_indptr))
+        to_roads = map_graph.lane_road[map_graph.lanes_out_indices]
+        self._goes_to_keys = np.unique(from_lanes * roads_amount + to_roads)
+        # the movements are ordered by their lane, so the first movement of each key is from the first lane
+        # from the left that goes to the road, like Car.lane_to_move_in
+        roads_movements = map_graph.lane_road[from_lanes] * roads_amount + to_roads
+        self._lane_for_road_keys, first_movements = np.unique(roads_movements, return_index=True)
+        self._lane_for_road = from_lanes[first_movements].astype(int)
+
+        # the traffic light of each lane, -1 for lanes without a traffic light
+        self._lights = list()
+        lights_index = dict()
+        self._lane_light = np.full(len(self._lanes), -1, dtype=int)
+        for i, lane in enumerate(self._lanes):
+            light = getattr(lane, "traffic_light", None)
+            if light is not None:
+                if light not in lights_index:
+                    lights_index[light] = len(self._lights)
+                    self._lights.append(light)
+                self._lane_light[i] = lights_index[light]
+        self._lane_has_light = self._lane_light >= 0
+
+    def __create_cars(self, cars: List[Car]):
+        amount = len(cars)
+        self._views: List[CarView] = [CarView(self, key, car.get_id()) for key, car in enumerate(cars)]
+        # the slot of each car (by its key) in the state arrays, -1 for cars that arrived.
+        # the slots keep the order of the cars, which is the order they are activated in
+        self._slot_of = np.arange(amount)
+        self._keys = np.arange(amount)
+        self._ids = np.array([car.get_id() for car in cars], dtype=int)
+
+        paths = [[self._road_index[id(road)] for road in car.path] for car in cars]
+        self._path_len = np.array([len(path) for path in paths], dtype=int)
+        self._path_start = np.concatenate(([0], np.cumsum(self._path_len)[:-1])).astype(int)
+        self._path_roads = np.array([road for path in paths for road in path], dtype=int)
+        self._last_road = self._path_roads[self._path_start + self._path_len - 1]
+
+        self._max_speed = np.array([car.max_speed for car in cars], dtype=float)
+        self._max_speed_change = np.array([car.max_speed_change for car in cars], dtype=float)
+        self._speed = np.zeros(amount, dtype=float)
+        self._acceleration = np.zeros(amount, dtype=float)
+        # the CarState of the cars: the lane a car moved to (NO_LANE if it is not moving lane), and stopping
+        self._moving_lane = np.full(amount, NO_LANE, dtype=int)
+        self._stopping = np.zeros(amount, dtype=bool)
+
+        # all cars enter the most right lane of their first road
+        self._road = self._path_roads[self._path_start].copy()
+        self._lane = self._road_right_lane[self._road].copy()
+        self._next_road_idx = np.ones(amount, dtype=int)
+        self._distance = np.zeros(amount, dtype=float)
+        self._part = np.zeros(amount, dtype=int)
+        self._x = np.zeros(amount, dtype=float)
+        self._y = np.zeros(amount, dtype=float)
+        self._update_positions(np.arange(amount))
+
+        # the keys of the cars of each lane from its front, like the lanes' cars, and the key of the car ahead of
+        # each car
+        self._lanes_cars: List[List[int]] = [list() for _ in self._lanes]
+        self._front = np.full(amount, NO_CAR, dtype=int)
+        for key, (view, lane) in enumerate(zip(self._views, self._lane)):
+            self._insert(key, lane, len(self._lanes_cars[lane]))
+            self._lanes[lane].add_car(view)
+
+    def __len__(self):
+        return len(self._views)
+
+    def __iter__(self) -> Iterator[CarView]:
+        return iter(list(self._views))
+
+    @property
+    def speeds(self) -> np.ndarray:
+        return self._speed
+
+    @property
+    def accelerations(self) -> np.ndarray:
+        return self._acceleration
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids
+
+    def step(self):
+        """
+        advance all cars by one iteration, and remove the cars that arrived their destination.
+        the removed cars are kept in last_arrived until the next step.
+        """
+        self.last_arrived = list()
+        if len(self._views) == 0:
+            return
+        old_lane = self._lane.copy()
+        old_waiting = self._speed < WAITING_SPEED
+        self._can_pass = self._lanes_can_pass()
+        self._done = np.zeros(len(self._views), dtype=bool)
+        for cars in self._rounds():
+            self._activate(cars)
+        # the lanes only track the changes of the waiting cars
+        for slot in np.flatnonzero((old_lane != self._lane) | (old_waiting != (self._speed < WAITING_SPEED))):
+            self._lanes[self._lane[slot]].update_car_waiting(self._views[slot])
+        self._retire(self._road == self._last_road)
+
+    def _lanes_can_pass(self) -> np.ndarray:
+        """
+        :return: for each lane, True if it has no traffic light or its traffic light lets cars pass
+        """
+        can_pass = np.fromiter((light.can_pass for light in self._lights), dtype=bool, count=len(self._lights))
+        # index -1 (no traffic light) takes the last item, which always lets cars pass
+        return np.append(can_pass, True)[self._lane_light]
+
+    def _rounds(self) -> Iterator[np.ndarray]:
+        """
+        the queues of the lanes hold the cars of the lane, the cars that may move into the lane, and the cars that
+        may drive into the lane from the previous road, each by its slot.
+        :return: for each round, the slots of the cars that are first in all of their queues
+        """
+        amount = len(self._views)
+        slots = np.arange(amount)
+        movers, targets = self._lane_movers()
+        queues_lanes, queues_slots = [self._lane, targets], [slots, movers]
+        for cars, lanes, distances in ((slots, self._lane, self._distance),
+                                       (movers, targets, self._move_distance[movers])):
+            entered_cars, entered_lanes = self._lanes_in_reach(cars, lanes, distances)
+            queues_lanes.append(entered_lanes)
+            queues_slots.append(entered_cars)
+        # the queues sorted by their lane, and each queue by the slots
+        items = np.unique(np.concatenate(queues_lanes) * amount + np.concatenate(queues_slots))
+        items_lanes, items_slots = items // amount, items % amount
+        heads = np.flatnonzero(np.r_[True, items_lanes[1:] != items_lanes[:-1]])
+        ends = np.r_[heads[1:], len(items)]
+        queues_amount = np.bincount(items_slots, minlength=amount)
+        # a car is taken from the queue of its own lane, so it is in a round once
+        own_lane = items_lanes == self._lane[items_slots]
+        while len(heads) > 0:
+            first = items_slots[heads]
+            is_first = np.bincount(first, minlength=amount)[first] == queues_amount[first]
+            yield first[is_first & own_lane[heads]]
+            heads = heads + is_first
+            left = heads < ends
+            heads, ends = heads[left], ends[left]
+
+    def _lane_movers(self):
+        """
+        find the cars that will move lane when they are activated, like Car._should_move_lane.
+        a car that another car gets in front of may stop before it is activated, and not move lane then.
+        the distances in the new lanes are kept in _move_distance
+        :return: the slots of the cars, and the lanes they move to
+        """
+        moving_lane = np.where(self._moving_lane == self._lane, NO_LANE, self._moving_lane)
+        stopping = self._stopping & ~self._stops_stopping(np.arange(len(self._views)))
+        has_next, next_road = self._next_roads()
+        going, _ = self._find_keys(self._goes_to_keys, self._lane * self._roads_amount + next_road)
+        found, positions = self._find_keys(self._lane_for_road_keys, self._road * self._roads_amount + next_road)
+        movers = np.flatnonzero((moving_lane == NO_LANE) & ~stopping & has_next & ~going & found)
+        targets = self._lane_for_road[positions[movers]]
+        self._move_to = np.full(len(self._views), NO_LANE, dtype=int)
+        self._move_to[movers] = targets
+        self._move_distance = np.zeros(len(self._views), dtype=float)
+        self._move_distance[movers] = [
+            Car.distance_in_new_lane(Position(x, y), part, self._geometries[lane], self._geometries[target])
+            for x, y, part, lane, target in zip(self._x[movers].tolist(), self._y[movers].tolist(),
+                                                self._part[movers].tolist(), self._lane[movers].tolist(),
+                                                targets.tolist())]
+        return movers, targets
+
+    def _stops_stopping(self, cars: np.ndarray) -> np.ndarray:
+        """
+        :return: a mask of the cars that stop stopping when they are activated: they stopped, or their light lets
+                 them pass
+        """
+        lanes = self._lane[cars]
+        return (self._speed[cars] == 0) | (self._lane_has_light[lanes] & self._can_pass[lanes])
+
+    def _lanes_in_reach(self, cars: np.ndarray, lanes: np.ndarray, distances: np.ndarray):
+        """
+        :param cars, lanes, distances: slots of cars, and a lane and a distance in it that each car drives from
+        :return: the slots and lanes of the next roads that the cars may get into in this iteration, with the
+                 highest speed they may reach
+        """
+        reach = distances + np.minimum(self._speed[cars] + self._max_speed_change[cars], self._max_speed[cars])
+        next_road_idx = self._next_road_idx[cars]
+        reached_cars, reached_lanes = list(), list()
+        passing = (reach > self._lane_length[lanes]) & (next_road_idx < self._path_len[cars])
+        while passing.any():
+            cars, next_road_idx = cars[passing], next_road_idx[passing]
+            reach = reach[passing] - self._lane_length[lanes[passing]]
+            lanes = self._road_right_lane[self._path_roads[self._path_start[cars] + next_road_idx]]
+            next_road_idx = next_road_idx + 1
+            reached_cars.append(cars)
+            reached_lanes.append(lanes)
+            passing = (reach > self._lane_length[lanes]) & (next_road_idx < self._path_len[cars])
+        return np.concatenate(reached_cars + [np.zeros(0, dtype=int)]), \
+            np.concatenate(reached_lanes + [np.zeros(0, dtype=int)])
+
+    def _next_roads(self):
+        """
+        :return: a mask of the cars that have a next road in their path, and the index of that road
+        """
+        has_next = self._next_road_idx < self._path_len
+        next_idx = self._path_start + np.minimum(self._next_road_idx, self._path_len - 1)
+        return has_next, self._path_roads[next_idx]
+
+    @staticmethod
+    def _find_keys(sorted_keys: np.ndarray, keys: np.ndarray):
+        """
+        :return: a mask of the keys that are in sorted_keys, and their positions in it
+        """
+        positions = np.minimum(np.searchsorted(sorted_keys, keys), max(len(sorted_keys) - 1, 0))
+        if len(sorted_keys) == 0:
+            return np.zeros(len(keys), dtype=bool), positions
+        return sorted_keys[positions] == keys, positions
+
+    def _activate(self, cars: np.ndarray):
+        """
+        the batched version of Car.activate, for cars of different lanes
+        """
+        lanes = self._lane[cars]
+        # the state updates of Car._set_acceleration
+        self._moving_lane[cars] = np.where(self._moving_lane[cars] == lanes, NO_LANE, self._moving_lane[cars])
+        self._stopping[cars] &= ~self._stops_stopping(cars)
+        driving = (self._moving_lane[cars] == NO_LANE) & ~self._stopping[cars]
+        moving = driving & (self._move_to[cars] != NO_LANE)
+        self._set_accelerations(cars[driving & ~moving])
+        self._acceleration[cars] = np.minimum(self._acceleration[cars], self._max_speed_change[cars])
+        movers = cars[moving]
+        from_lanes = self._lane[movers]
+        if len(movers) > 0:
+            self._lane[movers] = self._move_to[movers]
+            self._distance[movers] = self._move_distance[movers]
+            self._update_positions(movers)
+        moved_x, moved_y = self._x[movers], self._y[movers]
+        self._update_speeds(cars)
+        passed = self._advance(cars)
+        self._update_positions(cars)
+        self._done[cars] = True
+        if len(movers) > 0 or len(passed) > 0:
+            self._update_lanes_cars(movers, from_lanes, moved_x, moved_y, passed)
+
+    def _set_accelerations(self, cars: np.ndarray):
+        """
+        the batched version of the driving part of Car._set_acceleration
+        """
+        has_front = self._front[self._keys[cars]] != NO_CAR
+        can_pass = self._can_pass[self._lane[cars]]
+        free = cars[~has_front & can_pass]
+        self._acceleration[free] = self._full_gas(free)
+        red = cars[~has_front & ~can_pass]
+        if len(red) > 0:
+            self._drive_to_red_light(red)
+        following = cars[has_front]
+        if len(following) > 0:
+            self._follow(following, can_pass[has_front])
+
+    def _full_gas(self, cars: np.ndarray) -> np.ndarray:
+        speed, max_speed_change = self._speed[cars], self._max_speed_change[cars]
+        road_max_speed = self._road_max_speed[self._road[cars]]
+        return np.where(speed + max_speed_change <= road_max_speed, max_speed_change, road_max_speed - speed)
+
+    def _drive_to_red_light(self, cars: np.ndarray):
+        """
+        no car ahead and a red light: keep driving if we can still stop in time, stop otherwise
+        """
+        speed, acceleration = self._speed[cars], self._acceleration[cars]
+        lanes = self._lane[cars]
+        distance_to_stop = np.sqrt(self._squared(self._x[cars] - self._lane_end_x[lanes]) +
+                                   self._squared(self._y[cars] - self._lane_end_y[lanes]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected_distance_to_stop = np.where(acceleration == 0, np.where(speed == 0, 0, np.inf),
+                                                 -self._squared(speed) / (2 * acceleration))
+        distance_in_full_gas = np.minimum(speed + self._max_speed_change[cars], self._road_max_speed[self._road[cars]])
+        can_drive = (expected_distance_to_stop < distance_to_stop) & (distance_to_stop > distance_in_full_gas)
+        stop = cars[~can_drive]
+        self._stopping[stop] = True
+        self._acceleration[cars] = np.where(can_drive, self._full_gas(cars), -self._squared(speed) /
+                                            (2 * np.maximum(distance_to_stop, MIN_STOP_DISTANCE)))
+
+    def _follow(self, cars: np.ndarray, can_pass: np.ndarray):
+        """
+        a car ahead: keep a distance from it if it already moved in this iteration and the light is green, and from
+        where it is expected to be after this iteration otherwise
+        """
+        speed = self._speed[cars]
+        fronts = self._slot_of[self._front[self._keys[cars]]]
+        lane_length = self._lane_length[self._lane[cars]]
+        moved = self._done[fronts] & can_pass
+        front_x, front_y = self._x[fronts], self._y[fronts]
+        if not moved.all():
+            estimated = fronts[~moved]
+            front_x[~moved], front_y[~moved] = self._points_after(estimated, self._speed[estimated] +
+                                                                  self._acceleration[estimated])
+        distance_to_keep = np.where(moved, speed + lane_length / 10, speed * 1.1 + lane_length / 10)
+        distance_to_move = np.sqrt(self._squared(self._x[cars] - front_x) +
+                                   self._squared(self._y[cars] - front_y)) - distance_to_keep
+        required_speed = np.minimum(distance_to_move, self._max_speed[cars])
+        self._acceleration[cars] = np.minimum(required_speed - speed, self._max_speed_change[cars])
+
+    @staticmethod
+    def _squared(values: np.ndarray) -> np.ndarray:
+        # the squares of Car's calculations are Python's **, the pow of the C library, which is not always the
+        # same as the multiplication of numpy's ** 2. float_power is the same pow
+        return np.float_power(values, 2)
+
+    def _update_speeds(self, cars: np.ndarray):
+        speed = np.minimum(np.maximum(self._speed[cars] + self._acceleration[cars], 0), self._max_speed[cars])
+        self._speed[cars] = speed
+        self._acceleration[cars] = np.minimum(self._acceleration[cars], self._road_max_speed[self._road[cars]] - speed)
+
+    def _advance(self, cars: np.ndarray):
+        """
+        move the cars by their speed, entering the next roads of their paths when they pass their lanes' ends
+        :return: for each road that cars passed to, the slots of the cars, the lanes they left and the lanes they
+                 entered
+        """
+        left = self._speed[cars]
+        # cars never move backwards
+        cars, left = cars[left > 0], left[left > 0]
+        passed = list()
+        while len(cars) > 0:
+            lanes = self._lane[cars]
+            lane_length = self._lane_length[lanes]
+            new_distance = self._distance[cars] + left
+            self._distance[cars] = np.minimum(new_distance, lane_length)
+            left = np.maximum(0, new_distance - lane_length)
+            passing = (left > 0) & (self._next_road_idx[cars] < self._path_len[cars])
+            cars, left, lanes = cars[passing], left[passing], lanes[passing]
+            if len(cars) == 0:
+                break
+            roads = self._path_roads[self._path_start[cars] + self._next_road_idx[cars]]
+            self._road[cars] = roads
+            self._lane[cars] = self._road_right_lane[roads]
+            self._next_road_idx[cars] += 1
+            self._distance[cars] = 0
+            passed.append((cars, lanes, self._lane[cars]))
+        return passed
+
+    def _update_positions(self, cars: np.ndarray):
+        """
+        calculate the x,y position and the lane part of the cars from their distance in their lanes
+        """
+        self._part[cars], self._x[cars], self._y[cars] = self._points_at(self._lane[cars], self._distance[cars])
+
+    def _points_at(self, lanes: np.ndarray, distances: np.ndarray):
+        """
+        the batched version of LaneGeometry.part_at and LaneGeometry.point_at
+        :return: the parts of the distances in their lanes, and the x and y of their points
+        """
+        first = self._lane_offset[lanes]
+        last = first + np.maximum(self._lane_parts[lanes] - 1, 0)
+        point = np.searchsorted(self._cum, self._lane_base[lanes] + distances, side="right") - 1
+        point = np.minimum(np.maximum(point, first), last)
+        # the shifted search may be off by one point, fix it by the distances in the lane itself
+        while True:
+            forward = (point < last) & (self._cum_local[np.minimum(point + 1, len(self._cum_local) - 1)] <= distances)
+            backward = (point > first) & (self._cum_local[point] > distances)
+            if not (forward | backward).any():
+                break
+            point = point + forward - backward
+        distance_in_part = distances - self._cum_local[point]
+        return point - first, self._middle_x[point] + self._direction_x[point] * distance_in_part, \
+            self._middle_y[point] + self._direction_y[point] * distance_in_part
+
+    def _points_after(self, cars: np.ndarray, distances: np.ndarray):
+        """
+        the batched version of Car.position_after
+        :return: the x and y of the points
+        """
+        lanes = self._lane[cars]
+        next_road_idx = self._next_road_idx[cars]
+        new_distance = self._distance[cars] + np.maximum(0, distances)
+        passing = (new_distance > self._lane_length[lanes]) & (next_road_idx < self._path_len[cars])
+        while passing.any():
+            new_distance[passing] -= self._lane_length[lanes[passing]]
+            lanes[passing] = self._road_right_lane[self._path_roads[self._path_start[cars[passing]] +
+                                                                   next_road_idx[passing]]]
+            next_road_idx[passing] += 1
+            passing = (new_distance > self._lane_length[lanes]) & (next_road_idx < self._path_len[cars])
+        _, x, y = self._points_at(lanes, np.minimum(new_distance, self._lane_length[lanes]))
+        return x, y
+
+    def _update_lanes_cars(self, movers: np.ndarray, from_lanes: np.ndarray, moved_x: np.ndarray,
+                           moved_y: np.ndarray, passed):
+        """
+        update the cars of the lanes, and the lanes objects which the traffic lights algorithms look at, in the
+        order of the cars, like Car.move_lane and Car._enter_road_section
+        """
+        moves = {slot: (from_lane, x, y) for slot, from_lane, x, y in
+                 zip(movers.tolist(), from_lanes.tolist(), moved_x.tolist(), moved_y.tolist())}
+        roads_passed: Dict[int, list] = dict()
+        for cars, lanes, new_lanes in passed:
+            for slot, lane, new_lane in zip(cars.tolist(), lanes.tolist(), new_lanes.tolist()):
+                roads_passed.setdefault(slot, list()).append((lane, new_lane))
+        for slot in sorted(set(moves) | set(roads_passed)):
+            key, view = self._keys[slot], self._views[slot]
+            if slot in moves:
+                from_lane, x, y = moves[slot]
+                lane = self._move_to[slot]
+                self._remove(key, from_lane)
+                self._lanes[from_lane].remove_car(view)
+                index = self._first_index_behind(lane, self._move_distance[slot])
+                before_car = self._lanes_cars[lane][index] if index < len(self._lanes_cars[lane]) else NO_CAR
+                self._insert(key, lane, index)
+                self._lanes[lane].insert_before(view, self._views[self._slot_of[before_car]]
+                                                if before_car != NO_CAR else None)
+                if before_car != NO_CAR:
+                    self._stop_for(self._slot_of[before_car], x, y)
+                self._moving_lane[slot] = lane
+            for lane, new_lane in roads_passed.get(slot, ()):
+                self._remove(key, lane)
+                self._lanes[lane].remove_car(view)
+                self._insert(key, new_lane, len(self._lanes_cars[new_lane]))
+                self._lanes[new_lane].add_car(view)
+
+    def _first_index_behind(self, lane: int, distance: float) -> int:
+        """
+        like Lane.get_car_before: the index of the first car of the lane that is behind the distance, by a binary
+        search of the lane's cars
+        """
+        cars = self._lanes_cars[lane]
+        low, high = 0, len(cars)
+        while low < high:
+            middle = (low + high) // 2
+            if self._distance[self._slot_of[cars[middle]]] < distance:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _insert(self, key: int, lane: int, index: int):
+        cars = self._lanes_cars[lane]
+        self._front[key] = cars[index - 1] if index > 0 else NO_CAR
+        if index < len(cars):
+            self._front[cars[index]] = key
+        cars.insert(index, key)
+
+    def _remove(self, key: int, lane: int):
+        cars = self._lanes_cars[lane]
+        index = cars.index(key)
+        if index + 1 < len(cars):
+            self._front[cars[index + 1]] = self._front[key]
+        del cars[index]
+
+    def _stop_for(self, slot: int, x: float, y: float):
+        """
+        like Car.wants_to_enter_lane, the car stops before the point a car gets into its lane at
+        """
+        distance = sqrt((float(self._x[slot]) - x) ** 2 + (float(self._y[slot]) - y) ** 2)
+        self._stopping[slot] = True
+        self._acceleration[slot] = -float(self._speed[slot]) ** 2 / (2 * max(distance, MIN_STOP_DISTANCE))
+
+    def _retire(self, arrived: np.ndarray):
+        if not arrived.any():
+            return
+        self.last_arrived = [self._views[slot] for slot in np.flatnonzero(arrived)]
+        for view in self.last_arrived:
+            lane = self._lane[self._slot_of[view.key]]
+            self._remove(view.key, lane)
+            self._lanes[lane].remove_car(view)
+        keep = ~arrived
+        for name in ("_keys", "_ids", "_path_len", "_path_start", "_last_road", "_max_speed", "_max_speed_change",
+                     "_speed", "_acceleration", "_moving_lane", "_stopping", "_road", "_lane", "_next_road_idx",
+                     "_distance", "_part", "_x", "_y"):
+            setattr(self, name, getattr(self, name)[keep])
+        self._views = [view for view, kept in zip(self._views, keep) if kept]
+        self._slot_of[[view.key for view in self.last_arrived]] = -1
+        self._slot_of[self._keys] = np.arange(len(self._keys))
+
+    def _position_of(self, key: int) -> Position:
+        slot = self._slot_of[key]
+        return Position(float(self._x[slot]), float(self._y[slot]))
+
+    def _angle_of(self, key: int) -> float:
+        slot = self._slot_of[key]
+        point = self._lane_offset[self._lane[slot]] + self._part[slot]
+        return Car.heading_angle(Position(self._middle_x[point], self._middle_y[point]),
+                                 Position(self._middle_x[point + 1], self._middle_y[point + 1]))
+
+    def _position_after(self, key: int, distance: float) -> Point:
+        slot = self._slot_of[key]
+        x, y = self._points_after(np.array([slot]), np.array([distance], dtype=float))
+        return Point(float(x[0]), float(y[0]))
+
+    def _part_in_lane(self, key: int) -> int:
+        return int(self._part[self._slot_of[key]])
+
+
+class CarView(ICar):
+    """
+    a read only view of a single car of a VectorizedCars object
+    """
+
+    def __init__(self, engine: VectorizedCars, key: int, idx: int):
+        self.__engine = engine
+        self.__key = key
+        self.__idx = idx
+
+    @property
+    def key(self) -> int:
+        return self.__key
+
+    def __slot(self) -> int:
+        return self.__engine._slot_of[self.__key]
+
+    @property
+    def position(self):
+        return self.__engine._position_of(self.__key)
+
+    def activate(self):
+        raise Exception("cars of a VectorizedCars object are advanced together by its step()")
+
+    def wants_to_enter_lane(self, car: ICar) -> None:
+        position = car.position
+        self.__engine._stop_for(self.__slot(), position.x, position.y)
+
+    def estimated_speed(self) -> float:
+        return self.get_speed() + self.get_acceleration()
+
+    def position_after(self, distance: float) -> Point:
+        return self.__engine._position_after(self.__key, distance)
+
+    @property
+    def current_part_in_lane(self):
+        return self.__engine._part_in_lane(self.__key)
+
+    @property
+    def distance_in_lane(self) -> float:
+        return float(self.__engine._distance[self.__slot()])
+
+    def has_arrived_destination(self):
+        return self.__slot() == -1
+
+    def get_angle(self):
+        return self.__engine._angle_of(self.__key)
+
+    def get_id(self):
+        return self.__idx
+
+    def enter_first_road(self):
+        # all cars enter their first road when the VectorizedCars object is created
+        pass
+
+    def get_speed(self):
+        return float(self.__engine._speed[self.__slot()])
+
+    def get_acceleration(self):
+        return float(self.__engine._acceleration[self.__slot()])
+
+    def is_waiting(self):
+        return self.get_speed() < WAITING_SPEED
+
+    def __repr__(self):
+        return f"CarView:{self.get_id()}, at: {self.position}"
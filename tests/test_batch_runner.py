@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+
+from algorithms.cost_based import CostBased
+from algorithms.naive import NaiveAlgo
+from server.batch_runner import Scenario, run_batch
+from server.statistics.stats_reporter import WAITING_CARS
+
+TEL_AVIV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases", "handmade",
+                        "tel_aviv")
+
+
+def run_results(scenarios):
+    """
+    :return: the iterations and the waiting cars of each iteration of each scenario, by the scenario's name
+    """
+    return {result.scenario.name: (result.iterations, result.report.total_waiting_time,
+                                   result.report.cars_waiting_df[WAITING_CARS])
+            for result in run_batch(scenarios, max_workers=2)}
+
+
+def test_same_seed_same_results():
+    # each scenario twice, so the same scenario runs in different workers and after different scenarios
+    scenarios = [Scenario(TEL_AVIV, (algo,), 60, path_min_len=4, seed=seed, name=f"{algo.__name__}-{seed}-{i}")
+                 for i in range(2) for algo in (NaiveAlgo, CostBased) for seed in (1, 2)]
+    results = run_results(scenarios)
+    for algo in (NaiveAlgo, CostBased):
+        for seed in (1, 2):
+            first, second = results[f"{algo.__name__}-{seed}-0"], results[f"{algo.__name__}-{seed}-1"]
+            assert first[:2] == second[:2]
+            assert np.array_equal(first[2], second[2])
+    # and the same again in a new batch
+    for name, (iterations, total_waiting_time, waiting_cars) in run_results(scenarios).items():
+        assert (iterations, total_waiting_time) == results[name][:2]
+        assert np.array_equal(waiting_cars, results[name][2])
@@ -0,0 +1,40 @@
+import os
+import random
+
+import pytest
+
+from algorithms.cost_based import CostBased
+from algorithms.most_crowded import MCAlgo
+from algorithms.naive import NaiveAlgo
+from server.cars_generator import generate_cars
+from server.map_creation import create_map
+from server.server_runner import next_iter
+
+DATABASES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases")
+
+# the amount of waiting cars after each iteration, in runs of the model that kept the cars as points.
+# the cars decide by the straight lines between their positions, so the runs should not change
+POINT_MODEL_RUNS = [
+    (NaiveAlgo, 30, 5, [0, 2, 0, 3, 2, 4, 4, 8, 7, 11, 11, 2, 4, 0, 3, 2, 3, 4, 5, 6, 8, 3, 1, 3, 1, 3, 2, 5, 4, 5, 5,
+                        1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1, 0, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0]),
+    (CostBased, 60, 3, [10, 4, 1, 4, 6, 4, 3, 5, 5, 9, 10, 7, 6, 4, 8, 4, 7, 2, 4, 3, 5, 3, 4, 3, 2, 2, 1, 0, 1, 0, 0,
+                        1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]),
+    (MCAlgo, 100, 7, [33, 14, 4, 19, 18, 14, 20, 17, 18, 24, 19, 22, 17, 13, 22, 28, 25, 20, 18, 17, 19, 13, 16, 11,
+                      10, 14, 10, 11, 11, 5, 10, 7, 10, 9, 4, 7, 6, 7, 1, 1, 0, 0, 1, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0,
+                      0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]),
+]
+
+
+@pytest.mark.parametrize("algo_class, cars_amount, seed, waiting_cars", POINT_MODEL_RUNS)
+def test_same_run_as_point_model(algo_class, cars_amount, seed, waiting_cars):
+    random.seed(seed)
+    roads, traffic_lights, junctions = create_map(800, 800, os.path.join(DATABASES, "handmade", "tel_aviv"))
+    cars = generate_cars(roads, cars_amount, p=0.9, min_len=4)
+    for car in cars:
+        car.enter_first_road()
+    light_algos = [algo_class(junction) for junction in junctions]
+    run_waiting_cars = list()
+    while len(cars) > 0 and len(run_waiting_cars) < 2 * len(waiting_cars):
+        traffic_lights, cars = next_iter(light_algos, traffic_lights, cars)
+        run_waiting_cars.append(sum(car.is_waiting() for car in cars))
+    assert run_waiting_cars == waiting_cars
@@ -0,0 +1,43 @@
+import os
+import random
+
+import numpy as np
+
+from server.cars_generator import generate_cars_bulk, generate_paths
+from server.map_creation import create_map
+
+DATABASES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases")
+
+
+def create_roads(map_name: str):
+    roads, _, _ = create_map(800, 800, os.path.join(DATABASES, map_name))
+    return roads
+
+
+def test_same_seed_same_paths():
+    roads = create_roads("generated/3")
+    indptr, path_roads = generate_paths(roads, 500, seed=11, p=0.9, min_len=4)
+    same_indptr, same_path_roads = generate_paths(roads, 500, seed=11, p=0.9, min_len=4)
+    other_indptr, other_path_roads = generate_paths(roads, 500, seed=12, p=0.9, min_len=4)
+    assert np.array_equal(indptr, same_indptr) and np.array_equal(path_roads, same_path_roads)
+    assert not (np.array_equal(indptr, other_indptr) and np.array_equal(path_roads, other_path_roads))
+
+
+def test_random_seed_same_cars():
+    # without a seed, the generator is seeded from the random module
+    roads = create_roads("handmade/tel_aviv")
+    random.seed(3)
+    cars = generate_cars_bulk(roads, 100, p=0.9, min_len=4)
+    random.seed(3)
+    same_cars = generate_cars_bulk(roads, 100, p=0.9, min_len=4)
+    assert [car.path for car in cars] == [car.path for car in same_cars]
+
+
+def test_paths_follow_the_roads():
+    roads = create_roads("generated/3")
+    cars = generate_cars_bulk(roads, 500, seed=5, p=0.9, min_len=4)
+    assert len(cars) == 500
+    for car in cars:
+        assert len(car.path) >= 4
+        for road, next_road in zip(car.path, car.path[1:]):
+            assert next_road in road.goes_to_roads()
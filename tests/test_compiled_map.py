@@ -0,0 +1,21 @@
+import os
+import shutil
+
+import pytest
+
+from db.compiled_map import COMPILED_DIR, compile_map, is_map_compiled
+from server.map_creation import load_map
+
+DATABASES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases")
+
+
+@pytest.mark.parametrize("map_name", ["handmade/tel_aviv", "generated/3"])
+def test_compiled_map_equals_json_map(map_name, tmp_path):
+    # a copy of the json files only, so the map is compiled here and not next to the repository's maps
+    path = str(tmp_path / "map")
+    shutil.copytree(os.path.join(DATABASES, map_name), path, ignore=shutil.ignore_patterns(COMPILED_DIR))
+    assert not is_map_compiled(path)
+    json_map = load_map(800, 800, path)
+    compile_map(path)
+    assert is_map_compiled(path)
+    assert load_map(800, 800, path) == json_map
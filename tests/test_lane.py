@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+from server.map_creation import create_map
+from server.simulation_objects.lanes.lane import Lane
+from server.simulation_objects.lanes.lane_cars import LaneCars
+
+TEL_AVIV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases", "handmade",
+                        "tel_aviv")
+
+
+class DistanceCar:
+    """
+    a car that is only a distance along its lane
+    """
+
+    def __init__(self, distance_in_lane: float):
+        self.distance_in_lane = distance_in_lane
+
+    def __repr__(self):
+        return f"DistanceCar({self.distance_in_lane})"
+
+
+@pytest.fixture
+def lane() -> Lane:
+    # a lane without a traffic light, so the cars are only kept in order
+    roads, _, _ = create_map(800, 800, TEL_AVIV)
+    return next(lane for road in roads for lane in road.lanes if type(lane) is Lane)
+
+
+def fill(lane: Lane, distances):
+    """
+    :return: the cars that were added to the back of the lane, from the front of the lane
+    """
+    cars = [DistanceCar(distance) for distance in distances]
+    for car in cars:
+        lane.add_car(car)
+    return cars
+
+
+def test_lane_cars_order():
+    cars = LaneCars()
+    first, second, third = DistanceCar(3), DistanceCar(2), DistanceCar(1)
+    cars.append(second)
+    cars.appendleft(first)
+    cars.append(third)
+    assert list(cars) == [first, second, third]
+    assert [cars.index(car) for car in (first, second, third)] == [0, 1, 2]
+    assert cars.car_ahead(first) is None and cars.car_ahead(third) is second
+    assert cars.car_behind(first) is second and cars.car_behind(third) is None
+
+
+def test_lane_cars_insert_between():
+    cars = LaneCars()
+    front, back = DistanceCar(10), DistanceCar(0)
+    cars.append(front)
+    cars.append(back)
+    # more inserts to the same place than the keys can be halved, so the keys are spread again
+    inserted = list()
+    for i in range(100):
+        car = DistanceCar(i)
+        cars.insert(1, car)
+        inserted.append(car)
+    assert list(cars) == [front, *reversed(inserted), back]
+    assert all(cars.index(car) == i for i, car in enumerate(cars))
+
+
+def test_lane_cars_remove():
+    cars = LaneCars()
+    front, middle, back = DistanceCar(3), DistanceCar(2), DistanceCar(1)
+    for car in (front, middle, back):
+        cars.append(car)
+    cars.remove(middle)
+    assert list(cars) == [front, back] and middle not in cars
+    assert cars.car_ahead(back) is front
+    cars.remove(front)
+    assert cars.car_ahead(back) is None and cars.index(back) == 0
+
+
+def test_insert_by_distance(lane):
+    front, back = fill(lane, [8, 2])
+    middle = DistanceCar(5)
+    lane.insert_before(middle, lane.get_car_before(middle))
+    assert list(lane.get_all_cars()) == [front, middle, back]
+    assert lane.get_car_ahead(back) is middle and lane.get_car_ahead(middle) is front
+
+
+def test_car_before_at_the_ends(lane):
+    front, back = fill(lane, [8, 2])
+    # in front of all cars, the closest car behind is the first car
+    assert lane.get_car_before(DistanceCar(9)) is front
+    # behind all cars there is no car behind, so the car is put at the back
+    last = DistanceCar(1)
+    assert lane.get_car_before(last) is None
+    lane.insert_before(last, None)
+    assert list(lane.get_all_cars()) == [front, back, last]
+    # in front of all cars, it is put at the front
+    first = DistanceCar(9)
+    lane.insert_before(first, lane.get_car_before(first))
+    assert list(lane.get_all_cars()) == [first, front, back, last]
+
+
+def test_car_before_in_empty_lane(lane):
+    assert lane.get_car_before(DistanceCar(3)) is None
+
+
+def test_equal_distances(lane):
+    front, back = fill(lane, [5, 5])
+    # a car at the same distance as the lane's cars goes behind them
+    car = DistanceCar(5)
+    assert lane.get_car_before(car) is None
+    lane.insert_before(car, lane.get_car_before(car))
+    assert list(lane.get_all_cars()) == [front, back, car]
+    assert lane.get_cars_between(5, 5) == [car, back, front]
+
+
+def test_remove_car(lane):
+    front, middle, back = fill(lane, [8, 5, 2])
+    lane.remove_car(middle)
+    assert list(lane.get_all_cars()) == [front, back]
+    assert lane.get_car_ahead(back) is front
+    assert lane.cars_amount() == 2
+    assert lane.get_cars_between(0, 10) == [back, front]
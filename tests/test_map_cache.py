@@ -0,0 +1,67 @@
+import os
+import random
+
+import pytest
+
+from algorithms.cost_based import CostBased
+from server.cars_generator import generate_cars
+from server.map_cache import MapCache
+from server.server_runner import run_until_done
+
+DATABASES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases")
+TEL_AVIV = os.path.join(DATABASES, "handmade", "tel_aviv")
+GENERATED = os.path.join(DATABASES, "generated", "3")
+
+
+def run(roads, traffic_lights, junctions):
+    """
+    :return: the amount of iterations and the cars that were left, of a short run on the map
+    """
+    random.seed(4)
+    cars = generate_cars(roads, 60, p=0.9, min_len=4)
+    for car in cars:
+        car.enter_first_road()
+    light_algos = [CostBased(junction) for junction in junctions]
+    iterations = run_until_done(light_algos, traffic_lights, cars, max_iterations=30)
+    return iterations, len(cars)
+
+
+def test_map_is_checked_out():
+    cache = MapCache()
+    cache.get_map(800, 800, TEL_AVIV)
+    with pytest.raises(Exception):
+        cache.get_map(800, 800, TEL_AVIV)
+    # another size is another map
+    cache.get_map(400, 400, TEL_AVIV)
+    cache.release_map(800, 800, TEL_AVIV)
+    with pytest.raises(Exception):
+        cache.release_map(800, 800, TEL_AVIV)
+    cache.get_map(800, 800, TEL_AVIV)
+
+
+def test_released_map_is_reset():
+    cache = MapCache()
+    roads, traffic_lights, junctions = cache.get_map(800, 800, TEL_AVIV)
+    first_run = run(roads, traffic_lights, junctions)
+    cache.release_map(800, 800, TEL_AVIV)
+
+    same_roads, traffic_lights, junctions = cache.get_map(800, 800, TEL_AVIV)
+    assert all(road is same_road for road, same_road in zip(roads, same_roads))
+    assert all(lane.cars_amount() == 0 for road in same_roads for lane in road.lanes)
+    for light in traffic_lights:
+        assert not light.can_pass and light.iteration == 0
+        assert light.cars_amount == 0 and light.waiting_cars_amount == 0 and light.total_waiting_time == 0
+    assert run(same_roads, traffic_lights, junctions) == first_run
+
+
+def test_maps_in_use_are_not_removed():
+    cache = MapCache(max_maps=1)
+    roads, _, _ = cache.get_map(800, 800, TEL_AVIV)
+    # over the size of the cache, but the first map is still in use
+    cache.get_map(800, 800, GENERATED)
+    assert len(cache) == 2
+    cache.release_map(800, 800, GENERATED)
+    assert len(cache) == 1
+    cache.release_map(800, 800, TEL_AVIV)
+    same_roads, _, _ = cache.get_map(800, 800, TEL_AVIV)
+    assert all(road is same_road for road, same_road in zip(roads, same_roads))
@@ -0,0 +1,66 @@
+import os
+import pickle
+import random
+
+import pytest
+
+from algorithms.cost_based import CostBased
+from algorithms.most_crowded import MCAlgo
+from algorithms.naive import NaiveAlgo
+from algorithms.relative_longest_q import RLQTL
+from server.batch_runner import Scenario, run_branches, run_scenario
+from server.cars_generator import generate_cars
+from server.map_cache import reset_map_state
+from server.map_creation import create_map
+from server.server_runner import run_until_done
+from server.simulation_objects.cars.active_cars import ActiveCars
+from server.snapshot import restore_snapshot, take_snapshot
+
+TEL_AVIV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases", "handmade",
+                        "tel_aviv")
+ALGOS = [NaiveAlgo, CostBased, RLQTL, MCAlgo]
+
+
+def run_to_end(light_algos, traffic_lights, cars):
+    """
+    :return: for each iteration, the (id, x, y, speed) of the cars that are still on the map
+    """
+    iterations = list()
+    run_until_done(light_algos, traffic_lights, cars, max_iterations=2000, on_iter=lambda active: iterations.append(
+        [(car.get_id(), car.position.x, car.position.y, car.get_speed()) for car in active]))
+    return iterations
+
+
+@pytest.mark.parametrize("algo_class", ALGOS)
+def test_restored_run_continues_the_same(algo_class):
+    random.seed(3)
+    roads, traffic_lights, junctions = create_map(800, 800, TEL_AVIV)
+    cars = generate_cars(roads, 60, p=0.9, min_len=4)
+    for car in cars:
+        car.enter_first_road()
+    cars = ActiveCars(cars)
+    light_algos = [algo_class(junction) for junction in junctions]
+    run_until_done(light_algos, traffic_lights, cars, max_iterations=20)
+    # through pickle, like a snapshot that is saved to a file
+    snapshot = pickle.loads(pickle.dumps(take_snapshot(roads, traffic_lights, cars, light_algos)))
+    run = run_to_end(light_algos, traffic_lights, cars)
+
+    reset_map_state(roads, traffic_lights, junctions)
+    restored_algos = [algo_class(junction) for junction in junctions]
+    restored_cars = restore_snapshot(snapshot, roads, traffic_lights, restored_algos)
+    assert run_to_end(restored_algos, traffic_lights, restored_cars) == run
+
+
+def test_branches_without_warm_up_are_scenarios():
+    scenario = Scenario(TEL_AVIV, (CostBased,), 60, path_min_len=4, seed=1)
+    roads, traffic_lights, junctions = create_map(800, 800, TEL_AVIV)
+    branches = run_branches(scenario, roads, traffic_lights, junctions, [(algo,) for algo in ALGOS],
+                            warm_up_iterations=0)
+    for algo, branch in zip(ALGOS, branches):
+        reset_map_state(roads, traffic_lights, junctions)
+        result = run_scenario(Scenario(TEL_AVIV, (algo,), 60, path_min_len=4, seed=1), roads, traffic_lights,
+                              junctions)
+        assert branch.iterations == result.iterations
+        assert branch.report.total_waiting_time == result.report.total_waiting_time
+        assert branch.report.total_dec_time == result.report.total_dec_time
+        assert branch.report.car_num == result.report.car_num
@@ -0,0 +1,24 @@
+import numpy as np
+
+from server.statistics.tick_recorder import TickRecorder
+
+
+def test_long_runs_are_spilled():
+    recorder = TickRecorder(["iteration", "cars"], chunk_size=4, max_rows_in_memory=16)
+    for i in range(100):
+        recorder.append(i, 2 * i)
+        if i % 10 == 0:
+            # the rows can be read while the recorder still spills
+            assert np.array_equal(recorder.column("cars"), 2 * np.arange(i + 1))
+    assert len(recorder) == 100
+    assert np.array_equal(recorder.column("iteration"), np.arange(100))
+
+
+def test_spill_path(tmp_path):
+    spill_path = str(tmp_path / "iterations.csv")
+    recorder = TickRecorder(["iteration", "cars"], chunk_size=4, spill_path=spill_path)
+    for i in range(10):
+        recorder.append(i, 2 * i)
+    assert np.array_equal(recorder.to_dict({"cars": "Cars"})["Cars"], 2 * np.arange(10))
+    # the full chunks are already in the file
+    assert np.array_equal(np.loadtxt(spill_path, delimiter=",", skiprows=1, usecols=0), np.arange(8))
@@ -0,0 +1,48 @@
+import os
+import random
+
+import pytest
+
+from algorithms.cost_based import CostBased
+from server.cars_generator import generate_cars
+from server.map_creation import create_map
+from server.server_runner import run_until_done
+from server.simulation_objects.cars.active_cars import ActiveCars
+from server.vectorized_engine import VectorizedCars
+
+TEL_AVIV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases", "handmade",
+                        "tel_aviv")
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_counters_match_the_cars_of_the_lanes(vectorized):
+    random.seed(5)
+    roads, traffic_lights, junctions = create_map(800, 800, TEL_AVIV)
+    cars = generate_cars(roads, 80, p=0.9, min_len=3)
+    if vectorized:
+        cars = VectorizedCars(roads, cars)
+    else:
+        for car in cars:
+            car.enter_first_road()
+        cars = ActiveCars(cars)
+    light_algos = [CostBased(junction) for junction in junctions]
+    # the iteration of the light that each waiting car started waiting at, counted from the cars themselves
+    waiting_since = dict()
+
+    def check(_):
+        for light in traffic_lights:
+            waiting_times = list()
+            for lane in light.lanes:
+                for car in lane.get_all_cars():
+                    key = (lane, car.get_id())
+                    if car.is_waiting():
+                        # the cars start waiting while they are activated, before the light
+                        waiting_times.append(light.iteration - waiting_since.setdefault(key, light.iteration - 1))
+                    else:
+                        waiting_since.pop(key, None)
+            assert light.cars_amount == len(light.all_cars)
+            assert light.waiting_cars_amount == len(waiting_times)
+            assert light.total_waiting_time == sum(waiting_times)
+            assert light.max_waiting_time == max(waiting_times, default=0)
+
+    run_until_done(light_algos, traffic_lights, cars, max_iterations=2000, on_iter=check)
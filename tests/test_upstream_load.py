@@ -0,0 +1,39 @@
+import os
+import random
+
+from algorithms.naive import NaiveAlgo
+from algorithms.upstream_load import upstream_load
+from server.cars_generator import generate_cars
+from server.map_creation import create_map
+from server.server_runner import next_iter
+
+TEL_AVIV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases", "handmade",
+                        "tel_aviv")
+
+
+def expected_traffic_per_lane(lane, depth):
+    """
+    the recursive calculation over the incoming lanes, that UpstreamLoad replaces
+    """
+    prev_lanes = lane._comes_from
+    traff = sum(prev_lane.cars_amount() for prev_lane in prev_lanes)
+    if depth > 0:
+        return traff + sum(expected_traffic_per_lane(prev_lane, depth - 1) for prev_lane in prev_lanes)
+    return traff
+
+
+def test_same_as_recursive_expected_traffic():
+    random.seed(2)
+    roads, traffic_lights, junctions = create_map(800, 800, TEL_AVIV)
+    cars = generate_cars(roads, 100, p=0.9, min_len=4)
+    for car in cars:
+        car.enter_first_road()
+    light_algos = [NaiveAlgo(junction) for junction in junctions]
+    lanes = [lane for road in roads for lane in road.lanes]
+    for iteration in range(40):
+        traffic_lights, cars = next_iter(light_algos, traffic_lights, cars)
+        if iteration % 5 == 0:
+            for depth in range(-1, 4):
+                for lane in lanes:
+                    assert upstream_load(lane).expected_traffic_per_lane(lane, depth) == \
+                           expected_traffic_per_lane(lane, depth)
@@ -0,0 +1,53 @@
+import os
+import random
+
+import pytest
+
+from algorithms.cost_based import CostBased
+from algorithms.naive import NaiveAlgo
+from server.cars_generator import generate_cars
+from server.map_creation import create_map
+from server.server_runner import run_until_done
+from server.vectorized_engine import VectorizedCars
+
+DATABASES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "databases")
+
+
+def run_engine(map_name: str, algo_class, cars_amount: int, seed: int, vectorized: bool):
+    """
+    :return: for each iteration, the (index, x, y, speed) of the cars that are still on the map, where the index of
+             a car is its place in the generated cars
+    """
+    random.seed(seed)
+    roads, traffic_lights, junctions = create_map(800, 800, os.path.join(DATABASES, map_name))
+    cars = generate_cars(roads, cars_amount, p=0.9, min_len=4)
+    first_id = cars[0].get_id()
+    if vectorized:
+        cars = VectorizedCars(roads, cars)
+    else:
+        for car in cars:
+            car.enter_first_road()
+    light_algos = [algo_class(junction) for junction in junctions]
+    iterations = list()
+    run_until_done(light_algos, traffic_lights, cars, max_iterations=2000, on_iter=lambda active: iterations.append(
+        [(car.get_id() - first_id, car.position.x, car.position.y, car.get_speed()) for car in active]))
+    return iterations
+
+
+@pytest.mark.parametrize("map_name, algo_class, cars_amount, seed", [
+    ("handmade/tel_aviv", CostBased, 300, 7),
+    ("handmade/tel_aviv", NaiveAlgo, 300, 7),
+    # a run with cars that stop for cars that get into their lane
+    ("generated/1", NaiveAlgo, 200, 1),
+])
+def test_same_run_as_cars(map_name, algo_class, cars_amount, seed):
+    cars_run = run_engine(map_name, algo_class, cars_amount, seed, vectorized=False)
+    vectorized_run = run_engine(map_name, algo_class, cars_amount, seed, vectorized=True)
+
+    def waiting_time(run):
+        return sum(speed < 0.01 for cars in run for *_, speed in cars)
+
+    assert len(vectorized_run) == len(cars_run)
+    assert waiting_time(vectorized_run) == waiting_time(cars_run)
+    for iteration, (cars, vectorized_cars) in enumerate(zip(cars_run, vectorized_run)):
+        assert vectorized_cars == cars, f"the cars are different after iteration {iteration + 1}"